@@ -0,0 +1,103 @@
+# benchmarks/bench_matcher.py
+
+import random
+import re
+import time
+import logging
+from src.pharma_graph_pipeline.pipeline.matcher import DrugMatcher, FuzzyDrugMatcher
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_drug_names(count: int, rng: random.Random) -> list:
+    """Generates unique, ATC-like upper-case drug names (10% are multi-word)."""
+    names = set()
+    while len(names) < count:
+        name = "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(6, 12))).upper()
+        if rng.random() < 0.1:
+            name += " " + rng.choice(["ACID", "HYDROCHLORIDE", "SODIUM"])
+        names.add(name)
+    return sorted(names)
+
+def make_titles(count: int, drug_names: list, rng: random.Random) -> list:
+    """Generates lower-case titles, roughly one in five mentioning a drug."""
+    words = ["study", "effects", "of", "patients", "with", "trial", "in", "the", "treatment", "mice"]
+    titles = []
+    for _ in range(count):
+        title_words = rng.choices(words, k=12)
+        if rng.random() < 0.2:
+            title_words.insert(rng.randint(0, 12), rng.choice(drug_names).lower())
+        titles.append(" ".join(title_words))
+    return titles
+
+def regex_scan(drug_names: list, titles: list) -> int:
+    """The historical nested loop: one regex per (title, drug) pair."""
+    hits = 0
+    for title in titles:
+        for name in drug_names:
+            if re.search(fr'\b{re.escape(name.lower())}\b', title):
+                hits += 1
+    return hits
+
+def matcher_scan(drug_names: list, titles: list) -> int:
+    """The indexed matcher, including the one-off index construction."""
+    matcher = DrugMatcher(drug_names)
+    return sum(len(matcher.match(title)) for title in titles)
+
+def run_benchmark(drug_counts=(100, 1000, 8000), title_count=2000, baseline_title_count=100, seed=42):
+    """
+    Times both matching strategies for growing drug lists on the same titles.
+    The regex loop is only timed on the first `baseline_title_count` titles
+    (it takes minutes otherwise) and extrapolated to the full title count.
+    """
+    rng = random.Random(seed)
+    for drug_count in drug_counts:
+        drug_names = make_drug_names(drug_count, rng)
+        titles = make_titles(title_count, drug_names, rng)
+
+        start = time.perf_counter()
+        matcher_scan(drug_names, titles)
+        matcher_time = time.perf_counter() - start
+
+        baseline_titles = titles[:baseline_title_count]
+        start = time.perf_counter()
+        regex_hits = regex_scan(drug_names, baseline_titles)
+        regex_time = (time.perf_counter() - start) * title_count / len(baseline_titles)
+
+        assert matcher_scan(drug_names, baseline_titles) == regex_hits
+        logging.info(
+            f"{drug_count:>6} drugs x {title_count} titles: "
+            f"regex loop ~{regex_time:7.3f}s | matcher {matcher_time:8.3f}s | "
+            f"speedup x{regex_time / matcher_time:,.0f}"
+        )
+
+def run_fuzzy_benchmark(drug_count=2000, synonym_counts=(0, 1000, 10000), title_count=100000, seed=42):
+    """
+    Times the fuzzy matcher (synonyms and one edit) against exact matching,
+    for growing synonym tables. The one-off index construction is timed apart.
+    """
+    rng = random.Random(seed)
+    drug_names = make_drug_names(drug_count, rng)
+    titles = make_titles(title_count, drug_names, rng)
+
+    start = time.perf_counter()
+    matcher_scan(drug_names, titles)
+    exact_time = time.perf_counter() - start
+    for synonym_count in synonym_counts:
+        synonyms = [(rng.randrange(drug_count), name) for name in make_drug_names(synonym_count, rng)]
+        start = time.perf_counter()
+        matcher = FuzzyDrugMatcher(drug_names, synonyms)
+        index_time = time.perf_counter() - start
+        for title in titles:
+            matcher.match(title)
+        fuzzy_time = time.perf_counter() - start - index_time
+        logging.info(
+            f"{synonym_count:>6} synonyms x {title_count} titles: exact {exact_time:8.3f}s | "
+            f"fuzzy {fuzzy_time:8.3f}s (x{fuzzy_time / exact_time:.1f}) + index {index_time:.3f}s"
+        )
+
+if __name__ == '__main__':
+    logging.info("⏱️ Benchmarking drug matching against drug-list size...")
+    run_benchmark()
+    logging.info("⏱️ Benchmarking fuzzy matching against synonym-table size...")
+    run_fuzzy_benchmark()
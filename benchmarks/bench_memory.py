@@ -0,0 +1,77 @@
+# benchmarks/bench_memory.py
+
+import os
+import sys
+import time
+import logging
+import tracemalloc
+import numpy as np
+import pandas as pd
+from src.pharma_graph_pipeline.pipeline.load import write_journals
+from src.pharma_graph_pipeline.pipeline.mentions import MentionTable
+from src.pharma_graph_pipeline.pipeline.preprocess import CATEGORICAL_COLUMNS
+from src.pharma_graph_pipeline.pipeline.transform import group_mentions, iter_journals
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_inputs(count: int, drug_count: int = 1000, journal_count: int = 2000, seed: int = 42):
+    """
+    Generates clean compact publications, a drugs table and the drug positions
+    matched in each title, about 2 mentions per mentioning publication.
+    """
+    rng = np.random.default_rng(seed)
+    publication_count = count // 2
+    drugs_df = pd.DataFrame({
+        'atccode': [f"A{i:05d}" for i in range(drug_count)],
+        'drug': [f"DRUG {i}" for i in range(drug_count)],
+    })
+    publications_df = pd.DataFrame({
+        'id': np.arange(publication_count).astype(str).astype(object),
+        'title': [f"a study of drug {i % 1000} in {i % 7} patients" for i in range(publication_count)],
+        'date': rng.integers(17000, 19000, size=publication_count).astype(np.int32),
+        'journal': [f"journal {j}" for j in rng.integers(0, journal_count, size=publication_count).tolist()],
+        'source_type': rng.choice(['pubmed', 'clinical_trial'], size=publication_count),
+    })
+    for column in CATEGORICAL_COLUMNS:
+        publications_df[column] = publications_df[column].astype('category')
+    all_matches = rng.integers(0, drug_count, size=(publication_count, 2)).tolist()
+    return drugs_df, publications_df, all_matches
+
+def measure(function) -> tuple:
+    """Runs `function`, returning its wall time and peak traced allocations (MB)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return elapsed, peak
+
+def run_benchmark(count: int = 1_000_000):
+    """Compares the peak memory of the mention record path with the compact table path."""
+    drugs_df, publications_df, all_matches = make_inputs(count)
+
+    def with_records():
+        # The historical path: one dict per mention, then the whole graph, then the output
+        records = MentionTable.from_matches(drugs_df, publications_df, all_matches).to_records()
+        drug_graph = group_mentions(records)
+        with open(os.devnull, 'wb') as f:
+            write_journals(drug_graph['journals'], f, compact=True)
+
+    def with_table():
+        # Compact mentions, journals built one at a time as the output is written
+        table = MentionTable.from_matches(drugs_df, publications_df, all_matches)
+        with open(os.devnull, 'wb') as f:
+            write_journals(iter_journals(table), f, compact=True)
+
+    records_time, records_peak = measure(with_records)
+    table_time, table_peak = measure(with_table)
+    logging.info(
+        f"{count:,} mentions: records {records_peak:,.0f} MB in {records_time:.2f}s | "
+        f"compact table {table_peak:,.0f} MB in {table_time:.2f}s | peak memory cut x{records_peak / table_peak:.1f}"
+    )
+
+if __name__ == '__main__':
+    logging.info("⏱️ Benchmarking mention memory...")
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,117 @@
+# benchmarks/bench_pipeline.py
+
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+from benchmarks.corpus import generate_corpus
+from src.pharma_graph_pipeline.main import load_config, resolve_config_paths, run_graph_pipeline
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+PROJECT_DIR = Path(__file__).parent.parent
+# The benchmark runs the pipeline with the options of the project configuration
+PROJECT_CONFIG = PROJECT_DIR / "config.yaml"
+# Paths of the files the runs write (outputs, scratch and state files)
+RUN_PATHS = [('dedup', 'spill_dir'), ('incremental', 'state_dir'), ('memo', 'path'), ('cache', 'dir')]
+# A timing regresses when it exceeds its baseline by this share...
+DEFAULT_TOLERANCE = 0.25
+# ...and by this many seconds, so that noise on tiny timings never fails a run
+MIN_REGRESSION_SECONDS = 0.05
+
+def bench_config(raw_dir: Path, output_dir: Path) -> Dict:
+    """
+    The project configuration (config.yaml) with only its paths changed: the
+    raw data is `raw_dir`, and the outputs, scratch and state files go to
+    `output_dir`. The other paths (e.g. the synonym table) stay those of the project.
+    """
+    config = resolve_config_paths(load_config(str(PROJECT_CONFIG)), str(PROJECT_DIR))
+    config['input_paths'] = {'raw_data_dir': str(raw_dir)}
+    config['output_path'] = {name: str(output_dir / Path(path).name) for name, path in config['output_path'].items()}
+    for section, key in RUN_PATHS:
+        if key in (config.get(section) or {}):
+            config[section][key] = str(output_dir / Path(config[section][key]).name)
+    return config
+
+def time_pipeline(raw_dir: Path, output_dir: Path) -> Dict[str, float]:
+    """Runs the pipeline once on a raw data directory, without the stage cache, and returns the wall time of each stage."""
+    config = bench_config(raw_dir, output_dir)
+
+    start = time.perf_counter()
+    _, report = run_graph_pipeline(config, use_cache=False, with_graph=False)
+    timings = {name: stage['wall_seconds'] for name, stage in report['stages'].items()}
+    timings['end_to_end'] = round(time.perf_counter() - start, 4)
+    return timings
+
+def check_regressions(timings: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """Returns a message for each timing that regressed against its baseline."""
+    regressions = []
+    for name, seconds in timings.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if seconds > reference * (1 + tolerance) and seconds - reference > MIN_REGRESSION_SECONDS:
+            regressions.append(f"{name}: {seconds:.3f}s vs baseline {reference:.3f}s (+{seconds / reference - 1:.0%})")
+    return regressions
+
+def run_benchmark(title_counts: List[int], drug_counts: List[int], repeat: int = 3,
+                  tolerance: float = DEFAULT_TOLERANCE, update_baseline: bool = False) -> bool:
+    """
+    Times each stage and the end-to-end run on synthetic corpora of every
+    (titles, drugs) size, keeping the best of `repeat` runs. The timings are
+    compared with the stored baselines, or stored as the new baselines.
+
+    Returns:
+        bool: True when no timing regressed.
+    """
+    baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.is_file() else {}
+    all_regressions = []
+
+    for title_count in title_counts:
+        for drug_count in drug_counts:
+            size = f"{title_count}x{drug_count}"
+            with tempfile.TemporaryDirectory() as temp_dir:
+                raw_dir = generate_corpus(Path(temp_dir) / "raw", title_count, drug_count)
+                logging.disable(logging.INFO)
+                runs = [time_pipeline(raw_dir, Path(temp_dir)) for _ in range(repeat)]
+                logging.disable(logging.NOTSET)
+
+            timings = {name: min(run[name] for run in runs) for name in runs[0]}
+            logging.info(f"{title_count:,} titles x {drug_count:,} drugs: " + " | ".join(
+                f"{name} {seconds:.3f}s" for name, seconds in timings.items()
+            ))
+
+            if update_baseline:
+                baselines[size] = timings
+            elif size in baselines:
+                regressions = check_regressions(timings, baselines[size], tolerance)
+                all_regressions.extend(f"[{size}] {message}" for message in regressions)
+            else:
+                logging.warning(f"No baseline for {size}: run with --update-baseline to store one.")
+
+    if update_baseline:
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=4, sort_keys=True) + "\n")
+        logging.info(f"Baselines saved to {BASELINES_PATH}")
+
+    for message in all_regressions:
+        logging.error(f"❌ Regression {message}")
+    return not all_regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks the pipeline stages on synthetic corpora.")
+    parser.add_argument('--titles', type=int, nargs='+', default=[10_000, 100_000], help="Corpus sizes (10k to 10M titles).")
+    parser.add_argument('--drugs', type=int, nargs='+', default=[100, 1_000], help="Drug list sizes (100 to 10k).")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per size; the best one is kept.")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown (0.25 = 25%%).")
+    parser.add_argument('--update-baseline', action='store_true', help="Store the timings as the new baselines.")
+    args = parser.parse_args()
+
+    logging.info("⏱️ Benchmarking the pipeline stages...")
+    if not run_benchmark(args.titles, args.drugs, args.repeat, args.tolerance, args.update_baseline):
+        sys.exit(1)
@@ -0,0 +1,154 @@
+# benchmarks/corpus.py
+
+import argparse
+import json
+import logging
+import random
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from benchmarks.bench_matcher import make_drug_names
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Records generated (and written) at a time, so 10M titles fit in memory
+CHUNK_SIZE = 100_000
+# Share of the titles written to each raw file
+FILE_SHARES = {'pubmed.csv': 0.4, 'pubmed.json': 0.2, 'clinical_trials.csv': 0.4}
+# Share of the pubmed.json records that are publications of pubmed.csv
+# (same title, date and journal), as in the real sources
+DUPLICATE_SHARE = 0.1
+
+WORDS = np.array([
+    "study", "effects", "of", "patients", "with", "trial", "in", "the", "treatment", "mice",
+    "<i>randomized</i>", "Phase", "(II)", "versus", "\\xc3\\xb1", "children", "therapy:", "and"
+])
+JOURNALS = np.array([
+    "Journal of emergency nursing", "The Lancet", "NEJM", "Psychopharmacology",
+    "Hôpitaux Universitaires de Genève", "Journal of food protection\\xc3\\x28", "The journal of pediatrics"
+])
+# The date formats found in the real sources
+DATES = np.array(["01/01/2019", "1 January 2020", "2020-01-01", "25/05/2020", "27 April 2020", "02/01/2019"])
+# Suffixes of the punctuated drug names, like 'TRANEXAMIC ACID (ORAL)'
+DRUG_SUFFIXES = ["(ORAL)", "B12", "2.5%", "- D3"]
+
+def make_corpus_drug_names(count: int, rng: random.Random) -> list:
+    """
+    The drug names of `make_drug_names` (10% multi-word), of which about 10%
+    are hyphenated (like 'DRUG-X') and 5% end with punctuation or digits (like
+    'VITAMIN B12'), so the pipeline benchmark exercises multi-token names.
+    """
+    names = make_drug_names(count, rng)
+    for position, name in enumerate(names):
+        draw = rng.random()
+        if draw < 0.1:
+            cut = rng.randint(2, len(name.split()[0]) - 2)
+            names[position] = f"{name[:cut]}-{name[cut:]}"
+        elif draw < 0.15:
+            names[position] = f"{name} {rng.choice(DRUG_SUFFIXES)}"
+    # The base names have no punctuation, so the names stay unique
+    return sorted(names)
+
+def _make_titles(rng: np.random.Generator, count: int, drug_names: np.ndarray) -> np.ndarray:
+    """Titles of 6 to 14 words, about 1 in 5 mentioning a drug and 1 in 100 empty."""
+    lengths = rng.integers(6, 15, size=count)
+    words = WORDS[rng.integers(0, len(WORDS), size=(count, 14))]
+    titles = np.array([" ".join(row[:length]) for row, length in zip(words.tolist(), lengths.tolist())], dtype=object)
+
+    mentions = rng.random(count) < 0.2
+    drugs = drug_names[rng.integers(0, len(drug_names), size=int(mentions.sum()))]
+    # Drug names appear in title case, like 'Diphenhydramine hydrochloride helps...'
+    titles[mentions] = [f"{drug.title()} {title}" for drug, title in zip(drugs.tolist(), titles[mentions].tolist())]
+    titles[rng.random(count) < 0.01] = "  "
+    return titles
+
+def _make_chunk(rng: np.random.Generator, start: int, count: int, drug_names: np.ndarray, trials: bool) -> pd.DataFrame:
+    ids = np.arange(start, start + count).astype(str)
+    return pd.DataFrame({
+        'id': np.char.add("NCT", ids) if trials else ids,
+        'scientific_title' if trials else 'title': _make_titles(rng, count, drug_names),
+        'date': DATES[rng.integers(0, len(DATES), size=count)],
+        'journal': JOURNALS[rng.integers(0, len(JOURNALS), size=count)],
+    })
+
+def _copy_publications(rng: np.random.Generator, chunk_df: pd.DataFrame, source_df: pd.DataFrame) -> pd.DataFrame:
+    """Gives DUPLICATE_SHARE of the records the title, date and journal of a record of `source_df`."""
+    copies = np.flatnonzero(rng.random(len(chunk_df)) < DUPLICATE_SHARE)
+    originals = source_df.iloc[rng.integers(0, len(source_df), size=len(copies))]
+    for column in ('title', 'date', 'journal'):
+        chunk_df.iloc[copies, chunk_df.columns.get_loc(column)] = originals[column].to_numpy()
+    return chunk_df
+
+def _write_json_array(path: Path, chunks):
+    """Writes records as a JSON array with a trailing comma, like the real pubmed.json."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[\n")
+        for chunk_df in chunks:
+            for record in chunk_df.to_dict('records'):
+                # Numeric ids, one in ten left empty as in the real file
+                record['id'] = int(record['id']) if record['id'][-1] != '7' else ""
+                f.write("  " + json.dumps(record, ensure_ascii=False) + ",\n")
+        f.write("]\n")
+
+def generate_corpus(output_dir: str, title_count: int = 10_000, drug_count: int = 100, seed: int = 42) -> Path:
+    """
+    Writes a synthetic raw data directory (drugs.csv, pubmed.csv, pubmed.json,
+    clinical_trials.csv) with the quirks of the real sources: mixed date
+    formats, a trailing comma in the JSON array, '\\xc3'-style escape
+    artifacts, HTML tags, empty titles, multi-word, hyphenated and
+    punctuated drug names, and pubmed.json records that duplicate pubmed.csv
+    publications (see DUPLICATE_SHARE). The same arguments always
+    produce the same files.
+
+    Args:
+        output_dir (str): The directory to write the files to.
+        title_count (int): Total number of publications, across all files.
+        drug_count (int): Number of drugs.
+        seed (int): Seed of the random generators.
+
+    Returns:
+        Path: The output directory.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    drug_names = np.array(make_corpus_drug_names(drug_count, random.Random(seed)))
+    pd.DataFrame({
+        'atccode': [f"A{position:05d}" for position in range(drug_count)],
+        'drug': drug_names,
+    }).to_csv(output_dir / "drugs.csv", index=False)
+
+    start = 0
+    # The first pubmed.csv records, duplicated in pubmed.json
+    pubmed_df = None
+    for filename, share in FILE_SHARES.items():
+        count = int(title_count * share)
+        chunks = (
+            _make_chunk(rng, start + offset, min(CHUNK_SIZE, count - offset), drug_names, filename.startswith('clinical'))
+            for offset in range(0, count, CHUNK_SIZE)
+        )
+        if filename.endswith('.json'):
+            if pubmed_df is not None:
+                chunks = (_copy_publications(rng, chunk_df, pubmed_df) for chunk_df in chunks)
+            _write_json_array(output_dir / filename, chunks)
+        else:
+            with open(output_dir / filename, 'w', encoding='utf-8', newline='') as f:
+                for position, chunk_df in enumerate(chunks):
+                    chunk_df.to_csv(f, index=False, header=position == 0)
+                    if filename == 'pubmed.csv' and position == 0:
+                        pubmed_df = chunk_df
+        start += count
+        logging.info(f"Synthetic file written: {filename} ({count:,} records)")
+
+    return output_dir
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generates a synthetic raw data directory.")
+    parser.add_argument('output_dir')
+    parser.add_argument('--titles', type=int, default=10_000, help="Number of publications (10k to 10M).")
+    parser.add_argument('--drugs', type=int, default=100, help="Number of drugs (100 to 10k).")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    generate_corpus(args.output_dir, args.titles, args.drugs, args.seed)
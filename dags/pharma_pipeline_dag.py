@@ -1,30 +1,29 @@
 # dags/pharma_pipeline_dag.py
 
-from airflow.models.dag import DAG
+from airflow.decorators import dag
 from airflow.operators.bash import BashOperator
 import pendulum
 
 # This makes the DAG portable across different environments.
 PROJECT_DIR = "{{ var.value.pharma_project_dir }}"
-# Commande pour installer les dépendances et lancer un script
-RUN_COMMAND = f"""
-cd {PROJECT_DIR} && \
-pip install -r requirements.txt && \
-python -m
-"""
 
-with DAG(
+@dag(
     dag_id="pharma_data_pipeline_v1",
     start_date=pendulum.datetime(2025, 1, 1, tz="Europe/Paris"),
     schedule="@daily",
     catchup=False,
     tags=["data-eng", "pharma"],
+    # Relative to the project directory, or an fsspec URL (gs://...)
+    params={"config_path": "config.yaml"},
     doc_md="""
     ### Pharmaceutical Data Pipeline
     This DAG orchestrates the full ETL process for pharmaceutical publications.
-    It tests the code, runs the main pipeline, and performs ad-hoc analysis.
+    It tests the code, then runs the main pipeline and the ad-hoc analysis in
+    a single process: the dependencies are installed once in the
+    environment (Composer PyPI packages), not by every task.
     """,
-) as dag:
+)
+def pharma_data_pipeline():
 
     # Task 1: Run tests as a quality gate before execution
     task_run_tests = BashOperator(
@@ -32,17 +31,20 @@ with DAG(
         bash_command=f"cd {PROJECT_DIR} && pytest -v",
     )
 
-    # Task 2: Run the main data pipeline script
-    task_run_main_pipeline = BashOperator(
-        task_id="run_main_pipeline",
-        bash_command=f"{RUN_COMMAND} src.pharma_graph_pipeline.main",
-    )
-
-    # Task 3: Run the ad-hoc analysis script
-    task_run_adhoc_analysis = BashOperator(
-        task_id="run_adhoc_analysis",
-        bash_command=f"{RUN_COMMAND} src.pharma_graph_pipeline.adhoc.analysis",
+    # Task 2: Run the pipeline, then analyse the graph it returns, in the same process.
+    # The project runs in its own Python process, from its directory: its `src`
+    # package never shares the worker's sys.path and modules with other DAGs.
+    # The last stdout line, a small JSON summary (never the graph), goes to XCom.
+    task_run_pipeline_and_analysis = BashOperator(
+        task_id="run_pipeline_and_analysis",
+        bash_command=(
+            f"cd {PROJECT_DIR} && "
+            "python -m src.pharma_graph_pipeline.main --config '{{ params.config_path }}' --with-analysis"
+        ),
+        do_xcom_push=True,
     )
 
     # Define the execution order
-    task_run_tests >> task_run_main_pipeline >> task_run_adhoc_analysis
\ No newline at end of file
+    task_run_tests >> task_run_pipeline_and_analysis
+
+pharma_data_pipeline()
@@ -1,9 +1,13 @@
 # src/pharma_graph_pipeline/adhoc/analysis.py
 
-import json
 from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import sqlite3
 import yaml
 import logging
+from src.pharma_graph_pipeline.adhoc.graph_reader import iter_graph_references, iter_partitioned_references
+from src.pharma_graph_pipeline.pipeline.load import REFERENCE_SOURCE_TYPES, compressed_path
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -11,7 +15,9 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 def find_top_journals(graph_file_path: str) -> str:
     """
     Analyzes the journal-centric JSON to find the journal(s) that mention the
-    most *different* drugs. Handles ties by listing all winners.
+    most *different* drugs. Handles ties by listing all winners. The file is
+    streamed one reference at a time, so only the distinct (journal, drug)
+    pairs are held in memory, never the graph.
 
     Args:
         graph_file_path (str): Path to the output JSON file.
@@ -20,52 +26,96 @@ def find_top_journals(graph_file_path: str) -> str:
         str: A formatted string announcing the top journal(s).
     """
     try:
-        with open(graph_file_path, 'r', encoding='utf-8') as f:
-            # The loaded data is a dictionary: {"journals": [...]}
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
+        journal_drug_counts = drugs_per_journal_in_graph(graph_file_path)
+    except (FileNotFoundError, ValueError) as e:
+        # json.JSONDecodeError is a ValueError
         return f"Error reading JSON file: {e}"
 
-    # Use defaultdict(set) to count unique drugs per journal
-    journal_drug_counts = defaultdict(set)
-    
-    # Get the list of journals from the top-level dictionary
-    journal_list = data.get('journals', [])
-
-    # 1. Loop through the list of journals
-    for journal_data in journal_list:
-        journal_name = journal_data.get('title')
-        if not journal_name:
-            continue
-        
-        references = journal_data.get('references', {})
-        
-        # 2. Loop through pubmed publications for that journal
-        for pubmed_ref in references.get('pubmed', []):
-            drug_name = pubmed_ref.get('mentioned_drug_name')
-            if drug_name:
-                journal_drug_counts[journal_name].add(drug_name)
-
-        # 3. Loop through clinical trials for that journal
-        for trial_ref in references.get('clinical_trials', []):
-            drug_name = trial_ref.get('mentioned_drug_name')
-            if drug_name:
-                journal_drug_counts[journal_name].add(drug_name)
+    if not journal_drug_counts:
+        return "No journals found in the data."
+    return _format_top_journals(list(journal_drug_counts.items()))
+
+def drugs_per_journal_in_graph(graph_file_path: str) -> Dict[str, int]:
+    """
+    Counts the different drugs mentioned by each journal of the JSON graph,
+    streaming its references (see `iter_graph_references`).
+
+    Args:
+        graph_file_path (str): Path to the output JSON file.
+
+    Returns:
+        Dict[str, int]: The number of different drugs, by journal name.
+    """
+    return _count_journal_drugs(iter_graph_references(graph_file_path))
+
+def find_top_journals_in_partitions(partition_dir: str, start_date: Optional[str] = None,
+                                    end_date: Optional[str] = None) -> str:
+    """
+    Counterpart of `find_top_journals` for the graph partitioned by mention
+    date, restricted to the mentions between two dates (inclusive): only the
+    partitions covering the date range are read.
+
+    Args:
+        partition_dir (str): Path to the directory of the graph partitions.
+        start_date (str): First date, as YYYY-MM-DD, or None.
+        end_date (str): Last date, as YYYY-MM-DD, or None.
+
+    Returns:
+        str: A formatted string announcing the top journal(s).
+    """
+    try:
+        journal_drug_counts = _count_journal_drugs(
+            iter_partitioned_references(partition_dir, start_date=start_date, end_date=end_date)
+        )
+    except (FileNotFoundError, ValueError) as e:
+        return f"Error reading JSON file: {e}"
 
     if not journal_drug_counts:
         return "No journals found in the data."
+    # Journals come partition by partition: list them in name order, as in the graph
+    return _format_top_journals(sorted(journal_drug_counts.items()))
+
+def _count_journal_drugs(references: Iterable[Dict]) -> Dict[str, int]:
+    """Counts the different drugs of streamed references, by journal name."""
+    journal_drugs = defaultdict(set)
+    for reference in references:
+        if reference['journal'] and reference.get('mentioned_drug_name'):
+            journal_drugs[reference['journal']].add(reference['mentioned_drug_name'])
+    return {journal: len(drugs) for journal, drugs in journal_drugs.items()}
+
+def find_top_journals_in_graph(drug_graph: Dict) -> str:
+    """
+    In-memory counterpart of `find_top_journals`, for a graph returned by
+    `run_graph_pipeline` in the same process: nothing is read back from disk.
+
+    Args:
+        drug_graph (Dict): The journal-centric graph, {"journals": [...]}.
 
+    Returns:
+        str: A formatted string announcing the top journal(s).
+    """
+    # The references of every journal, pubmed then clinical trials, counted like the streamed ones
+    journal_drug_counts = _count_journal_drugs(
+        {'journal': journal_data.get('title'), **reference}
+        for journal_data in drug_graph.get('journals', [])
+        for reference_key in REFERENCE_SOURCE_TYPES
+        for reference in journal_data.get('references', {}).get(reference_key, [])
+    )
+
+    if not journal_drug_counts:
+        return "No journals found in the data."
+    return _format_top_journals(list(journal_drug_counts.items()))
+
+def _format_top_journals(journal_counts: List[Tuple[str, int]]) -> str:
+    """Formats the journal(s) with the highest count of different drugs."""
     # Find the maximum score
-    max_count = max(len(drugs) for drugs in journal_drug_counts.values())
+    max_count = max(count for _, count in journal_counts)
 
     if max_count == 0:
         return "No drug mentions found in any journal."
 
     # List all journals that achieved this maximum score
-    top_journals = [
-        journal for journal, drugs in journal_drug_counts.items() 
-        if len(drugs) == max_count
-    ]
+    top_journals = [journal for journal, count in journal_counts if count == max_count]
 
     # Format the output message
     if len(top_journals) == 1:
@@ -74,16 +124,120 @@ def find_top_journals(graph_file_path: str) -> str:
         journal_list_str = ", ".join(top_journals)
         return f"There are {len(top_journals)} journals tied for the top spot, each mentioning {max_count} different drugs: {journal_list_str}."
 
+def _connect_store(store_path: str) -> sqlite3.Connection:
+    """Opens the graph store written by the load stage, read-only."""
+    if not Path(store_path).is_file():
+        raise FileNotFoundError(f"Graph store not found: {store_path}")
+    return sqlite3.connect(f"file:{store_path}?mode=ro", uri=True)
+
+def drugs_per_journal(store_path: str) -> Dict[str, int]:
+    """
+    Counts the different drugs mentioned by each journal, through the
+    (journal, mentioned_drug_name) index of the graph store.
+
+    Args:
+        store_path (str): Path to the SQLite graph store.
+
+    Returns:
+        Dict[str, int]: The number of different drugs, by journal name.
+    """
+    connection = _connect_store(store_path)
+    try:
+        rows = connection.execute(
+            """SELECT journal, COUNT(DISTINCT mentioned_drug_name) FROM mentions
+               WHERE mentioned_drug_name IS NOT NULL AND mentioned_drug_name != ''
+               GROUP BY journal ORDER BY journal"""
+        )
+        return dict(rows.fetchall())
+    finally:
+        connection.close()
+
+def find_top_journals_in_store(store_path: str) -> str:
+    """
+    Indexed counterpart of `find_top_journals`: answers from the graph store,
+    without loading the graph into memory.
+
+    Args:
+        store_path (str): Path to the SQLite graph store.
+
+    Returns:
+        str: A formatted string announcing the top journal(s).
+    """
+    try:
+        journal_drug_counts = drugs_per_journal(store_path)
+    except (FileNotFoundError, sqlite3.Error) as e:
+        return f"Error reading graph store: {e}"
+
+    if not journal_drug_counts:
+        return "No journals found in the data."
+    return _format_top_journals(list(journal_drug_counts.items()))
+
+def journals_per_drug(store_path: str, atccode: str) -> List[str]:
+    """
+    Lists the journals that mention a drug, through the (mentioned_drug_id,
+    journal) index of the graph store.
+
+    Args:
+        store_path (str): Path to the SQLite graph store.
+        atccode (str): The ATC code of the drug.
+
+    Returns:
+        List[str]: The journal names, sorted.
+    """
+    connection = _connect_store(store_path)
+    try:
+        rows = connection.execute(
+            "SELECT DISTINCT journal FROM mentions WHERE mentioned_drug_id = ? ORDER BY journal", (atccode,)
+        )
+        return [journal for journal, in rows]
+    finally:
+        connection.close()
+
+def mentions_between(store_path: str, start_date: str, end_date: str,
+                     source_type: Optional[str] = None) -> List[Dict]:
+    """
+    Returns the mentions published between two dates (inclusive), optionally
+    for one source type, through the date indexes of the graph store.
+
+    Args:
+        store_path (str): Path to the SQLite graph store.
+        start_date (str): First date, as YYYY-MM-DD.
+        end_date (str): Last date, as YYYY-MM-DD.
+        source_type (str): 'pubmed' or 'clinical_trial', or None for both.
+
+    Returns:
+        List[Dict]: The mention records, by date.
+    """
+    query = "SELECT * FROM mentions WHERE mention_date BETWEEN ? AND ?"
+    parameters = [start_date, end_date]
+    if source_type is not None:
+        query += " AND source_type = ?"
+        parameters.append(source_type)
+    query += " ORDER BY mention_date, rowid"
+
+    connection = _connect_store(store_path)
+    connection.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in connection.execute(query, parameters)]
+    finally:
+        connection.close()
+
 
 if __name__ == '__main__':
     try:
         with open('config.yaml', 'r') as f:
             config = yaml.safe_load(f)
         
-        graph_path = config['output_path']['drug_graph']
+        # The graph written with `load.compression` carries its extension
+        graph_path = compressed_path(config['output_path']['drug_graph'], (config.get('load') or {}).get('compression'))
+        store_path = config['output_path'].get('graph_store')
         
         logging.info("🔎 Running ad-hoc analysis: Finding the top journal(s)...")
-        result = find_top_journals(graph_path)
+        # Prefer the indexed store, and fall back to scanning the JSON graph
+        if store_path and Path(store_path).is_file():
+            result = find_top_journals_in_store(store_path)
+        else:
+            result = find_top_journals(graph_path)
         logging.info(f"🏆 Analysis result: {result}")
 
     except FileNotFoundError:
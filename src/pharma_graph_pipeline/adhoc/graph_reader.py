@@ -0,0 +1,152 @@
+# src/pharma_graph_pipeline/adhoc/graph_reader.py
+
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional
+import logging
+from src.pharma_graph_pipeline.pipeline.extract import JsonStream
+from src.pharma_graph_pipeline.pipeline.load import REFERENCE_SOURCE_TYPES, load_partition_manifest, partition_url
+from src.pharma_graph_pipeline.pipeline.storage import open_url
+
+def _keep_reference(reference: Dict, drug: Optional[str], start_date: Optional[str], end_date: Optional[str]) -> bool:
+    """Whether a reference passes the drug and date filters."""
+    if drug is not None and drug != reference.get('mentioned_drug_id') \
+            and drug.upper() != str(reference.get('mentioned_drug_name', '')).upper():
+        return False
+    mention_date = reference.get('mention_date', '')
+    if start_date is not None and mention_date < start_date:
+        return False
+    if end_date is not None and mention_date > end_date:
+        return False
+    return True
+
+def iter_graph_references(graph_file_path: str, journal: Optional[str] = None, drug: Optional[str] = None,
+                          start_date: Optional[str] = None, end_date: Optional[str] = None,
+                          source_type: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Streams the references of the journal-centric graph written by the
+    pipeline, one at a time and in file order, without loading the graph:
+    memory stays constant however large the file is. Compressed files (.gz,
+    .zst) and fsspec URLs are read transparently.
+
+    Args:
+        graph_file_path (str): Path or URL of the {"journals": [...]} JSON file.
+        journal (str): Only the references of this journal (case-insensitive).
+        drug (str): Only the mentions of this drug, by ATC code or name.
+        start_date (str): Only the mentions from this date on, as YYYY-MM-DD.
+        end_date (str): Only the mentions up to this date (inclusive).
+        source_type (str): 'pubmed' or 'clinical_trial', or None for both.
+
+    Yields:
+        Dict: The reference, with its 'journal' and 'source_type'.
+    """
+    journal = journal.lower() if journal is not None else None
+    with open_url(graph_file_path, 'r', encoding='utf-8', compression='infer') as f:
+        stream = JsonStream(f)
+        for key in stream.iter_keys():
+            if key != 'journals':
+                stream.skip_value()
+                continue
+            for _ in stream.iter_items():
+                title, pending = None, None
+                for journal_key in stream.iter_keys():
+                    if journal_key == 'title':
+                        title = stream.read_value()
+                    elif journal_key != 'references':
+                        stream.skip_value()
+                    elif title is None:
+                        # References before the title: this journal is decoded in full
+                        pending = stream.read_value()
+                    elif journal is not None and title.lower() != journal:
+                        stream.skip_value()
+                    else:
+                        yield from _iter_source_references(stream, title, drug, start_date, end_date, source_type)
+                if pending is not None and (journal is None or str(title).lower() == journal):
+                    for reference_key, references in pending.items():
+                        reference_type = REFERENCE_SOURCE_TYPES.get(reference_key, reference_key)
+                        if source_type is None or reference_type == source_type:
+                            for reference in references:
+                                if _keep_reference(reference, drug, start_date, end_date):
+                                    yield {'journal': title, 'source_type': reference_type, **reference}
+
+def _iter_source_references(stream: JsonStream, title: str, drug: Optional[str], start_date: Optional[str],
+                            end_date: Optional[str], source_type: Optional[str]) -> Iterator[Dict]:
+    """Streams the filtered references of a journal's {"pubmed": [...], ...} object."""
+    for reference_key in stream.iter_keys():
+        reference_type = REFERENCE_SOURCE_TYPES.get(reference_key, reference_key)
+        if source_type is not None and reference_type != source_type:
+            stream.skip_value()
+            continue
+        for _ in stream.iter_items():
+            reference = stream.read_value()
+            if _keep_reference(reference, drug, start_date, end_date):
+                yield {'journal': title, 'source_type': reference_type, **reference}
+
+def iter_graph_journals(graph_file_path: str, **filters) -> Iterator[Dict]:
+    """
+    Streams the journals of the graph, one at a time, keeping only their
+    references that pass the `filters` of `iter_graph_references`. Only the
+    journal being built is held in memory; journals left without references
+    are skipped.
+
+    Args:
+        graph_file_path (str): Path or URL of the {"journals": [...]} JSON file.
+        **filters: journal, drug, start_date, end_date or source_type.
+
+    Yields:
+        Dict: The journal, {"title": ..., "references": {"pubmed": [...], "clinical_trials": [...]}}.
+    """
+    reference_keys = {source_type: reference_key for reference_key, source_type in REFERENCE_SOURCE_TYPES.items()}
+    references = iter_graph_references(graph_file_path, **filters)
+    for title, journal_references in groupby(references, key=lambda reference: reference['journal']):
+        grouped = {reference_key: [] for reference_key in REFERENCE_SOURCE_TYPES}
+        for reference in journal_references:
+            del reference['journal']
+            source_type = reference.pop('source_type')
+            grouped.setdefault(reference_keys.get(source_type, source_type), []).append(reference)
+        yield {'title': title, 'references': grouped}
+
+def select_partitions(manifest: Dict, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
+    """
+    The partitions of a partitioned graph manifest that hold mentions between
+    two dates (inclusive), from the first and last mention dates it records.
+
+    Args:
+        manifest (Dict): The manifest written by `save_partitioned_graph`.
+        start_date (str): First date, as YYYY-MM-DD, or None.
+        end_date (str): Last date, as YYYY-MM-DD, or None.
+
+    Returns:
+        List[Dict]: The manifest entries of the partitions, in date order.
+    """
+    return [
+        partition for partition in manifest['partitions']
+        if (start_date is None or partition['last_mention_date'] >= start_date)
+        and (end_date is None or partition['first_mention_date'] <= end_date)
+    ]
+
+def iter_partitioned_references(partition_dir: str, start_date: Optional[str] = None,
+                                end_date: Optional[str] = None, **filters) -> Iterator[Dict]:
+    """
+    Streams the references of a graph partitioned by mention date (see
+    `save_partitioned_graph`), reading only the partitions that may hold
+    mentions between `start_date` and `end_date`. References come partition
+    by partition, then in file order.
+
+    Args:
+        partition_dir (str): Path or URL of the directory of the partitions.
+        start_date (str): Only the mentions from this date on, as YYYY-MM-DD.
+        end_date (str): Only the mentions up to this date (inclusive).
+        **filters: journal, drug or source_type, see `iter_graph_references`.
+
+    Yields:
+        Dict: The reference, with its 'journal' and 'source_type'.
+    """
+    manifest = load_partition_manifest(partition_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"Partition manifest not found in: {partition_dir}")
+    partitions = select_partitions(manifest, start_date, end_date)
+    logging.info(f"🗂️ Reading {len(partitions)} of {len(manifest['partitions'])} graph partitions")
+    for partition in partitions:
+        yield from iter_graph_references(
+            partition_url(partition_dir, partition['path']), start_date=start_date, end_date=end_date, **filters
+        )
@@ -1,36 +1,437 @@
 # src/pharma_graph_pipeline/main.py
 
+import argparse
 import yaml
 import logging
-from src.pharma_graph_pipeline.pipeline.extract import load_raw_data
-from src.pharma_graph_pipeline.pipeline.preprocess import preprocess_data
-from src.pharma_graph_pipeline.pipeline.transform import build_drug_graph
-from src.pharma_graph_pipeline.pipeline.load import save_to_json
+import hashlib
+import copy
+import json
+import os
+import pandas as pd
+from typing import Optional, Tuple
+from src.pharma_graph_pipeline.pipeline.extract import load_raw_data, iter_raw_batches, list_raw_files, DEFAULT_BATCH_SIZE
+from src.pharma_graph_pipeline.pipeline.preprocess import preprocess_data, preprocess_batches, prefilter_publications
+from src.pharma_graph_pipeline.pipeline.transform import (
+    find_all_mentions, find_mentions_streaming, group_mentions, iter_journals, iter_drugs, create_matcher,
+    Matcher, DEFAULT_SHARD_SIZE
+)
+from src.pharma_graph_pipeline.pipeline.mentions import MentionTable
+from src.pharma_graph_pipeline.pipeline.load import (
+    save_to_json, save_to_sqlite, save_edge_list, save_partitioned_graph, compressed_path
+)
+from src.pharma_graph_pipeline.pipeline.incremental import update_incremental_mentions
+from src.pharma_graph_pipeline.pipeline.cache import StageCache, input_fingerprints
+from src.pharma_graph_pipeline.pipeline.metrics import RunMetrics
+from src.pharma_graph_pipeline.pipeline.memo import TitleMemo
+from src.pharma_graph_pipeline.pipeline.dedup import (
+    get_dedup_options, create_seen_set, drop_duplicate_publications, drop_seen_publications
+)
+from src.pharma_graph_pipeline.pipeline.storage import open_url
+from src.pharma_graph_pipeline.adhoc.analysis import find_top_journals_in_graph
+
+# Local paths of the configuration, as sections then key (None: every key of the section)
+CONFIG_PATHS = [
+    ('input_paths', None),
+    ('output_path', None),
+    ('transform', 'matching', 'synonyms_path'),
+    ('dedup', 'spill_dir'),
+    ('incremental', 'state_dir'),
+    ('memo', 'path'),
+    ('cache', 'dir'),
+]
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def run_pipeline(config_path="config.yaml"):
-    """
-    Executes the full data pipeline: Extract, Preprocess, Transform, Load.
-    """
-    # Load configuration
-    with open('config.yaml', 'r') as f:
-        config = yaml.safe_load(f)
-    
-    # 1. Extract raw data
-    raw_data = load_raw_data(config)
-    
-    # 2. Preprocess and clean the data
-    clean_data = preprocess_data(raw_data)
-    
-    # 3. Transform clean data to build the graph
-    drug_graph = build_drug_graph(clean_data['drugs'], clean_data['publications'])
-    
-    # 4. Load the result into a JSON file
-    save_to_json(drug_graph, config['output_path']['drug_graph'])
+def get_transform_options(config: dict) -> dict:
+    """Reads the parallel matching options from the 'transform' config section."""
+    transform_config = config.get('transform', {})
+    return {
+        'workers': transform_config.get('workers', 1),
+        'shard_size': transform_config.get('shard_size', DEFAULT_SHARD_SIZE),
+    }
+
+def get_matching_options(config: dict) -> dict:
+    """Reads the drug matching options from the 'transform.matching' config section."""
+    return config.get('transform', {}).get('matching') or {}
+
+def synonyms_fingerprint(config: dict) -> Optional[str]:
+    """Content hash of the synonym table of fuzzy matching (None without one), for the cache keys."""
+    matching = get_matching_options(config)
+    if matching.get('mode', 'exact') == 'exact' or not matching.get('synonyms_path'):
+        return None
+    with open_url(matching['synonyms_path'], 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def get_load_options(config: dict) -> dict:
+    """Reads the output format options from the 'load' config section."""
+    load_config = config.get('load', {})
+    return {
+        'compact': load_config.get('compact', False),
+        'compression': load_config.get('compression'),
+    }
+
+def get_graph_path(config: dict) -> str:
+    """The path of the journal-centric graph, with the extension of `load.compression` (see `compressed_path`)."""
+    return compressed_path(config['output_path']['drug_graph'], get_load_options(config)['compression'])
+
+def close_memo(memo: Optional[TitleMemo], metrics: RunMetrics):
+    """Closes the title memo, if any, adding its hit/miss counters to the run report."""
+    if memo is not None:
+        memo.close()
+        metrics.add_counters({f"memo_{name}": value for name, value in memo.counters.items()})
+
+def prefilter_enabled(config: dict) -> bool:
+    """Whether the raw titles are prefiltered on the drug names before preprocessing."""
+    return config.get('extract', {}).get('prefilter', False)
+
+def prefilter_batches(publication_batches, matcher: Matcher, metrics: RunMetrics):
+    """
+    Lazily keeps the publications of each raw batch that may mention a drug,
+    counting the rows in and out of the prefilter.
+    """
+    for publications_df in publication_batches:
+        candidates_df = prefilter_publications(publications_df, matcher)
+        metrics.add_counters({'prefilter_rows_in': len(publications_df), 'prefilter_rows_out': len(candidates_df)})
+        yield candidates_df
+
+def selectivity(rows_in: int, rows_out: int) -> Optional[float]:
+    """Share of the rows kept by a filter (None without any row)."""
+    return round(rows_out / rows_in, 4) if rows_in else None
+
+def dedup_batches(publication_batches, seen_set, metrics: RunMetrics):
+    """
+    Lazily drops the publications of each preprocessed batch whose
+    surrogate_key was already seen, counting the rows in and the duplicates.
+    """
+    for publications_df in publication_batches:
+        unique_df = drop_seen_publications(publications_df, seen_set)
+        metrics.add_counters({'dedup_rows_in': len(publications_df), 'dedup_duplicates': len(publications_df) - len(unique_df)})
+        yield unique_df
+
+def log_duplicates(rows_in: int, duplicates: int):
+    """Logs the number of duplicate publications dropped before matching."""
+    share = f" ({duplicates / rows_in:.2%})" if rows_in else ""
+    logging.info(f"🧹 Deduplication: {duplicates} duplicate publications dropped out of {rows_in}{share}.")
+
+def find_streaming_mentions(config: dict, batch_size: int, metrics: RunMetrics = None) -> MentionTable:
+    """
+    Extract, Preprocess and Transform steps in streaming mode: publications
+    flow through the pipeline in batches of `batch_size` records, so these
+    steps are measured as a single 'streaming' stage.
+    """
+    metrics = metrics or RunMetrics()
+    with metrics.stage('streaming') as record:
+        # The drug list is small and needed in full before matching
+        drug_batches = list(iter_raw_batches(config, 'drugs', batch_size=None))
+        if not drug_batches:
+            raise ValueError("No drug files found.")
+        drugs_df = pd.concat(drug_batches, ignore_index=True)
+
+        logging.info("🚀 Starting journal-centric graph transformation (streaming)...")
+        dedup = get_dedup_options(config)
+        if dedup is not None and dedup['keep'] != 'first':
+            raise ValueError(
+                f"Streaming runs only keep the 'first' occurrence of duplicate publications, not '{dedup['keep']}'."
+            )
+        memo = TitleMemo.from_config(config)
+        seen_set = create_seen_set(dedup) if dedup is not None else None
+        try:
+            publication_batches = iter_raw_batches(config, 'publications', batch_size)
+            if prefilter_enabled(config):
+                matcher = create_matcher(drugs_df, get_matching_options(config))
+                publication_batches = prefilter_batches(publication_batches, matcher, metrics)
+            publication_batches = preprocess_batches(publication_batches, memo)
+            if seen_set is not None:
+                publication_batches = dedup_batches(publication_batches, seen_set, metrics)
+            all_mentions = find_mentions_streaming(
+                drugs_df, publication_batches, **get_transform_options(config), metrics=metrics, memo=memo,
+                matching=get_matching_options(config)
+            )
+        finally:
+            close_memo(memo, metrics)
+            if seen_set is not None:
+                seen_set.close()
+        record['rows_out'] = len(all_mentions)
+        if prefilter_enabled(config):
+            record['prefilter_selectivity'] = selectivity(
+                metrics.counters.get('prefilter_rows_in', 0), metrics.counters.get('prefilter_rows_out', 0)
+            )
+        if seen_set is not None:
+            record['duplicates'] = metrics.counters.get('dedup_duplicates', 0)
+            log_duplicates(metrics.counters.get('dedup_rows_in', 0), record['duplicates'])
+    return all_mentions
+
+def run_streaming(config: dict, batch_size: int, metrics: RunMetrics = None) -> dict:
+    """Streaming counterpart of `run_batch`, see `find_streaming_mentions`."""
+    return group_mentions(find_streaming_mentions(config, batch_size, metrics))
+
+def find_batch_mentions(config: dict, cache: StageCache, metrics: RunMetrics = None) -> MentionTable:
+    """
+    Extract, Preprocess and Transform steps on the whole dataset, each measured
+    as a stage of `metrics`. The output of each stage is cached: the key of a
+    stage derives from the key of the stage before it, so a cache hit on a
+    later stage skips all the upstream work.
+    """
+    metrics = metrics or RunMetrics()
+    raw_key = clean_key = mentions_key = None
+    if cache.enabled:
+        # Keys only hold the options that change the output of their stage: worker
+        # counts, batch sizes or the memo don't invalidate the cache
+        matching = {name: value for name, value in get_matching_options(config).items() if name != 'synonyms_path'}
+        # The prefilter and the matching also depend on the content of the synonym table
+        matching['synonyms'] = synonyms_fingerprint(config)
+        prefilter = prefilter_enabled(config)
+        raw_key = cache.stage_key('raw', input_fingerprints(list_raw_files(config)))
+        clean_key = cache.stage_key('preprocess', raw_key, prefilter, matching if prefilter else None)
+        mentions_key = cache.stage_key('mentions', clean_key, matching, (get_dedup_options(config) or {}).get('keep'))
+
+        cached_mentions = cache.load('mentions', mentions_key)
+        if cached_mentions is not None:
+            with metrics.stage('transform') as record:
+                all_mentions = MentionTable.from_frames(cached_mentions)
+                record.update(rows_out=len(all_mentions), cached=True)
+                return all_mentions
+
+    # Titles seen by previous runs are neither cleaned nor matched again
+    memo = TitleMemo.from_config(config)
+    try:
+        clean_data = cache.load('preprocess', clean_key)
+        if clean_data is None:
+            # 1. Extract raw data
+            with metrics.stage('extract') as record:
+                raw_data = cache.load('raw', raw_key)
+                if raw_data is None:
+                    raw_data = load_raw_data(config, metrics)
+                    cache.save('raw', raw_key, raw_data)
+                record['rows_out'] = sum(len(df) for df in raw_data.values())
+
+            # Only the publications that may mention a drug are preprocessed and matched
+            if prefilter_enabled(config):
+                with metrics.stage('prefilter') as record:
+                    record['rows_in'] = len(raw_data['publications'])
+                    matcher = create_matcher(raw_data['drugs'], get_matching_options(config))
+                    raw_data = {**raw_data, 'publications': prefilter_publications(raw_data['publications'], matcher)}
+                    record['rows_out'] = len(raw_data['publications'])
+                    record['selectivity'] = selectivity(record['rows_in'], record['rows_out'])
+                    metrics.add_counters({'prefilter_rows_in': record['rows_in'], 'prefilter_rows_out': record['rows_out']})
+
+            # 2. Preprocess and clean the data
+            with metrics.stage('preprocess') as record:
+                record['rows_in'] = len(raw_data['publications'])
+                clean_data = preprocess_data(raw_data, memo)
+                cache.save('preprocess', clean_key, clean_data)
+                record['rows_out'] = len(clean_data['publications'])
+
+        # Publications read more than once (same surrogate_key) are only matched once
+        dedup = get_dedup_options(config)
+        if dedup is not None:
+            with metrics.stage('dedup') as record:
+                record['rows_in'] = len(clean_data['publications'])
+                clean_data = {**clean_data, 'publications': drop_duplicate_publications(clean_data['publications'], dedup['keep'])}
+                record['rows_out'] = len(clean_data['publications'])
+                record['duplicates'] = record['rows_in'] - record['rows_out']
+                metrics.add_counters({'dedup_rows_in': record['rows_in'], 'dedup_duplicates': record['duplicates']})
+                log_duplicates(record['rows_in'], record['duplicates'])
+
+        # 3. Find the drug mentions the graph is built from
+        with metrics.stage('transform') as record:
+            logging.info("🚀 Starting journal-centric graph transformation...")
+            record['rows_in'] = len(clean_data['publications'])
+            all_mentions = find_all_mentions(
+                clean_data['drugs'], clean_data['publications'], **get_transform_options(config),
+                metrics=metrics, memo=memo, matching=get_matching_options(config)
+            )
+            cache.save('mentions', mentions_key, all_mentions.to_frames())
+            record['rows_out'] = len(all_mentions)
+    finally:
+        close_memo(memo, metrics)
+    return all_mentions
+
+def run_batch(config: dict, cache: StageCache, metrics: RunMetrics = None) -> dict:
+    """Builds the whole graph in memory, see `find_batch_mentions`."""
+    return group_mentions(find_batch_mentions(config, cache, metrics))
+
+def find_incremental_mentions(config: dict, metrics: RunMetrics = None) -> MentionTable:
+    """
+    Extract, Preprocess and Transform steps on the raw files that changed
+    since the previous run, see `update_incremental_mentions`. The mentions of
+    the unchanged files come from the incremental store.
+    """
+    metrics = metrics or RunMetrics()
+    with metrics.stage('incremental') as record:
+        all_mentions = MentionTable.from_records(
+            update_incremental_mentions(
+                config, **get_transform_options(config), prefilter=prefilter_enabled(config),
+                dedup_keep=(get_dedup_options(config) or {}).get('keep')
+            )
+        )
+        record['rows_out'] = len(all_mentions)
+    return all_mentions
+
+def run_incremental(config: dict, metrics: RunMetrics = None) -> dict:
+    """Incremental counterpart of `run_batch`, identical to a full run, see `find_incremental_mentions`."""
+    return group_mentions(find_incremental_mentions(config, metrics))
+
+def load_config(config_path: str = "config.yaml") -> dict:
+    """Reads the pipeline configuration (a local path or an fsspec URL)."""
+    with open_url(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+def resolve_path(path: str, base_dir: str) -> str:
+    """Joins a relative local path to `base_dir`; absolute paths and URLs are returned as they are."""
+    if not path or '://' in str(path) or os.path.isabs(path):
+        return path
+    return os.path.join(base_dir, path)
+
+def resolve_config_paths(config: dict, base_dir: str) -> dict:
+    """
+    Returns a copy of the configuration whose relative local paths (the
+    CONFIG_PATHS set in it) are relative to `base_dir` instead of the
+    current directory, e.g. the project directory of an Airflow task,
+    without changing the working directory of the process.
+    """
+    config = copy.deepcopy(config)
+    for *sections, key in CONFIG_PATHS:
+        section = config
+        for name in sections:
+            section = (section or {}).get(name)
+        if not section:
+            continue
+        keys = list(section) if key is None else [key]
+        for name in keys:
+            if name in section:
+                section[name] = resolve_path(section[name], base_dir)
+    return config
+
+def find_run_mentions(config: dict, metrics: RunMetrics, use_cache: bool = True) -> MentionTable:
+    """
+    Extract, Preprocess and Transform steps in the mode selected by the
+    config: incremental, streaming or full (batch) run.
+    """
+    extract_config = config.get('extract', {})
+    if config.get('incremental', {}).get('enabled', False):
+        all_mentions = find_incremental_mentions(config, metrics)
+    elif extract_config.get('streaming', False):
+        all_mentions = find_streaming_mentions(config, extract_config.get('batch_size', DEFAULT_BATCH_SIZE), metrics)
+    else:
+        all_mentions = find_batch_mentions(config, StageCache.from_config(config, enabled=use_cache), metrics)
+    return all_mentions
+
+def save_outputs(all_mentions: MentionTable, config: dict, metrics: RunMetrics, drug_graph: Optional[dict] = None):
+    """
+    Load step: writes each configured output view of the mentions, which
+    were found once. The journal-centric graph (`output_path.drug_graph`) is
+    always written; the SQLite graph store (`graph_store`), the drug-centric
+    graph (`drug_centric_graph`), the edge list (`edge_list`) and the journal
+    graph partitioned by mention date (`graph_partitions`) are written if
+    configured. Unless the journal graph is given as `drug_graph`, the graphs
+    are built from the compact mentions as they are written, never all at once.
+    """
+    output_paths = config['output_path']
+    load_options = get_load_options(config)
+
+    def journals():
+        return iter(drug_graph['journals']) if drug_graph is not None else iter_journals(all_mentions)
+
+    with metrics.stage('load') as record:
+        record['rows_in'] = len(all_mentions)
+        views = record['views'] = {}
+        record['path'] = get_graph_path(config)
+        views['journals'] = save_to_json({'journals': journals()}, record['path'], **load_options)
+        record['rows_out'] = views['journals']
+        # Also write the indexed store queried by the ad-hoc analysis, if configured
+        if output_paths.get('graph_store'):
+            save_to_sqlite({'journals': journals()}, output_paths['graph_store'])
+        if output_paths.get('drug_centric_graph'):
+            views['drugs'] = save_to_json(
+                {'drugs': iter_drugs(all_mentions)}, output_paths['drug_centric_graph'], **load_options
+            )
+        if output_paths.get('edge_list'):
+            views['edges'] = save_edge_list(all_mentions.to_edges(), output_paths['edge_list'], load_options['compression'])
+        if output_paths.get('graph_partitions'):
+            record['partitions'] = save_partitioned_graph(
+                all_mentions, output_paths['graph_partitions'],
+                config.get('load', {}).get('partition_by', 'month'), **load_options
+            )
+
+def run_graph_pipeline(config: dict, use_cache: bool = True, profile_dir: Optional[str] = None,
+                       with_graph: bool = True) -> Tuple[Optional[dict], dict]:
+    """
+    Library entry point of the pipeline, for callers that already run Python
+    (e.g. an Airflow task): runs Extract, Preprocess, Transform and Load with
+    a configuration dict, in the calling process.
+
+    Args:
+        config (dict): The pipeline configuration, as read from `config.yaml`.
+        use_cache (bool): Whether cached stages may be reused.
+        profile_dir (str): If set, each stage is also profiled with cProfile there.
+        with_graph (bool): Whether to build and return the journal-centric graph.
+            Without it, the graph is only streamed to the outputs.
+
+    Returns:
+        Tuple[Optional[dict], dict]: The journal-centric graph (None without
+            `with_graph`) and the run report.
+    """
+    metrics = RunMetrics(profile_dir)
+    all_mentions = find_run_mentions(config, metrics, use_cache)
+
+    if with_graph:
+        drug_graph = group_mentions(all_mentions)
+    else:
+        # Without the graph, group_mentions doesn't run to warn about a run without mentions
+        drug_graph = None
+        if not len(all_mentions):
+            logging.warning("No drug mentions were found in any publication.")
+    # 4. Load the output views into their files
+    save_outputs(all_mentions, config, metrics, drug_graph)
+
+    if config['output_path'].get('run_report'):
+        metrics.save(config['output_path']['run_report'])
+    return drug_graph, metrics.to_dict()
+
+def run_pipeline(config_path="config.yaml", use_cache=True, profile_dir=None) -> dict:
+    """
+    Executes the full data pipeline: Extract, Preprocess, Transform, Load,
+    with the configuration read from `config_path`.
+    With use_cache=False (the --no-cache flag), cached stages are ignored.
+    Each stage is measured, and the run report is written to
+    `output_path.run_report` if configured. With a `profile_dir` (the
+    --profile flag), each stage is also profiled with cProfile.
+
+    Returns:
+        dict: The run report.
+    """
+    _, report = run_graph_pipeline(load_config(config_path), use_cache, profile_dir, with_graph=False)
+    return report
+
+def run_pipeline_and_analysis(config_path="config.yaml", use_cache=True, profile_dir=None) -> dict:
+    """
+    Runs the pipeline like `run_pipeline`, then the ad-hoc analysis on the
+    graph it returns, in the same process: the JSON output isn't read back.
+
+    Returns:
+        dict: A small summary of the run (analysis result, stages and counters of the run report).
+    """
+    drug_graph, report = run_graph_pipeline(load_config(config_path), use_cache, profile_dir)
+    result = find_top_journals_in_graph(drug_graph)
+    logging.info(f"🏆 Analysis result: {result}")
+    return {'analysis': result, 'stages': report['stages'], 'counters': report['counters']}
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Runs the pharmaceutical data pipeline.")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore the cached stage outputs.")
+    parser.add_argument('--profile', nargs='?', const='outputs/profiles', metavar='DIR',
+                        help="Profile each stage with cProfile, one .prof dump per stage in DIR.")
+    parser.add_argument('--config', default='config.yaml', help="Path or URL of the pipeline configuration.")
+    parser.add_argument('--with-analysis', action='store_true',
+                        help="Also run the ad-hoc analysis on the graph, and print the run summary as JSON.")
+    args = parser.parse_args()
+
     logging.info("🚀 Starting data pipeline...")
-    run_pipeline()
+    if args.with_analysis:
+        # The summary is the last line of stdout, e.g. the XCom value of a BashOperator
+        print(json.dumps(run_pipeline_and_analysis(args.config, use_cache=not args.no_cache, profile_dir=args.profile)))
+    else:
+        run_pipeline(args.config, use_cache=not args.no_cache, profile_dir=args.profile)
     logging.info("🏁 Pipeline finished.")
\ No newline at end of file
@@ -0,0 +1,147 @@
+# src/pharma_graph_pipeline/pipeline/cache.py
+
+import pandas as pd
+from typing import Dict, List, Optional
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import shutil
+from src.pharma_graph_pipeline.pipeline.incremental import file_fingerprint
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # The cache is optional: without pyarrow, every stage runs
+    pa = pq = None
+
+# Source files whose content defines the code version of the cached stages:
+# the pipeline modules, and main.py which chains the stages
+PIPELINE_DIR = Path(__file__).parent
+MAIN_MODULE = PIPELINE_DIR.parent / 'main.py'
+
+def code_version() -> str:
+    """Hashes the pipeline source code, so cached stages expire with any code change."""
+    sha256 = hashlib.sha256()
+    for source_path in sorted(PIPELINE_DIR.glob('*.py')) + [MAIN_MODULE]:
+        sha256.update(source_path.name.encode('utf-8'))
+        sha256.update(source_path.read_bytes())
+    return sha256.hexdigest()
+
+def _to_arrow(df: pd.DataFrame) -> "pa.Table":
+    """
+    Converts a table for Parquet. Object columns mixing value types (e.g. the
+    raw ids, ints in JSON and strings in CSV) store their values as strings,
+    missing values aside: preprocessing formats `9` and `"9"` the same way.
+    """
+    try:
+        return pa.Table.from_pandas(df)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for column in df.columns:
+            if df[column].dtype == object:
+                df[column] = df[column].map(lambda value: value if pd.isna(value) else str(value))
+        return pa.Table.from_pandas(df)
+
+class StageCache:
+    """
+    On-disk cache of the tables produced by a pipeline stage, stored as
+    Parquet files (one directory per entry) and read back memory-mapped.
+    Entries are evicted least-recently-used first once the cache exceeds
+    `max_size_bytes`.
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int, enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = max_size_bytes
+        self.enabled = enabled
+        if enabled and pq is None:
+            logging.warning("pyarrow is not installed: the stage cache is disabled.")
+            self.enabled = False
+        self._code_version = code_version() if self.enabled else None
+
+    @classmethod
+    def from_config(cls, config: Dict, enabled: bool = True) -> "StageCache":
+        """Builds the cache from the 'cache' config section ('--no-cache' sets enabled=False)."""
+        cache_config = config.get('cache', {})
+        return cls(
+            cache_config.get('dir', '.cache/pipeline'),
+            int(cache_config.get('max_size_mb', 1024) * 1024 * 1024),
+            enabled and cache_config.get('enabled', False),
+        )
+
+    def stage_key(self, stage: str, *parts) -> str:
+        """
+        Builds the key of a stage entry from the stage name, the code version
+        and any JSON-serializable parts (input fingerprints, config, upstream key).
+        """
+        payload = json.dumps([stage, self._code_version, *parts], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def load(self, stage: str, key: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """Returns the cached tables of a stage entry, or None on a miss."""
+        if not self.enabled:
+            return None
+        entry_dir = self.cache_dir / key
+        if not entry_dir.is_dir():
+            logging.info(f"Cache miss for stage '{stage}'.")
+            return None
+
+        tables = {
+            table_path.stem: pq.read_table(table_path, memory_map=True).to_pandas()
+            for table_path in sorted(entry_dir.glob('*.parquet'))
+        }
+        # Mark the entry as recently used for the LRU eviction
+        os.utime(entry_dir)
+        logging.info(f"♻️ Cache hit for stage '{stage}'.")
+        return tables
+
+    def save(self, stage: str, key: str, tables: Dict[str, pd.DataFrame]):
+        """
+        Stores the tables of a stage entry, then evicts old entries if needed.
+        Columns mixing value types are stored as strings (see `_to_arrow`);
+        tables that Parquet still can't represent leave the stage uncached.
+        """
+        if not self.enabled:
+            return
+        entry_dir = self.cache_dir / key
+        temp_dir = self.cache_dir / f"{key}.tmp"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        temp_dir.mkdir(parents=True)
+        try:
+            for name, df in tables.items():
+                pq.write_table(_to_arrow(df), temp_dir / f"{name}.parquet")
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            logging.warning(f"Stage '{stage}' can't be cached: {e}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        temp_dir.rename(entry_dir)
+        logging.info(f"Stage '{stage}' cached.")
+        self._evict()
+
+    def _evict(self):
+        """Removes the least recently used entries until the cache fits its size cap."""
+        entries = []
+        for entry_dir in self.cache_dir.iterdir():
+            if entry_dir.is_dir() and not entry_dir.name.endswith('.tmp'):
+                size = sum(path.stat().st_size for path in entry_dir.iterdir())
+                entries.append((entry_dir.stat().st_mtime_ns, size, entry_dir))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+            logging.info(f"Cache entry evicted: {entry_dir.name}")
+
+def input_fingerprints(file_paths: List) -> List:
+    """Fingerprints the raw input files (name, size and content checksum)."""
+    fingerprints = []
+    for file_path in file_paths:
+        fingerprint = file_fingerprint(file_path)
+        fingerprints.append([file_path.name, fingerprint['size'], fingerprint['checksum']])
+    return fingerprints
@@ -0,0 +1,158 @@
+# src/pharma_graph_pipeline/pipeline/dedup.py
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional
+from pathlib import Path
+import math
+import os
+import sqlite3
+import tempfile
+
+KEEP_POLICIES = ('first', 'last')
+SEEN_SETS = ('memory', 'disk', 'bloom')
+# The Bloom filter derives the bit positions of a key from two independent hashes
+_HASH_KEYS = ('0123456789123456', 'pharma-dedup-key')
+# Keys looked up per SQLite query (below the default host parameter limit)
+_DISK_CHUNK = 30000
+
+def key_hashes(keys: pd.Series, hash_key: str = _HASH_KEYS[0]) -> np.ndarray:
+    """64-bit hashes of the surrogate keys, computed in bulk (for the Bloom filter)."""
+    return pd.util.hash_array(keys.to_numpy(dtype=object), hash_key=hash_key, categorize=False).view(np.int64)
+
+class MemorySeenSet:
+    """
+    Exact set of the keys seen so far, held in memory. The full surrogate
+    keys are stored, not hashes of them: like `drop_duplicate_publications`,
+    two distinct publications are never taken for duplicates.
+    """
+
+    def __init__(self):
+        self._seen = set()
+
+    def add(self, keys: pd.Series) -> np.ndarray:
+        """Adds distinct keys to the set, returning the mask of those that were not in it yet."""
+        keys = keys.tolist()
+        seen = self._seen
+        new = np.fromiter((key not in seen for key in keys), dtype=bool, count=len(keys))
+        seen.update(key for key, is_new in zip(keys, new) if is_new)
+        return new
+
+    def close(self):
+        self._seen = set()
+
+class DiskSeenSet:
+    """
+    Exact set of the keys seen so far, spilled to a temporary SQLite
+    file in `spill_dir`: its memory stays flat however many keys are seen, at
+    the cost of a lookup per key. The file is removed by `close`.
+    """
+
+    def __init__(self, spill_dir: str):
+        Path(spill_dir).mkdir(parents=True, exist_ok=True)
+        handle, path = tempfile.mkstemp(suffix='.sqlite', prefix='seen_keys_', dir=spill_dir)
+        os.close(handle)
+        self.path = Path(path)
+        self.connection = sqlite3.connect(self.path)
+        # A scratch file: nothing to recover after a crash
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.execute("CREATE TABLE seen (key TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def add(self, keys: pd.Series) -> np.ndarray:
+        """See `MemorySeenSet.add`."""
+        keys = keys.tolist()
+        found = set()
+        for start in range(0, len(keys), _DISK_CHUNK):
+            chunk = keys[start:start + _DISK_CHUNK]
+            rows = self.connection.execute(f"SELECT key FROM seen WHERE key IN ({', '.join('?' * len(chunk))})", chunk)
+            found.update(row[0] for row in rows)
+        new = np.fromiter((key not in found for key in keys), dtype=bool, count=len(keys))
+        self.connection.executemany("INSERT INTO seen VALUES (?)", ((key,) for key in keys if key not in found))
+        return new
+
+    def close(self):
+        self.connection.close()
+        self.path.unlink(missing_ok=True)
+
+class BloomSeenSet:
+    """
+    Bloom filter of the keys seen so far: a bit array sized for
+    `expected_items` keys, however many keys are actually seen. Up to
+    `expected_items` keys, a new key is taken for a duplicate (and its
+    publication dropped) with probability `false_positive_rate`; a duplicate
+    is never missed.
+    """
+
+    def __init__(self, expected_items: int, false_positive_rate: float):
+        expected_items = max(int(expected_items), 1)
+        self.size = max(math.ceil(-expected_items * math.log(false_positive_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(round(self.size / expected_items * math.log(2)), 1)
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, keys: pd.Series) -> np.ndarray:
+        """Bit positions of each key (double hashing), as a (keys, hash_count) array."""
+        first = key_hashes(keys, _HASH_KEYS[0]).view(np.uint64)
+        second = key_hashes(keys, _HASH_KEYS[1]).view(np.uint64)
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        # Wrapping around 2**64 is fine: only the bits of the sum matter
+        with np.errstate(over='ignore'):
+            return (first[:, None] + steps[None, :] * second[:, None]) % np.uint64(self.size)
+
+    def add(self, keys: pd.Series) -> np.ndarray:
+        """See `MemorySeenSet.add`: a key may be wrongly reported as already seen."""
+        positions = self._positions(keys)
+        byte_indexes = (positions >> np.uint64(3)).astype(np.int64)
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        new = ~np.all(self.bits[byte_indexes] & masks, axis=1)
+        # Several positions may fall in the same byte: `at` applies all of them
+        np.bitwise_or.at(self.bits, byte_indexes[new].ravel(), masks[new].ravel())
+        return new
+
+    def close(self):
+        self.bits = np.zeros(0, dtype=np.uint8)
+
+def get_dedup_options(config: Dict) -> Optional[Dict]:
+    """
+    Reads the 'dedup' config section, or returns None if deduplication is
+    disabled. Raises a ValueError on an unknown `keep` policy or seen-key set.
+    """
+    dedup_config = config.get('dedup') or {}
+    if not dedup_config.get('enabled', False):
+        return None
+    options = {
+        'keep': dedup_config.get('keep', 'first'),
+        'seen_set': dedup_config.get('seen_set', 'memory'),
+        'spill_dir': dedup_config.get('spill_dir', '.cache'),
+        'expected_items': dedup_config.get('expected_items', 10_000_000),
+        'false_positive_rate': dedup_config.get('false_positive_rate', 0.0001),
+    }
+    if options['keep'] not in KEEP_POLICIES:
+        raise ValueError(f"Unknown dedup policy '{options['keep']}': expected one of {', '.join(KEEP_POLICIES)}.")
+    if options['seen_set'] not in SEEN_SETS:
+        raise ValueError(f"Unknown seen-key set '{options['seen_set']}': expected one of {', '.join(SEEN_SETS)}.")
+    return options
+
+def create_seen_set(options: Dict):
+    """Creates the seen-key set selected by the dedup options (see `get_dedup_options`)."""
+    if options['seen_set'] == 'disk':
+        return DiskSeenSet(options['spill_dir'])
+    if options['seen_set'] == 'bloom':
+        return BloomSeenSet(options['expected_items'], options['false_positive_rate'])
+    return MemorySeenSet()
+
+def drop_duplicate_publications(publications_df: pd.DataFrame, keep: str = 'first') -> pd.DataFrame:
+    """
+    Keeps a single publication per surrogate_key (same title, date and
+    journal): its `keep` occurrence ('first' or 'last') in read order.
+    """
+    return publications_df[~publications_df['surrogate_key'].duplicated(keep=keep)]
+
+def drop_seen_publications(publications_df: pd.DataFrame, seen_set) -> pd.DataFrame:
+    """
+    Streaming counterpart of `drop_duplicate_publications`, for one batch:
+    keeps the first occurrence of each surrogate_key that is not in
+    `seen_set` (the keys of the previous batches), and adds them to it.
+    """
+    publications_df = drop_duplicate_publications(publications_df)
+    return publications_df[seen_set.add(publications_df['surrogate_key'])]
@@ -1,76 +1,359 @@
 # src/pharma_graph_pipeline/pipeline/extract.py
 
 import pandas as pd
-from typing import Dict
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple, Union
 from pathlib import Path
+from itertools import islice
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import logging
+import json
 import re
+import time
 from io import StringIO
+from src.pharma_graph_pipeline.pipeline.metrics import RunMetrics
+from src.pharma_graph_pipeline.pipeline.storage import (
+    StorageFile, is_local, local_path, list_files, prefetch, open_url, DEFAULT_PREFETCH_CONCURRENCY
+)
 
-def load_raw_data(config: Dict) -> Dict[str, pd.DataFrame]:
+# Default number of records per batch in streaming mode
+DEFAULT_BATCH_SIZE = 50_000
+# Characters read from a JSON file at a time in streaming mode
+JSON_CHUNK_SIZE = 1 << 16
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Characters that may continue a decoded number ('4' may be the start of '4.5')
+JSON_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+# Pools available to read the raw files concurrently
+READ_EXECUTORS = {'process': ProcessPoolExecutor, 'thread': ThreadPoolExecutor}
+
+# A raw file: a local Path, or a file on object storage (gs://, memory://...)
+RawFile = Union[Path, StorageFile]
+
+def list_raw_files(config: Dict) -> List[RawFile]:
     """
-    Scans a directory, identifies data files, and loads them into DataFrames.
-    Adds a source_type for each publication.
-    Handles malformed JSON files (e.g., trailing comma).
+    Returns the files of the raw data directory, sorted by name. The
+    directory may be a local path or an fsspec URL (gs://bucket/prefix...).
     """
-    logging.info("🚀 Starting dynamic data extraction from directory...")
-    
-    raw_dir = Path(config['input_paths']['raw_data_dir'])
+    raw_dir = config['input_paths']['raw_data_dir']
+    if not is_local(raw_dir):
+        return list_files(raw_dir)
+
+    raw_dir = local_path(raw_dir)
     if not raw_dir.is_dir():
         raise FileNotFoundError(f"Directory not found: {raw_dir}")
+    return sorted(path for path in raw_dir.iterdir() if path.is_file())
 
-    temp_dataframes = {"drugs": [], "publications": []}
+def classify_file(filename: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Identifies the nature of a file from its name.
+
+    Returns:
+        Tuple: ('drugs', None), ('publications', <source_type>) or (None, None).
+    """
+    if 'drug' in filename:
+        return 'drugs', None
+    if 'pubmed' in filename:
+        return 'publications', 'pubmed'
+    if 'clinical' in filename:
+        return 'publications', 'clinical_trial'
+    return None, None
+
+class JsonStream:
+    """
+    Pull parser over a JSON text file: the caller walks its arrays and
+    objects one token at a time and only decodes in full the values it asks
+    for, so a document larger than memory is read one element at a time.
+    Arrays and objects tolerate a trailing comma before their closing bracket.
+
+    Args:
+        f (TextIO): The open JSON file.
+        chunk_size (int): Number of characters read at a time.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int = JSON_CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer, self._pos, self._eof = '', 0, False
+
+    def _fill(self, min_size: int) -> bool:
+        # Drop the consumed prefix and append at least `min_size` new characters
+        chunk = self._f.read(max(self._chunk_size, min_size))
+        self._buffer, self._pos = self._buffer[self._pos:] + chunk, 0
+        self._eof = not chunk
+        return not self._eof
 
-    for file_path in raw_dir.iterdir():
-        if not file_path.is_file(): continue
+    def peek(self) -> str:
+        """Skips whitespace and returns the next significant character ('' at EOF)."""
+        while True:
+            self._pos = JSON_WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or not self._fill(self._chunk_size):
+                return self._buffer[self._pos:self._pos + 1]
+
+    def expect(self, char: str):
+        """Consumes the next significant character, which must be `char`."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON document, found {found!r}.")
+        self._pos += 1
+
+    def read_value(self):
+        """Decodes the next value in full."""
+        self.peek()
+        # Read more when the value is incomplete. A number running up to the
+        # end of the buffer may be truncated.
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                number_end = JSON_NUMBER_TAIL.match(self._buffer, end).end() if isinstance(value, (int, float)) else end
+                if number_end < len(self._buffer) or self._eof:
+                    break
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill(len(self._buffer))
+        self._pos = end
+        return value
+
+    def skip_value(self):
+        """Consumes the next value, one array element or object member at a time."""
+        char = self.peek()
+        if char == '[':
+            for _ in self.iter_items():
+                self.skip_value()
+        elif char == '{':
+            for _ in self.iter_keys():
+                self.skip_value()
+        else:
+            self.read_value()
+
+    def _close(self, closing: str, kind: str) -> bool:
+        # After a member: consumes the separator, and tells whether the container ended
+        separator = self.peek()
+        if separator == ',':
+            self._pos += 1
+            separator = self.peek()
+            if separator != closing:
+                return False
+        if separator == closing:
+            self._pos += 1
+            return True
+        raise ValueError(f"Unexpected character {separator!r} in JSON {kind}.")
+
+    def iter_items(self) -> Iterator[None]:
+        """
+        Walks an array: yields before each element, which the caller consumes
+        (`read_value`, `skip_value`, or by walking it) before resuming.
+        """
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield
+            if self._close(']', 'array'):
+                return
+
+    def iter_keys(self) -> Iterator[str]:
+        """
+        Walks an object: yields each key, whose value the caller consumes
+        before resuming (see `iter_items`).
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected a string key in JSON object, found {key!r}.")
+            self.expect(':')
+            yield key
+            if self._close('}', 'object'):
+                return
+
+def iter_json_array(f: TextIO, chunk_size: int = JSON_CHUNK_SIZE) -> Iterator:
+    """
+    Incrementally parses a top-level JSON array, yielding one element at a time.
+    Only the element being decoded is held in memory, and a trailing comma
+    before the closing bracket is tolerated.
+
+    Args:
+        f (TextIO): The open JSON file.
+        chunk_size (int): Number of characters read at a time.
+
+    Yields:
+        The decoded elements of the array, in order.
+    """
+    stream = JsonStream(f, chunk_size)
+    if stream.peek() != '[':
+        raise ValueError("Expected a JSON array.")
+    for _ in stream.iter_items():
+        yield stream.read_value()
+
+def read_raw_file(file_path: RawFile) -> Optional[pd.DataFrame]:
+    """Reads a whole CSV or JSON file (None for other extensions)."""
+    filename = file_path.name.lower()
+    if filename.endswith('.csv'):
+        with file_path.open('rb') as f:
+            return pd.read_csv(f)
+    elif filename.endswith('.json'):
+        logging.info(f"Preprocessing JSON file: {file_path.name}")
+        with file_path.open('r', encoding='utf-8') as f:
+            content = f.read()
+
+        content_fixed = re.sub(r',\s*\]', ']', content)
+        return pd.read_json(StringIO(content_fixed))
+    return None
+
+def read_synonyms(path: str) -> pd.DataFrame:
+    """
+    Reads the drug synonym table: a CSV (local path or fsspec URL) with one
+    (atccode, synonym) row per brand name, salt or other name of a drug.
+    """
+    with open_url(path, 'r', encoding='utf-8') as f:
+        synonyms_df = pd.read_csv(f, dtype=str)
+    missing = {'atccode', 'synonym'} - set(synonyms_df.columns)
+    if missing:
+        raise ValueError(f"Synonym table {path} lacks the columns: {sorted(missing)}")
+    return synonyms_df.dropna(subset=['atccode', 'synonym'])
 
+def _read_file_batches(file_path: RawFile, batch_size: Optional[int]) -> Iterator[pd.DataFrame]:
+    """
+    Reads a CSV or JSON file as DataFrames of at most `batch_size` records
+    (the whole file at once when `batch_size` is None).
+    """
+    filename = file_path.name.lower()
+    if batch_size is None:
+        yield read_raw_file(file_path)
+    elif filename.endswith('.csv'):
+        with file_path.open('rb') as f:
+            yield from pd.read_csv(f, chunksize=batch_size)
+    elif filename.endswith('.json'):
+        with file_path.open('r', encoding='utf-8') as f:
+            records = iter_json_array(f)
+            while batch := list(islice(records, batch_size)):
+                # Same type and date inference as the whole-file read_json
+                yield pd.read_json(StringIO(json.dumps(batch)))
+
+def iter_raw_batches(config: Dict, kind: str, batch_size: Optional[int] = DEFAULT_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Streaming counterpart of `load_raw_data`: yields the records of every
+    file of one kind as fixed-size DataFrame batches, so that peak memory does
+    not depend on the input size.
+
+    Args:
+        config (Dict): The pipeline configuration.
+        kind (str): 'drugs' or 'publications'.
+        batch_size (int): Maximum number of records per batch, or None to
+            read each file whole (used for the small drugs table, so that its
+            column types are inferred over the whole file).
+
+    Yields:
+        pd.DataFrame: Record batches, with a source_type for publications.
+    """
+    logging.info(f"🚀 Starting streaming extraction of {kind} (batch size: {batch_size})...")
+
+    for file_path in list_raw_files(config):
         filename = file_path.name.lower()
-        df = None
+        file_kind, source_type = classify_file(filename)
+        if file_kind != kind or not filename.endswith(('.csv', '.json')):
+            continue
 
         try:
-            if filename.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            elif filename.endswith('.json'):
-                logging.info(f"Preprocessing JSON file: {file_path.name}")
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                content_fixed = re.sub(r',\s*\]', ']', content)
-                df = pd.read_json(StringIO(content_fixed))
-            else:
-                continue
-            
-            # Identify the nature of the file
-            if 'drug' in filename:
-                temp_dataframes['drugs'].append(df)
-                logging.info(f"Drug file loaded: {file_path.name}")
-            elif 'pubmed' in filename or 'clinical' in filename:
-                # Add a column to identify the source type
-                if 'pubmed' in filename:
-                    df['source_type'] = 'pubmed'
-                elif 'clinical' in filename:
-                    df['source_type'] = 'clinical_trial'
-                
-                temp_dataframes['publications'].append(df)
-                logging.info(f"Publication file loaded: {file_path.name}")
-            else:
-                logging.warning(f"File ignored (unrecognized name): {file_path.name}")
-
+            for df in _read_file_batches(file_path, batch_size):
+                if source_type:
+                    df['source_type'] = source_type
+                yield df
+            logging.info(f"File streamed: {file_path.name}")
         except Exception as e:
             logging.error(f"Error reading file {file_path.name}: {e}")
             continue
-            
+
+def _timed_read(file_path: RawFile) -> Tuple[Optional[pd.DataFrame], float]:
+    """Reads a raw file, also returning the read time (run in the pool workers)."""
+    read_start = time.perf_counter()
+    df = read_raw_file(file_path)
+    return df, time.perf_counter() - read_start
+
+def load_raw_data(config: Dict, metrics: Optional[RunMetrics] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Scans a directory, identifies data files, and loads them into DataFrames.
+    Adds a source_type for each publication.
+    Handles malformed JSON files (e.g., trailing comma).
+    The read time and row count of each file are recorded in `metrics`, if given.
+
+    With `extract.read_workers` > 1, the files are parsed concurrently in a
+    pool (`extract.read_executor`: 'process', the default, or 'thread'). The
+    results are still collected in file name order, so the concatenated
+    DataFrames are identical to a serial read.
+
+    Files on object storage are first downloaded in bulk, at most
+    `extract.prefetch_concurrency` at a time.
+    """
+    logging.info("🚀 Starting dynamic data extraction from directory...")
+
+    temp_dataframes = {"drugs": [], "publications": []}
+    extract_config = config.get('extract', {})
+    workers = extract_config.get('read_workers', 1)
+    file_paths = list_raw_files(config)
+    remote_files = [file_path for file_path in file_paths if isinstance(file_path, StorageFile)]
+    prefetch(remote_files, extract_config.get('prefetch_concurrency', DEFAULT_PREFETCH_CONCURRENCY))
+
+    executor = None
+    if workers > 1 and len(file_paths) > 1:
+        executor_kind = extract_config.get('read_executor', 'process')
+        if executor_kind not in READ_EXECUTORS:
+            raise ValueError(f"Unknown read executor: {executor_kind} (expected one of {list(READ_EXECUTORS)})")
+        logging.info(f"Reading {len(file_paths)} files with {workers} {executor_kind} workers...")
+        executor = READ_EXECUTORS[executor_kind](max_workers=workers)
+        # All files are submitted at once; each read is awaited in file name order
+        reads = [executor.submit(_timed_read, file_path).result for file_path in file_paths]
+    else:
+        reads = [partial(_timed_read, file_path) for file_path in file_paths]
+
+    try:
+        for file_path, read in zip(file_paths, reads):
+            filename = file_path.name.lower()
+
+            try:
+                df, read_seconds = read()
+                if df is None:
+                    continue
+                if metrics is not None:
+                    metrics.record_file(file_path.name, read_seconds, len(df))
+
+                # Identify the nature of the file
+                file_kind, source_type = classify_file(filename)
+                if file_kind == 'drugs':
+                    temp_dataframes['drugs'].append(df)
+                    logging.info(f"Drug file loaded: {file_path.name}")
+                elif file_kind == 'publications':
+                    # Add a column to identify the source type
+                    df['source_type'] = source_type
+                    temp_dataframes['publications'].append(df)
+                    logging.info(f"Publication file loaded: {file_path.name}")
+                else:
+                    logging.warning(f"File ignored (unrecognized name): {file_path.name}")
+
+            except Exception as e:
+                logging.error(f"Error reading file {file_path.name}: {e}")
+                continue
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
     # Final concatenation
     final_dataframes = {}
     if temp_dataframes['drugs']:
         final_dataframes['drugs'] = pd.concat(temp_dataframes['drugs'], ignore_index=True)
     else:
         raise ValueError("No drug files found.")
-        
+
     if temp_dataframes['publications']:
         final_dataframes['publications'] = pd.concat(temp_dataframes['publications'], ignore_index=True)
     else:
         raise ValueError("No publication files found.")
 
     logging.info("✅ Raw data extraction complete.")
-    return final_dataframes
\ No newline at end of file
+    return final_dataframes
@@ -0,0 +1,260 @@
+# src/pharma_graph_pipeline/pipeline/incremental.py
+
+import pandas as pd
+from typing import Dict, List, Optional
+from pathlib import Path
+import hashlib
+import json
+import logging
+import sqlite3
+from concurrent.futures import Executor
+from src.pharma_graph_pipeline.pipeline.extract import list_raw_files, classify_file, read_raw_file, RawFile
+from src.pharma_graph_pipeline.pipeline.preprocess import preprocess_publications, prefilter_publications
+from src.pharma_graph_pipeline.pipeline.transform import (
+    find_mentions, create_match_executor, DEFAULT_SHARD_SIZE
+)
+from src.pharma_graph_pipeline.pipeline.matcher import DrugMatcher
+from src.pharma_graph_pipeline.pipeline.dedup import drop_duplicate_publications
+from src.pharma_graph_pipeline.pipeline.storage import StorageFile
+
+MANIFEST_FILENAME = 'manifest.json'
+STORE_FILENAME = 'mentions.sqlite'
+MENTION_FIELDS = [
+    'journal', 'source_type', 'article_id', 'article_title',
+    'mention_date', 'mentioned_drug_id', 'mentioned_drug_name'
+]
+
+def file_fingerprint(file_path: RawFile, previous: Optional[Dict] = None) -> Dict:
+    """
+    Returns the size, mtime and content checksum of a file. Objects from an
+    object store take the checksum of their listing (no download); local
+    files are hashed with SHA-256, only again when the size or mtime differ
+    from the `previous` fingerprint.
+    """
+    stat = file_path.stat()
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if isinstance(file_path, StorageFile) and file_path.checksum():
+        fingerprint['checksum'] = file_path.checksum()
+        return fingerprint
+    if (previous and 'checksum' in previous
+            and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns):
+        fingerprint['checksum'] = previous['checksum']
+        return fingerprint
+
+    sha256 = hashlib.sha256()
+    with file_path.open('rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(block)
+    fingerprint['checksum'] = f"sha256:{sha256.hexdigest()}"
+    return fingerprint
+
+def load_manifest(path: Path) -> Dict:
+    """Loads the manifest of the previous run (empty on the first run)."""
+    if not path.is_file():
+        return {'drugs_fingerprint': None, 'files': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest: Dict, path: Path):
+    """Writes the manifest atomically, so a crash never leaves it half written."""
+    temp_path = path.with_suffix('.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4)
+    temp_path.replace(path)
+
+class MentionStore:
+    """
+    SQLite store of the mentions found in each publication file, keyed by the
+    publication's surrogate_key. Mentions keep their original order through
+    (source_file, seq), so the graph can be re-emitted exactly as a full run.
+    Value columns have no declared type, so SQLite keeps ints and strings as is.
+    """
+
+    def __init__(self, path: Path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            f"""CREATE TABLE IF NOT EXISTS mentions (
+                source_file TEXT NOT NULL, seq INTEGER NOT NULL, surrogate_key TEXT NOT NULL,
+                {', '.join(MENTION_FIELDS)},
+                PRIMARY KEY (source_file, seq)
+            )"""
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_mentions_key ON mentions (surrogate_key)")
+
+    def replace_file(self, source_file: str, mentions: List[Dict]):
+        """Replaces all the mentions of a publication file."""
+        self.delete_file(source_file)
+        self.connection.executemany(
+            f"INSERT INTO mentions VALUES (?, ?, ?, {', '.join('?' for _ in MENTION_FIELDS)})",
+            (
+                (source_file, seq, mention['surrogate_key'], *(mention[field] for field in MENTION_FIELDS))
+                for seq, mention in enumerate(mentions)
+            )
+        )
+
+    def delete_file(self, source_file: str):
+        """Removes all the mentions of a publication file."""
+        self.connection.execute("DELETE FROM mentions WHERE source_file = ?", (source_file,))
+
+    def load_mentions(self, keep: Optional[str] = None) -> List[Dict]:
+        """
+        Returns all the mentions, in file name order then mention order: the
+        order in which a full run reads them. With `keep` ('first' or 'last'),
+        a publication found in several files only keeps the mentions of its
+        first or last file: publications with the same surrogate_key have the
+        same title, hence the same mentions.
+        """
+        where = ""
+        if keep is not None:
+            aggregate = 'MIN' if keep == 'first' else 'MAX'
+            where = (
+                f"WHERE source_file = (SELECT {aggregate}(source_file) FROM mentions AS other "
+                "WHERE other.surrogate_key = mentions.surrogate_key)"
+            )
+        rows = self.connection.execute(
+            f"SELECT {', '.join(MENTION_FIELDS)} FROM mentions {where} ORDER BY source_file, seq"
+        )
+        return [dict(zip(MENTION_FIELDS, row)) for row in rows]
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+def _find_file_mentions(file_path: RawFile, source_type: str, drugs_df: pd.DataFrame, matcher: DrugMatcher,
+                        executor: Optional[Executor], shard_size: int, prefilter: bool = False,
+                        dedup_keep: Optional[str] = None) -> List[Dict]:
+    """
+    Extracts, preprocesses and matches a single publication file. With
+    `prefilter`, only its publications that may mention a drug are preprocessed.
+    With `dedup_keep`, the duplicate publications of the file are dropped.
+    """
+    publications_df = read_raw_file(file_path)
+    if prefilter:
+        publications_df = prefilter_publications(publications_df, matcher)
+    publications_df['source_type'] = source_type
+    publications_df = preprocess_publications(publications_df)
+    if dedup_keep is not None:
+        publications_df = drop_duplicate_publications(publications_df, dedup_keep)
+
+    mentions = find_mentions(drugs_df, publications_df, matcher, executor, shard_size, with_surrogate_key=True)
+    return mentions.to_records()
+
+def update_incremental_mentions(config: Dict, workers: int = 1, shard_size: int = DEFAULT_SHARD_SIZE,
+                                prefilter: bool = False, dedup_keep: Optional[str] = None) -> List[Dict]:
+    """
+    Incremental counterpart of Extract, Preprocess and Transform. A manifest
+    of the input files (size, mtime, content hash) and a store of the mentions
+    found in each publication file are kept in `incremental.state_dir`.
+    Only new or changed files are extracted, preprocessed and matched, the
+    mentions of deleted files are removed, and all the mentions are read back
+    from the store. When the drug files change, every file is matched again.
+    Only exact matching is supported: a ValueError is raised for another
+    `transform.matching.mode`, whose match types the store does not keep.
+
+    Args:
+        config (Dict): The pipeline configuration.
+        workers (int): Number of processes used to match the changed files.
+        shard_size (int): Number of titles per parallel task.
+        prefilter (bool): Whether to prefilter the raw titles on the drug names.
+        dedup_keep (Optional[str]): If set ('first' or 'last'), the occurrence
+            kept of the publications found more than once, within or across files.
+
+    Returns:
+        List[Dict]: The mention records, in the order of a full run.
+    """
+    matching_mode = (config.get('transform', {}).get('matching') or {}).get('mode', 'exact')
+    if matching_mode != 'exact':
+        raise ValueError(f"Incremental runs only support the 'exact' matching mode, not '{matching_mode}'.")
+    logging.info("🚀 Starting incremental run...")
+
+    state_dir = Path(config['incremental']['state_dir'])
+    state_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = state_dir / MANIFEST_FILENAME
+    previous_manifest = load_manifest(manifest_path)
+    previous_files = previous_manifest['files']
+
+    # Fingerprint the current inputs, reusing the previous hashes when possible
+    drug_files, publication_files = [], []
+    current_files = {}
+    for file_path in list_raw_files(config):
+        filename = file_path.name.lower()
+        file_kind, source_type = classify_file(filename)
+        if file_kind is None or not filename.endswith(('.csv', '.json')):
+            continue
+        current_files[file_path.name] = file_fingerprint(file_path, previous_files.get(file_path.name))
+        if file_kind == 'drugs':
+            drug_files.append(file_path)
+        else:
+            publication_files.append((file_path, source_type))
+
+    if not drug_files:
+        raise ValueError("No drug files found.")
+    if not publication_files:
+        raise ValueError("No publication files found.")
+
+    drugs_fingerprint = hashlib.sha256(
+        json.dumps([current_files[path.name]['checksum'] for path in drug_files]).encode('utf-8')
+    ).hexdigest()
+    drugs_changed = drugs_fingerprint != previous_manifest['drugs_fingerprint']
+    if drugs_changed and previous_files:
+        logging.info("Drug files changed: all publication files will be matched again.")
+    # The stored mentions of a file depend on its duplicates being dropped or not
+    dedup_changed = dedup_keep != previous_manifest.get('dedup_keep')
+    if dedup_changed and previous_files and not drugs_changed:
+        logging.info("Dedup policy changed: all publication files will be matched again.")
+
+    changed_files = [
+        (file_path, source_type) for file_path, source_type in publication_files
+        if drugs_changed or dedup_changed
+        or file_path.name not in previous_files
+        or previous_files[file_path.name].get('checksum') != current_files[file_path.name]['checksum']
+    ]
+    deleted_files = [name for name in previous_files if name not in current_files]
+    logging.info(
+        f"{len(changed_files)} new or changed, {len(deleted_files)} deleted, "
+        f"{len(publication_files) - len(changed_files)} unchanged publication files."
+    )
+
+    store = MentionStore(state_dir / STORE_FILENAME)
+    executor = None
+    try:
+        if changed_files:
+            drugs_df = pd.concat([read_raw_file(path) for path in drug_files], ignore_index=True)
+            matcher = DrugMatcher.from_drugs_df(drugs_df)
+            if workers > 1:
+                executor = create_match_executor(matcher, workers)
+
+        for file_path, source_type in changed_files:
+            try:
+                mentions = _find_file_mentions(
+                    file_path, source_type, drugs_df, matcher, executor, shard_size, prefilter, dedup_keep
+                )
+            except Exception as e:
+                # Same isolation as a full run: the file contributes no mention,
+                # and is left out of the manifest so it is retried next time
+                logging.error(f"Error reading file {file_path.name}: {e}")
+                store.delete_file(file_path.name)
+                del current_files[file_path.name]
+                continue
+            store.replace_file(file_path.name, mentions)
+            logging.info(f"Publication file processed: {file_path.name} ({len(mentions)} mentions)")
+
+        for name in deleted_files:
+            store.delete_file(name)
+            logging.info(f"Mentions removed for deleted file: {name}")
+
+        store.commit()
+        all_mentions = store.load_mentions(dedup_keep)
+    finally:
+        store.close()
+        if executor is not None:
+            executor.shutdown()
+
+    # The manifest is only saved once the store is committed
+    save_manifest(
+        {'drugs_fingerprint': drugs_fingerprint, 'dedup_keep': dedup_keep, 'files': current_files}, manifest_path
+    )
+    logging.info("✅ Incremental run complete.")
+    return all_mentions
@@ -1,19 +1,328 @@
 # src/pharma_graph_pipeline/pipeline/load.py
 
+import pandas as pd
+import numpy as np
+import hashlib
 import json
 import logging
-from typing import Dict, List
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Optional
+from src.pharma_graph_pipeline.pipeline.storage import (
+    is_local, local_path, open_url, upload_file, file_exists, remove_file
+)
+from src.pharma_graph_pipeline.pipeline.preprocess import format_dates
+from src.pharma_graph_pipeline.pipeline.mentions import MentionTable
+from src.pharma_graph_pipeline.pipeline.transform import iter_journals
+
+try:
+    import orjson
+except ImportError:  # Optional fast encoder for the compact mode
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # Optional, only needed for compression='zstd'
+    zstandard = None
+
+COMPRESSIONS = (None, 'gzip', 'zstd')
+# File extension added by each compression
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+# Periods of the partitioned graph, and the length of the YYYY-MM-DD date prefix naming them
+PARTITION_GRANULARITIES = {'year': 4, 'month': 7}
+# Manifest of the partitions, in the directory of the partitioned graph
+PARTITION_MANIFEST = 'manifest.json'
+# Columns of the graph store's mentions table, one row per reference
+STORE_COLUMNS = [
+    'journal', 'source_type', 'article_id', 'article_title',
+    'mention_date', 'mentioned_drug_id', 'mentioned_drug_name'
+]
+# Indexes of the graph store, covering the ad-hoc analysis queries
+STORE_INDEXES = {
+    'idx_journal_drug': ('journal', 'mentioned_drug_name'),
+    'idx_drug_journal': ('mentioned_drug_id', 'journal'),
+    'idx_date': ('mention_date',),
+    'idx_source_date': ('source_type', 'mention_date'),
+}
+# Source type of each reference list of a journal
+REFERENCE_SOURCE_TYPES = {'pubmed': 'pubmed', 'clinical_trials': 'clinical_trial'}
+# Indentation of the journals inside the pretty {"journals": [...]} document
+JOURNAL_INDENT = ' ' * 8
+
+def _encode_journal(journal: Dict, compact: bool) -> bytes:
+    """Encodes a single journal (or any item), at the nesting level it has in the document."""
+    if compact:
+        if orjson is not None:
+            return orjson.dumps(journal, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(journal, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    # Encoded strings never contain a raw newline, so re-indenting is safe
+    text = json.dumps(journal, indent=4, ensure_ascii=False)
+    return (JOURNAL_INDENT + text.replace('\n', '\n' + JOURNAL_INDENT)).encode('utf-8')
+
+def compressed_path(path: str, compression: Optional[str]) -> str:
+    """
+    The path of an output written with `compression`: its extension (.gz,
+    .zst) is appended unless the path already ends with it.
+    """
+    suffix = COMPRESSION_SUFFIXES.get(compression, '')
+    return path if str(path).endswith(suffix) else f"{path}{suffix}"
+
+def _open_output(path: str, compression: Optional[str]):
+    """
+    Opens the output file (local path or fsspec URL) for binary writing,
+    through the requested compressor.
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unsupported compression: {compression} (expected one of {COMPRESSIONS})")
+    if compression == 'zstd' and zstandard is None:
+        raise ImportError("zstandard is required for compression='zstd' (pip install zstandard, or the `zstd` extra).")
+    return open_url(path, 'wb', compression=compression)
+
+def write_items(key: str, items: Iterable[Dict], f: BinaryIO, compact: bool = False) -> int:
+    """
+    Writes a {key: [...]} document, encoding one item at a time, so the whole
+    document never exists in memory as a single string. The pretty output is
+    byte-for-byte the one of json.dump(data, f, indent=4).
+
+    Args:
+        key (str): The top-level key, e.g. 'journals'.
+        items (Iterable[Dict]): The items, as a list or a generator.
+        f (BinaryIO): The binary file to write to.
+        compact (bool): No indentation nor spaces between tokens.
+
+    Returns:
+        int: The number of items written.
+    """
+    encoded_key = json.dumps(key, ensure_ascii=False).encode('utf-8')
+    if compact:
+        head, separator, tail = b'{' + encoded_key + b':[', b',', b']}'
+        empty = b'{' + encoded_key + b':[]}'
+    else:
+        head, separator, tail = b'{\n    ' + encoded_key + b': [\n', b',\n', b'\n    ]\n}'
+        empty = b'{\n    ' + encoded_key + b': []\n}'
+
+    count = 0
+    for item in items:
+        f.write(separator if count else head)
+        f.write(_encode_journal(item, compact))
+        count += 1
+
+    f.write(tail if count else empty)
+    return count
+
+def write_journals(journals: Iterable[Dict], f: BinaryIO, compact: bool = False) -> int:
+    """Writes the {"journals": [...]} document, see `write_items`."""
+    return write_items('journals', journals, f, compact)
 
 # The top-level data structure is now a Dictionary
-def save_to_json(data: Dict[str, List], path: str):
+def save_to_json(data: Dict[str, Iterable], path: str, compact: bool = False, compression: Optional[str] = None) -> int:
     """
-    Saves the final data structure to a JSON file.
+    Saves the final data structure to a JSON file, streaming it item by item.
 
     Args:
-        data (Dict[str, List]): The final dictionary to save.
-        path (str): The output file path.
+        data (Dict[str, Iterable]): The final dictionary to save, with a single
+            key ('journals' or 'drugs'). Its items may be a generator,
+            consumed as the file is written.
+        path (str): The output file path, or an fsspec URL (gs://...). The
+            extension of the compression is appended (see `compressed_path`).
+        compact (bool): Write without indentation (using orjson when installed).
+        compression (str): None, 'gzip' or 'zstd'.
+
+    Returns:
+        int: The number of items written.
+    """
+    (key, items), = data.items()
+    path = compressed_path(path, compression)
+    with _open_output(path, compression) as f:
+        count = write_items(key, items, f, compact)
+    logging.info(f"✅ Output successfully saved to {path}")
+    return count
+
+def save_edge_list(edges: pd.DataFrame, path: str, compression: Optional[str] = None) -> int:
     """
-    with open(path, 'w', encoding='utf-8') as f:
-        # indent=4 for human-readable output
-        json.dump(data, f, indent=4, ensure_ascii=False)
-    logging.info(f"✅ Output successfully saved to {path}")
\ No newline at end of file
+    Saves the drug -> publication -> journal edge list as CSV, one row per mention.
+
+    Args:
+        edges (pd.DataFrame): The edge list, from `MentionTable.to_edges`.
+        path (str): The output file path, or an fsspec URL (gs://...). The
+            extension of the compression is appended (see `compressed_path`).
+        compression (str): None, 'gzip' or 'zstd'.
+
+    Returns:
+        int: The number of edges written.
+    """
+    path = compressed_path(path, compression)
+    with _open_output(path, compression) as f:
+        edges.to_csv(f, index=False, encoding='utf-8')
+    logging.info(f"✅ Edge list successfully saved to {path}")
+    return len(edges)
+
+def _iter_store_rows(journals: Iterable[Dict]) -> Iterable[tuple]:
+    """Flattens the journals back into one row per reference."""
+    for journal in journals:
+        for reference_key, source_type in REFERENCE_SOURCE_TYPES.items():
+            for reference in journal['references'][reference_key]:
+                yield (
+                    journal['title'], source_type, reference['article_id'], reference['article_title'],
+                    reference['mention_date'], reference['mentioned_drug_id'], reference['mentioned_drug_name']
+                )
+
+def _build_sqlite(data: Dict[str, Iterable], path: Path):
+    """Writes the mentions table of the graph store, then its indexes."""
+    path.unlink(missing_ok=True)
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute(f"CREATE TABLE mentions ({', '.join(STORE_COLUMNS)})")
+        connection.executemany(
+            f"INSERT INTO mentions VALUES ({', '.join('?' for _ in STORE_COLUMNS)})",
+            _iter_store_rows(data['journals'])
+        )
+        # Indexes are built once the table is filled, which is faster than row by row
+        for index_name, columns in STORE_INDEXES.items():
+            connection.execute(f"CREATE INDEX {index_name} ON mentions ({', '.join(columns)})")
+        connection.commit()
+    finally:
+        connection.close()
+
+def save_to_sqlite(data: Dict[str, Iterable], path: str):
+    """
+    Saves the graph as an indexed SQLite store (one row per reference), so the
+    ad-hoc analysis can query it without loading the whole graph. The store
+    is built in a temporary file and swapped in once complete (or uploaded,
+    for an fsspec URL).
+
+    Args:
+        data (Dict[str, Iterable]): The final dictionary to save.
+        path (str): The output SQLite file path, or an fsspec URL (gs://...).
+    """
+    if is_local(path):
+        output_path = local_path(path)
+        temp_path = Path(f"{output_path}.tmp")
+        _build_sqlite(data, temp_path)
+        temp_path.replace(output_path)
+    else:
+        # SQLite needs a local file: build it locally, then upload it
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir) / "graph_store.sqlite"
+            _build_sqlite(data, temp_path)
+            upload_file(temp_path, path)
+    logging.info(f"✅ Graph store successfully saved to {path}")
+
+def partition_url(directory: str, name: str) -> str:
+    """The path or URL of a file of the partitioned graph directory."""
+    return f"{str(directory).rstrip('/')}/{name}"
+
+def partition_keys(dates: pd.Series, partition_by: str) -> np.ndarray:
+    """
+    The partition of each date of a column of day numbers or YYYY-MM-DD
+    strings: its year (YYYY) or month (YYYY-MM).
+    """
+    if partition_by not in PARTITION_GRANULARITIES:
+        raise ValueError(
+            f"Unknown partition granularity: {partition_by} (expected one of {tuple(PARTITION_GRANULARITIES)})"
+        )
+    width = PARTITION_GRANULARITIES[partition_by]
+    return np.array([str(date)[:width] for date in format_dates(dates)], dtype=object)
+
+def load_partition_manifest(directory: str) -> Optional[Dict]:
+    """Reads the manifest of a partitioned graph, or returns None if there is none."""
+    try:
+        with open_url(partition_url(directory, PARTITION_MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _save_partition_manifest(manifest: Dict, directory: str):
+    """Writes the manifest, atomically for a local directory."""
+    url = partition_url(directory, PARTITION_MANIFEST)
+    if is_local(url):
+        path = local_path(url)
+        # Without any mention, no partition has created the directory
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = Path(f"{path}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=4)
+        temp_path.replace(path)
+    else:
+        with open_url(url, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=4)
+
+def save_partitioned_graph(mentions: MentionTable, directory: str, partition_by: str = 'month',
+                           compact: bool = False, compression: Optional[str] = None) -> Dict[str, int]:
+    """
+    Saves the journal-centric graph split by mention date: one
+    {"journals": [...]} file per year or month in `directory`, named after
+    its period (e.g. 2020-01.json), and a manifest (PARTITION_MANIFEST) of
+    the partitions with their date range and counts, read by the ad-hoc
+    analysis to prune partitions by date.
+
+    Each partition is fingerprinted from the hashes of its mentions: the
+    partitions unchanged since the previous run, e.g. all but the latest
+    ones in daily incremental runs, are not written again, and those left
+    without mentions are removed.
+
+    Args:
+        mentions (MentionTable): All the mentions of the run.
+        directory (str): The output directory, or an fsspec URL (gs://...).
+        partition_by (str): 'year' or 'month'.
+        compact (bool): Write without indentation (using orjson when installed).
+        compression (str): None, 'gzip' or 'zstd'.
+
+    Returns:
+        Dict[str, int]: The number of partitions, and of partitions written
+            and removed by this run.
+    """
+    settings = {'partition_by': partition_by, 'compact': compact, 'compression': compression}
+    keys = partition_keys(mentions.publications['date'], partition_by)
+    previous = load_partition_manifest(directory) or {}
+    # Partitions written with other settings are all written again
+    same_settings = all(previous.get(name) == value for name, value in settings.items())
+    previous_partitions = {partition['partition']: partition for partition in previous.get('partitions', [])}
+
+    dates = np.array(format_dates(mentions.publications['date']), dtype=object)
+    journal_codes = pd.factorize(mentions.publications['journal'].astype(object))[0]
+    hashes = mentions.mention_hashes()
+    codes, names = pd.factorize(keys[mentions.publication_index], sort=True)
+    order = np.argsort(codes, kind='stable')
+    splits = np.cumsum(np.bincount(codes, minlength=len(names)))[:-1]
+
+    partitions, written = [], 0
+    for key, positions in zip(names, np.split(order, splits)):
+        period = pd.Period(key)
+        publication_rows = np.unique(mentions.publication_index[positions])
+        partition_dates = dates[publication_rows]
+        partition = {
+            'partition': key,
+            'path': compressed_path(f"{key}.json", compression),
+            'start_date': period.start_time.strftime('%Y-%m-%d'),
+            'end_date': period.end_time.strftime('%Y-%m-%d'),
+            'first_mention_date': partition_dates.min(),
+            'last_mention_date': partition_dates.max(),
+            'journals': len(np.unique(journal_codes[publication_rows])),
+            'publications': len(publication_rows),
+            'drugs': len(np.unique(mentions.drug_index[positions])),
+            'mentions': len(positions),
+            'fingerprint': hashlib.sha256(hashes[positions].tobytes()).hexdigest(),
+        }
+        url = partition_url(directory, partition['path'])
+        previous_partition = previous_partitions.get(key, {})
+        if not same_settings or previous_partition.get('fingerprint') != partition['fingerprint'] \
+                or not file_exists(url):
+            with _open_output(url, compression) as f:
+                write_items('journals', iter_journals(mentions.take(positions)), f, compact)
+            written += 1
+        partitions.append(partition)
+
+    _save_partition_manifest({**settings, 'partitions': partitions}, directory)
+    # Only then remove the files of the partitions that are gone
+    paths = {partition['path'] for partition in partitions}
+    removed = sum(
+        remove_file(partition_url(directory, partition['path']))
+        for partition in previous_partitions.values() if partition['path'] not in paths
+    )
+    logging.info(
+        f"✅ Graph partitions successfully saved to {directory}: "
+        f"{written} written, {len(partitions) - written} unchanged, {removed} removed"
+    )
+    return {'partitions': len(partitions), 'written': written, 'removed': removed}
@@ -0,0 +1,317 @@
+# src/pharma_graph_pipeline/pipeline/matcher.py
+
+import pandas as pd
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from itertools import chain
+import logging
+import re
+from src.pharma_graph_pipeline.pipeline.normalize import WORD_PATTERN, is_normalized, normalized_tokens
+
+# Counters kept by every matcher, reported in the run metrics
+COUNTER_NAMES = ('titles_scanned', 'candidate_hits', 'mentions')
+# Match types recorded by the FuzzyDrugMatcher, by code
+MATCH_TYPES = ('exact', 'synonym', 'fuzzy')
+EXACT, SYNONYM, FUZZY = range(len(MATCH_TYPES))
+FUZZY_COUNTER_NAMES = COUNTER_NAMES + ('synonym_mentions', 'fuzzy_mentions')
+
+class DrugMatcher:
+    """
+    Multi-pattern matcher built once from the drugs table.
+
+    Every drug name is indexed under its first word token. A title is tokenized
+    once, and only the drugs whose first token appears in the title are checked,
+    so the cost of a scan no longer grows with the size of the drug list.
+
+    A match has exactly the semantics of `re.search(r'\\b<drug>\\b', title)`:
+    every word token of a drug must be a whole token of the title for the
+    regex to match, so the token index never misses a match. Single-token
+    drugs are confirmed by the index alone; multi-word or punctuated names are
+    confirmed with their precompiled regex.
+    """
+
+    def __init__(self, drug_names: List[str]):
+        self.drug_names = list(drug_names)
+        self._index: Dict[str, List[int]] = {}
+        self._patterns: Dict[int, re.Pattern] = {}
+        # Drugs without any word token can't be indexed and are always checked
+        self._unindexed: List[int] = []
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTER_NAMES, 0)
+
+        for position, name in enumerate(self.drug_names):
+            name_lower = name.lower()
+            tokens = WORD_PATTERN.findall(name_lower)
+            if tokens and tokens == [name_lower]:
+                # Plain single-word drug: a token hit is a match
+                self._index.setdefault(name_lower, []).append(position)
+                continue
+
+            self._patterns[position] = re.compile(fr'\b{re.escape(name_lower)}\b')
+            if tokens:
+                self._index.setdefault(tokens[0], []).append(position)
+            else:
+                self._unindexed.append(position)
+
+    @classmethod
+    def from_drugs_df(cls, drugs_df: pd.DataFrame) -> "DrugMatcher":
+        """Builds a matcher from a drugs DataFrame with a 'drug' column."""
+        return cls(drugs_df['drug'].tolist())
+
+    @property
+    def first_tokens(self) -> Optional[FrozenSet[str]]:
+        """
+        The word tokens the drugs are indexed under: a title holding none of
+        them mentions no drug. None when a drug has no word token, since any
+        title may then mention it.
+        """
+        if self._unindexed:
+            return None
+        return frozenset(self._index)
+
+    def match(self, title: str) -> List[int]:
+        """
+        Scans a title once and returns the positions of the drugs it mentions.
+
+        Args:
+            title (str): The publication title (case-insensitive).
+
+        Returns:
+            List[int]: Drug positions, in the order of the drug list.
+        """
+        title_lower = title.lower()
+        return self.match_tokens(title_lower, WORD_PATTERN.findall(title_lower))
+
+    def match_tokens(self, title_lower: str, tokens: List[str]) -> List[int]:
+        """`match` for a lowercased title and its word tokens, already extracted."""
+        candidates = list(self._unindexed)
+        for token in set(tokens):
+            positions = self._index.get(token)
+            if positions:
+                candidates.extend(positions)
+
+        matches = []
+        for position in sorted(candidates):
+            pattern = self._patterns.get(position)
+            if pattern is None or pattern.search(title_lower):
+                matches.append(position)
+
+        self.counters['titles_scanned'] += 1
+        self.counters['candidate_hits'] += len(candidates)
+        self.counters['mentions'] += len(matches)
+        return matches
+
+    def merge_counters(self, counters: Dict[str, int]):
+        """Adds the counters of another matcher, e.g. one running in a worker process."""
+        for name, value in counters.items():
+            self.counters[name] += value
+
+def deletes(token: str, max_distance: int) -> Set[str]:
+    """The strings obtained by deleting up to `max_distance` characters from `token`, itself included."""
+    results = frontier = {token}
+    for _ in range(max_distance):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        results = results | frontier
+    return results
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Damerau-Levenshtein distance (optimal string alignment) between two
+    strings, or `max_distance` + 1 as soon as it is known to exceed `max_distance`.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before_previous, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+class FuzzyDrugMatcher:
+    """
+    Matcher that also finds the synonyms of the drugs (brand names, salts...)
+    and the names or synonyms misspelled by up to `max_distance` edits, and
+    records how each drug was matched: a (position, match type code, score)
+    tuple per mentioned drug, the match type being one of MATCH_TYPES.
+
+    Drug names and synonyms are matched by a DrugMatcher of both, so an
+    'exact' match is exactly a match of the exact mode, and a 'synonym' match
+    has the same semantics. Misspellings are found token by token through a
+    SymSpell-style deletion index: each string obtained by deleting up to
+    `max_distance` characters from the first token of a name or synonym
+    points to that token. A title token is looked up with its own deletions,
+    the candidates are confirmed with the edit distance, and the result is
+    kept for every distinct token seen. The following tokens of multi-word
+    names are then compared one to one. Tokens shorter than
+    `min_fuzzy_length` characters must match exactly.
+
+    The score is 1 for exact and synonym matches, and 1 - edits / name
+    length for 'fuzzy' ones. A drug matched several ways keeps its best match.
+    """
+
+    def __init__(self, drug_names: List[str], synonyms: Iterable[Tuple[int, str]] = (),
+                 max_distance: int = 1, min_fuzzy_length: int = 5):
+        synonyms = list(synonyms)
+        self.drug_names = list(drug_names)
+        self.max_distance = max_distance
+        self.min_fuzzy_length = min_fuzzy_length
+        # Names then synonyms, and the drug position of each
+        self._exact = DrugMatcher(self.drug_names + [synonym for _, synonym in synonyms])
+        self._name_drugs = list(range(len(self.drug_names))) + [position for position, _ in synonyms]
+        # The word tokens of each name or synonym matched with edits, and its drug position
+        self._terms: List[Tuple[List[str], int]] = []
+        self._term_index: Dict[str, List[int]] = {}
+        self._deletes: Dict[str, Set[str]] = {}
+        # First tokens within the edit distance of each title token seen, and their distance
+        self._token_cache: Dict[str, List[Tuple[str, int]]] = {}
+        self.counters: Dict[str, int] = dict.fromkeys(FUZZY_COUNTER_NAMES, 0)
+
+        if max_distance > 0:
+            for position, name in chain(enumerate(self.drug_names), synonyms):
+                tokens = WORD_PATTERN.findall(name.lower())
+                if not tokens or len(tokens[0]) < min_fuzzy_length:
+                    continue
+                self._term_index.setdefault(tokens[0], []).append(len(self._terms))
+                self._terms.append((tokens, position))
+            for first_token in self._term_index:
+                for deleted in deletes(first_token, max_distance):
+                    self._deletes.setdefault(deleted, set()).add(first_token)
+
+    @classmethod
+    def from_drugs_df(cls, drugs_df: pd.DataFrame, synonyms_df: Optional[pd.DataFrame] = None,
+                      max_distance: int = 1, min_fuzzy_length: int = 5) -> "FuzzyDrugMatcher":
+        """
+        Builds a matcher from a drugs DataFrame and a synonyms DataFrame
+        (atccode, synonym), whose synonyms apply to every drug of their atccode.
+        """
+        synonyms = []
+        if synonyms_df is not None:
+            positions = {}
+            for position, atccode in enumerate(drugs_df['atccode'].astype(str).tolist()):
+                positions.setdefault(atccode, []).append(position)
+            unknown = 0
+            for atccode, synonym in zip(synonyms_df['atccode'].astype(str).tolist(), synonyms_df['synonym'].tolist()):
+                if atccode not in positions:
+                    unknown += 1
+                    continue
+                synonyms.extend((position, synonym) for position in positions[atccode])
+            if unknown:
+                logging.warning(f"{unknown} synonyms ignored: their atccode is not in the drugs table.")
+        return cls(drugs_df['drug'].tolist(), synonyms, max_distance, min_fuzzy_length)
+
+    @property
+    def first_tokens(self) -> Optional[FrozenSet[str]]:
+        """See `DrugMatcher.first_tokens`. None with misspellings, which any title may hold."""
+        if self._terms:
+            return None
+        return self._exact.first_tokens
+
+    def _close_tokens(self, token: str) -> List[Tuple[str, int]]:
+        """
+        The indexed first tokens within the edit distance of a title token,
+        with their distance, looked up once per distinct token.
+        """
+        close_tokens = self._token_cache.get(token)
+        if close_tokens is None:
+            close_tokens = []
+            if len(token) >= self.min_fuzzy_length - self.max_distance:
+                candidates = set()
+                for deleted in deletes(token, self.max_distance):
+                    candidates.update(self._deletes.get(deleted, ()))
+                for candidate in candidates:
+                    distance = edit_distance(token, candidate, self.max_distance)
+                    if distance <= self.max_distance:
+                        close_tokens.append((candidate, distance))
+            self._token_cache[token] = close_tokens
+        return close_tokens
+
+    def _fuzzy_score(self, term_tokens: List[str], tokens: List[str], start: int, distance: int) -> Optional[float]:
+        """The score of a name whose first token is close to tokens[start] (None if the rest is not)."""
+        if start + len(term_tokens) > len(tokens):
+            return None
+        for term_token, token in zip(term_tokens[1:], tokens[start + 1:]):
+            allowed = self.max_distance if len(term_token) >= self.min_fuzzy_length else 0
+            token_distance = edit_distance(token, term_token, allowed)
+            if token_distance > allowed:
+                return None
+            distance += token_distance
+        return round(1 - distance / sum(map(len, term_tokens)), 3)
+
+    def match(self, title: str) -> List[Tuple[int, int, float]]:
+        """
+        Scans a title and returns the drugs it mentions, with how they were matched.
+
+        Args:
+            title (str): The publication title (case-insensitive).
+
+        Returns:
+            List[Tuple[int, int, float]]: (drug position, match type code, score)
+                tuples, in the order of the drug list.
+        """
+        title_lower = title.lower()
+        return self.match_tokens(title_lower, WORD_PATTERN.findall(title_lower))
+
+    def match_tokens(self, title_lower: str, tokens: List[str]) -> List[Tuple[int, int, float]]:
+        """`match` for a lowercased title and its word tokens, already extracted."""
+        candidates_before = self._exact.counters['candidate_hits']
+        best: Dict[int, Tuple[int, float]] = {}
+        # Names sort before synonyms: the exact name of a drug wins over its synonyms
+        drug_count = len(self.drug_names)
+        for position in self._exact.match_tokens(title_lower, tokens):
+            best.setdefault(self._name_drugs[position], (EXACT, 1.0) if position < drug_count else (SYNONYM, 1.0))
+        candidates = self._exact.counters['candidate_hits'] - candidates_before
+
+        if self._terms:
+            token_cache = self._token_cache
+            for start, token in enumerate(tokens):
+                close_tokens = token_cache.get(token)
+                if close_tokens is None:
+                    close_tokens = self._close_tokens(token)
+                for first_token, distance in close_tokens:
+                    for term in self._term_index[first_token]:
+                        term_tokens, position = self._terms[term]
+                        candidates += 1
+                        match_type, best_score = best.get(position, (FUZZY, 0.0))
+                        if match_type != FUZZY:
+                            continue
+                        score = self._fuzzy_score(term_tokens, tokens, start, distance)
+                        if score is not None and score > best_score:
+                            best[position] = (FUZZY, score)
+
+        matches = [(position, *best[position]) for position in sorted(best)]
+        self.counters['titles_scanned'] += 1
+        self.counters['candidate_hits'] += candidates
+        self.counters['mentions'] += len(matches)
+        for _, match_type, _ in matches:
+            if match_type == SYNONYM:
+                self.counters['synonym_mentions'] += 1
+            elif match_type == FUZZY:
+                self.counters['fuzzy_mentions'] += 1
+        return matches
+
+    def merge_counters(self, counters: Dict[str, int]):
+        """Adds the counters of another matcher, e.g. one running in a worker process."""
+        for name, value in counters.items():
+            self.counters[name] += value
+
+def match_batch(matcher, titles: List[str]) -> List:
+    """
+    Matches every title with `matcher.match`. When the titles are all in
+    normalized form (see `is_normalized`), like the titles cleaned by the
+    preprocessing, they are neither lowercased nor tokenized by regex again.
+
+    Args:
+        matcher (DrugMatcher or FuzzyDrugMatcher): The matcher.
+        titles (List[str]): The titles.
+
+    Returns:
+        List: The matches of each title (see the matcher's `match`).
+    """
+    if not is_normalized(titles):
+        return [matcher.match(title) for title in titles]
+    match_tokens = matcher.match_tokens
+    return [match_tokens(title, normalized_tokens(title)) for title in titles]
@@ -0,0 +1,237 @@
+# src/pharma_graph_pipeline/pipeline/memo.py
+
+import pandas as pd
+import numpy as np
+from typing import Callable, Dict, List, Optional
+from pathlib import Path
+import hashlib
+import json
+import logging
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # The memo is optional: without pyarrow, every title is cleaned and matched
+    pa = pq = None
+
+MEMO_COLUMNS = ['key', 'clean_title', 'drug_positions', 'used']
+# Modules whose code produces the memoized clean titles and matches
+CODE_MODULES = [Path(__file__).parent / name for name in ('normalize.py', 'matcher.py')]
+
+def text_keys(texts: np.ndarray) -> np.ndarray:
+    """64-bit content hashes of raw texts, computed in bulk."""
+    return pd.util.hash_array(texts, categorize=False).view(np.int64)
+
+def drugs_fingerprint(drugs_df: pd.DataFrame) -> str:
+    """Fingerprint of the drug list: the memoized matches are drug positions in this list."""
+    payload = json.dumps([drugs_df['atccode'].tolist(), drugs_df['drug'].tolist()], default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def code_fingerprint() -> str:
+    """Fingerprint of the cleaning and matching code: the memo is only valid for the code that filled it."""
+    sha256 = hashlib.sha256()
+    for module_path in CODE_MODULES:
+        sha256.update(module_path.read_bytes())
+    return sha256.hexdigest()
+
+def _encode_positions(positions: List[int]) -> str:
+    return ','.join(map(str, positions))
+
+def _decode_positions(value: str) -> List[int]:
+    return [int(position) for position in value.split(',')] if value else []
+
+def _to_objects(array) -> np.ndarray:
+    """Converts an Arrow string column to an object array (None for nulls)."""
+    return np.asarray(array.to_numpy(zero_copy_only=False), dtype=object)
+
+class TitleMemo:
+    """
+    Persistent memo of the titles seen by previous runs: for the hash of each
+    raw title, its cleaned title and the positions of the drugs it mentions,
+    valid for the drug list whose fingerprint is stored with them. Titles
+    found in the memo are neither cleaned nor matched again, and the matches
+    are cleared whenever the drug list changes. The whole memo is cleared
+    when the cleaning or matching code changes (`code_fingerprint`).
+
+    The memo is a Parquet file, read once (memory-mapped) when it is opened
+    and looked up in bulk, then rewritten by `close` with this run's entries.
+    Beyond `max_entries` titles, the least recently used ones are evicted.
+    Titles are cleaned (`clean_texts`) before they are matched
+    (`match_titles`): the memo keeps the raw title keys of the cleaned titles
+    in between, to store their matches.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        # Entries used by this run are stamped with its start time, for the LRU eviction
+        self.stamp = time.time_ns()
+        self.counters = {'clean_hits': 0, 'clean_misses': 0, 'match_hits': 0, 'match_misses': 0}
+
+        self.code_fingerprint = code_fingerprint()
+        stored = pq.read_table(self.path, memory_map=True) if self.path.is_file() else None
+        if stored is not None and (stored.schema.metadata or {}).get(b'code_fingerprint', b'').decode('utf-8') != self.code_fingerprint:
+            logging.info("Cleaning or matching code changed: title memo cleared.")
+            stored = None
+        if stored is None:
+            stored = pa.table({
+                'key': pa.array([], pa.int64()), 'clean_title': pa.array([], pa.string()),
+                'drug_positions': pa.array([], pa.string()), 'used': pa.array([], pa.int64()),
+            })
+        metadata = stored.schema.metadata or {}
+        self._stored = stored
+        self._stored_fingerprint = metadata.get(b'drugs_fingerprint', b'').decode('utf-8') or None
+        self._index = pd.Index(stored['key'].to_numpy())
+        self._used = stored['used'].to_numpy().copy()
+        self._drugs_fingerprint = None
+        self._matches_cleared = False
+
+        # Titles cleaned and waiting to be matched (key, clean_title, drug_positions)
+        self._pending: List[pd.DataFrame] = []
+        # New entries (key, clean_title) and new matches (key, drug_positions) of this run
+        self._new_entries: List[pd.DataFrame] = []
+        self._new_matches: List[pd.DataFrame] = []
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional["TitleMemo"]:
+        """Opens the memo of the 'memo' config section, or returns None if it is disabled."""
+        memo_config = config.get('memo', {})
+        if not memo_config.get('enabled', False):
+            return None
+        if pq is None:
+            logging.warning("pyarrow is not installed: the title memo is disabled.")
+            return None
+        return cls(memo_config.get('path', '.cache/title_memo.parquet'), int(memo_config.get('max_entries', 5_000_000)))
+
+    def clean_texts(self, texts: pd.Series, clean: Callable[[pd.Series], pd.Series]) -> pd.Series:
+        """
+        Cleans a title column with `clean` (e.g. `clean_text_series`), only
+        cleaning the distinct titles missing from the memo.
+        """
+        texts = texts.astype(object).where(texts.notna(), '').astype(str)
+        codes, uniques = pd.factorize(texts.to_numpy())
+        keys = text_keys(uniques)
+
+        locations = self._index.get_indexer(keys)
+        found = np.flatnonzero(locations >= 0)
+        missing = np.flatnonzero(locations < 0)
+        self.counters['clean_hits'] += len(found)
+        self.counters['clean_misses'] += len(missing)
+        self._used[locations[found]] = self.stamp
+
+        cleaned = np.empty(len(keys), dtype=object)
+        drug_positions = np.full(len(keys), None, dtype=object)
+        cleaned[found] = _to_objects(self._stored['clean_title'].take(locations[found]))
+        if not self._matches_cleared:
+            drug_positions[found] = _to_objects(self._stored['drug_positions'].take(locations[found]))
+        if len(missing):
+            cleaned[missing] = clean(pd.Series(uniques[missing], dtype=object)).to_numpy()
+            self._new_entries.append(pd.DataFrame({'key': keys[missing], 'clean_title': cleaned[missing]}))
+
+        self._pending.append(pd.DataFrame({'key': keys, 'clean_title': cleaned, 'drug_positions': drug_positions}))
+        return pd.Series(cleaned[codes], index=texts.index, dtype=object)
+
+    def _check_drugs(self, drugs_df: pd.DataFrame) -> bool:
+        """
+        Clears the memoized matches if the drug list changed since they were
+        stored. Returns whether they were just cleared.
+        """
+        fingerprint = drugs_fingerprint(drugs_df)
+        if fingerprint == self._drugs_fingerprint:
+            return False
+        self._drugs_fingerprint = fingerprint
+        if fingerprint == self._stored_fingerprint:
+            return False
+        if self._stored_fingerprint is not None and len(self._index):
+            logging.info("Drug list changed: memoized matches cleared.")
+        self._stored_fingerprint = fingerprint
+        self._matches_cleared = True
+        self._new_matches = []
+        return True
+
+    def match_titles(self, titles: List[str], drugs_df: pd.DataFrame,
+                     match: Callable[[List[str]], List[List[int]]]) -> List[List[int]]:
+        """
+        Returns the drug positions matched in each title cleaned by
+        `clean_texts`, only calling `match` (e.g. `match_titles` with a
+        matcher of `drugs_df`) on the distinct titles without memoized matches.
+        Titles that did not go through `clean_texts` are matched, but not memoized.
+        """
+        pending = pd.concat(self._pending, ignore_index=True) if self._pending else \
+            pd.DataFrame(columns=['key', 'clean_title', 'drug_positions'])
+        self._pending = []
+        if self._check_drugs(drugs_df):
+            pending['drug_positions'] = None
+
+        codes, unique_titles = pd.factorize(np.array(titles, dtype=object))
+        memoized = pending.dropna(subset=['drug_positions']).drop_duplicates('clean_title')
+        locations = pd.Index(memoized['clean_title']).get_indexer(unique_titles)
+        found = np.flatnonzero(locations >= 0)
+        missing = np.flatnonzero(locations < 0)
+        self.counters['match_hits'] += len(found)
+        self.counters['match_misses'] += len(missing)
+
+        matches = np.empty(len(unique_titles), dtype=object)
+        matches[found] = [_decode_positions(value) for value in memoized['drug_positions'].to_numpy()[locations[found]]]
+        if len(missing):
+            missing_titles = unique_titles[missing]
+            matches[missing] = match(missing_titles.tolist())
+            # The new matches are stored on every raw title key of these titles
+            encoded = pd.Series([_encode_positions(positions) for positions in matches[missing]], index=missing_titles)
+            updates = pending[pending['clean_title'].isin(missing_titles)]
+            self._new_matches.append(pd.DataFrame({
+                'key': updates['key'].to_numpy(),
+                'drug_positions': encoded.loc[updates['clean_title']].to_numpy(),
+            }))
+
+        return matches[codes].tolist()
+
+    def _merged_table(self) -> "pa.Table":
+        """The stored entries updated with this run's entries, matches and usage."""
+        stored = self._stored.select(MEMO_COLUMNS)
+        stored = stored.set_column(3, 'used', pa.array(self._used, pa.int64()))
+        if self._matches_cleared:
+            stored = stored.set_column(2, 'drug_positions', pa.nulls(len(stored), pa.string()))
+        tables = [stored]
+        if self._new_entries:
+            new_entries = pd.concat(self._new_entries, ignore_index=True).drop_duplicates('key')
+            tables.append(pa.table({
+                'key': pa.array(new_entries['key'].to_numpy(), pa.int64()),
+                'clean_title': pa.array(new_entries['clean_title'].tolist(), pa.string()),
+                'drug_positions': pa.nulls(len(new_entries), pa.string()),
+                'used': pa.array(np.full(len(new_entries), self.stamp), pa.int64()),
+            }))
+        merged = pa.concat_tables(tables)
+
+        if self._new_matches:
+            new_matches = pd.concat(self._new_matches, ignore_index=True).drop_duplicates('key', keep='last')
+            drug_positions = _to_objects(merged['drug_positions'])
+            drug_positions[pd.Index(merged['key'].to_numpy()).get_indexer(new_matches['key'])] = \
+                new_matches['drug_positions'].to_numpy()
+            merged = merged.set_column(2, 'drug_positions', pa.array(drug_positions.tolist(), pa.string()))
+        return merged
+
+    def close(self):
+        """
+        Writes the memo back, evicting the least recently used titles beyond
+        `max_entries`, and logs the hit/miss counters.
+        """
+        merged = self._merged_table()
+        excess = len(merged) - self.max_entries
+        if excess > 0:
+            keep = np.sort(np.argsort(-merged['used'].to_numpy(), kind='stable')[:self.max_entries])
+            merged = merged.take(keep)
+            logging.info(f"Title memo: {excess} least recently used titles evicted.")
+
+        merged = merged.replace_schema_metadata({
+            'drugs_fingerprint': self._stored_fingerprint or '', 'code_fingerprint': self.code_fingerprint
+        })
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix('.tmp')
+        pq.write_table(merged, temp_path)
+        temp_path.replace(self.path)
+        logging.info(
+            f"♻️ Title memo: cleaning {self.counters['clean_hits']} hits / {self.counters['clean_misses']} misses, "
+            f"matching {self.counters['match_hits']} hits / {self.counters['match_misses']} misses."
+        )
@@ -0,0 +1,262 @@
+# src/pharma_graph_pipeline/pipeline/mentions.py
+
+import pandas as pd
+import numpy as np
+from itertools import chain
+from typing import Callable, Dict, List, Optional
+from src.pharma_graph_pipeline.pipeline.preprocess import format_dates
+from src.pharma_graph_pipeline.pipeline.matcher import MATCH_TYPES
+
+# Publication columns kept for the mentioning publications
+PUBLICATION_COLUMNS = ['journal', 'source_type', 'id', 'title', 'date']
+DRUG_COLUMNS = ['atccode', 'drug']
+# Output field of each publication and drug column
+PUBLICATION_FIELDS = {
+    'article_id': 'id', 'article_title': 'title', 'mention_date': 'date',
+    'journal': 'journal', 'source_type': 'source_type', 'surrogate_key': 'surrogate_key',
+}
+DRUG_FIELDS = {'mentioned_drug_id': 'atccode', 'mentioned_drug_name': 'drug'}
+# Output fields of the way each drug was matched, recorded by fuzzy matching
+MATCH_FIELDS = ['match_type', 'score']
+# Columns of the drug -> publication -> journal edge list
+EDGE_FIELDS = [
+    'mentioned_drug_id', 'mentioned_drug_name', 'source_type',
+    'article_id', 'article_title', 'mention_date', 'journal'
+]
+
+class MentionTable:
+    """
+    Compact table of drug mentions: two parallel int32 arrays, the row of the
+    mentioning publication and the position of the mentioned drug. They
+    reference a table of the mentioning publications and the drugs table, so
+    journal, title and drug strings are stored once instead of once per mention.
+
+    Mentions are kept in match order (publication order, then drug order).
+    With fuzzy matching, two more parallel arrays record how each drug was
+    matched: the MATCH_TYPES code and the score of each mention.
+    """
+
+    def __init__(self, publications: pd.DataFrame, drugs: pd.DataFrame,
+                 publication_index: np.ndarray, drug_index: np.ndarray,
+                 match_types: Optional[np.ndarray] = None, scores: Optional[np.ndarray] = None):
+        self.publications = publications.reset_index(drop=True)
+        self.drugs = drugs[DRUG_COLUMNS].reset_index(drop=True)
+        self.publication_index = np.asarray(publication_index, dtype=np.int32)
+        self.drug_index = np.asarray(drug_index, dtype=np.int32)
+        self.match_types = None if match_types is None else np.asarray(match_types, dtype=np.int8)
+        self.scores = None if scores is None else np.asarray(scores, dtype=np.float64)
+
+    @classmethod
+    def from_matches(cls, drugs_df: pd.DataFrame, publications_df: pd.DataFrame,
+                     all_matches: List[List[int]], with_surrogate_key: bool = False) -> "MentionTable":
+        """
+        Builds the table from the drug positions matched for each publication,
+        keeping only the publications that mention at least one drug. The
+        matches may also be the (position, match type code, score) tuples of
+        a FuzzyDrugMatcher.
+        """
+        counts = np.fromiter(map(len, all_matches), dtype=np.int64, count=len(all_matches))
+        mention_count = int(counts.sum())
+        rows = np.flatnonzero(counts)
+        match_types = scores = None
+        if mention_count and isinstance(all_matches[rows[0]][0], tuple):
+            drug_index, match_types, scores = (
+                np.array(values) for values in zip(*chain.from_iterable(all_matches))
+            )
+        else:
+            drug_index = np.fromiter(chain.from_iterable(all_matches), dtype=np.int32, count=mention_count)
+
+        columns = PUBLICATION_COLUMNS + (['surrogate_key'] if with_surrogate_key else [])
+        publications = publications_df[columns].iloc[rows]
+        publication_index = np.repeat(np.arange(len(rows), dtype=np.int32), counts[rows])
+        return cls(publications, drugs_df, publication_index, drug_index, match_types, scores)
+
+    @classmethod
+    def concat(cls, tables: List["MentionTable"], drugs_df: pd.DataFrame) -> "MentionTable":
+        """Concatenates tables built against the same drugs table (e.g. one per batch)."""
+        if not tables:
+            return cls.from_matches(drugs_df, pd.DataFrame(columns=PUBLICATION_COLUMNS), [])
+        offsets = np.cumsum([0] + [len(table.publications) for table in tables[:-1]])
+        match_types = scores = None
+        # Batches without any mention have no match arrays
+        if any(table.with_match_info for table in tables):
+            match_types = np.concatenate([table.match_types for table in tables if len(table)])
+            scores = np.concatenate([table.scores for table in tables if len(table)])
+        return cls(
+            pd.concat([table.publications for table in tables], ignore_index=True),
+            drugs_df,
+            np.concatenate([table.publication_index + offset for table, offset in zip(tables, offsets)]),
+            np.concatenate([table.drug_index for table in tables]),
+            match_types, scores,
+        )
+
+    @property
+    def with_surrogate_key(self) -> bool:
+        return 'surrogate_key' in self.publications.columns
+
+    @property
+    def with_match_info(self) -> bool:
+        return self.match_types is not None
+
+    def __len__(self) -> int:
+        return len(self.publication_index)
+
+    def _field_values(self, field: str) -> tuple:
+        """The values of an output field, and whether they are indexed by publication (else by drug)."""
+        if field in DRUG_FIELDS:
+            return self.drugs[DRUG_FIELDS[field]].tolist(), False
+        column = self.publications[PUBLICATION_FIELDS[field]]
+        values = format_dates(column) if field == 'mention_date' else column.astype(object).tolist()
+        return values, True
+
+    def _match_values(self) -> Optional[tuple]:
+        """The match type names and the scores of the mentions, as lists (None without them)."""
+        if not self.with_match_info:
+            return None
+        return np.asarray(MATCH_TYPES, dtype=object)[self.match_types].tolist(), self.scores.tolist()
+
+    def reference_builder(self, view: str = 'journals') -> Callable[[np.ndarray], List[Dict]]:
+        """
+        Returns a function building the JSON references of the mentions at the
+        given positions, for the 'journals' view (the mentioned drug) or the
+        'drugs' view (the mentioning journal). Column values are extracted
+        once, and dates formatted once per distinct day, when the builder is created.
+        """
+        article_ids = self.publications['id'].tolist()
+        titles = self.publications['title'].tolist()
+        dates = format_dates(self.publications['date'])
+        keys = self.publications['surrogate_key'].tolist() if self.with_surrogate_key else None
+        match_values = self._match_values()
+        match_types, scores = match_values if match_values is not None else (None, None)
+
+        if view == 'drugs':
+            journals = self.publications['journal'].astype(object).tolist()
+
+            def build_drug_references(positions: np.ndarray) -> List[Dict]:
+                references = []
+                for m, p in zip(positions.tolist(), self.publication_index[positions].tolist()):
+                    reference = {
+                        'article_id': article_ids[p],
+                        'article_title': titles[p],
+                        'mention_date': dates[p],
+                        'journal': journals[p]
+                    }
+                    if match_types is not None:
+                        reference['match_type'] = match_types[m]
+                        reference['score'] = scores[m]
+                    if keys is not None:
+                        reference['surrogate_key'] = keys[p]
+                    references.append(reference)
+                return references
+
+            return build_drug_references
+
+        drug_ids = self.drugs['atccode'].tolist()
+        drug_names = self.drugs['drug'].tolist()
+
+        def build_references(positions: np.ndarray) -> List[Dict]:
+            references = []
+            for m, p, d in zip(positions.tolist(), self.publication_index[positions].tolist(),
+                               self.drug_index[positions].tolist()):
+                reference = {
+                    'article_id': article_ids[p],
+                    'article_title': titles[p],
+                    'mention_date': dates[p],
+                    'mentioned_drug_id': drug_ids[d],
+                    'mentioned_drug_name': drug_names[d]
+                }
+                if match_types is not None:
+                    reference['match_type'] = match_types[m]
+                    reference['score'] = scores[m]
+                if keys is not None:
+                    reference['surrogate_key'] = keys[p]
+                references.append(reference)
+            return references
+
+        return build_references
+
+    def to_records(self) -> List[Dict]:
+        """Expands the mentions into one dict per mention (the historical record format)."""
+        journals = self.publications['journal'].astype(object).tolist()
+        source_types = self.publications['source_type'].astype(object).tolist()
+        references = self.reference_builder()(np.arange(len(self)))
+        return [
+            {'journal': journals[p], 'source_type': source_types[p], **reference}
+            for p, reference in zip(self.publication_index.tolist(), references)
+        ]
+
+    def take(self, positions: np.ndarray) -> "MentionTable":
+        """
+        The table of the mentions at the given (sorted) positions, keeping only
+        their publications, in the same order, and the whole drugs table.
+        """
+        positions = np.asarray(positions)
+        rows, publication_index = np.unique(self.publication_index[positions], return_inverse=True)
+        return MentionTable(
+            self.publications.iloc[rows], self.drugs, publication_index, self.drug_index[positions],
+            None if self.match_types is None else self.match_types[positions],
+            None if self.scores is None else self.scores[positions],
+        )
+
+    def mention_hashes(self) -> np.ndarray:
+        """
+        A 64-bit hash of the output fields of each mention, the same whether
+        dates are stored as day numbers or as strings, e.g. to tell whether a
+        set of mentions changed since a previous run.
+        """
+        edges = self.to_edges()
+        if self.with_surrogate_key:
+            edges['surrogate_key'] = self.publications['surrogate_key'].to_numpy(dtype=object)[self.publication_index]
+        return pd.util.hash_pandas_object(edges, index=False).to_numpy()
+
+    def to_edges(self) -> pd.DataFrame:
+        """
+        The drug -> publication -> journal edge list, one row per mention, in
+        mention order, with the match type and score of fuzzy matching.
+        """
+        edges = {}
+        for field in EDGE_FIELDS:
+            values, by_publication = self._field_values(field)
+            rows = self.publication_index if by_publication else self.drug_index
+            edges[field] = np.asarray(values, dtype=object)[rows] if len(values) else np.array([], dtype=object)
+        if self.with_match_info:
+            edges['match_type'] = np.asarray(MATCH_TYPES, dtype=object)[self.match_types]
+            edges['score'] = self.scores
+        return pd.DataFrame(edges)
+
+    def to_frames(self) -> Dict[str, pd.DataFrame]:
+        """The tables of the mention table, e.g. to cache them as Parquet."""
+        mentions = pd.DataFrame({'publication_index': self.publication_index, 'drug_index': self.drug_index})
+        if self.with_match_info:
+            mentions['match_type'] = self.match_types
+            mentions['score'] = self.scores
+        return {'publications': self.publications, 'drugs': self.drugs, 'mentions': mentions}
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> "MentionTable":
+        """
+        Builds a table from mention records (e.g. those of the incremental
+        store), with their publications and drugs in order of first mention.
+        """
+        columns = list(PUBLICATION_FIELDS) if records and 'surrogate_key' in records[0] else list(PUBLICATION_FIELDS)[:-1]
+        match_fields = MATCH_FIELDS if records and 'match_type' in records[0] else []
+        records_df = pd.DataFrame(records, columns=columns + list(DRUG_FIELDS) + match_fields)
+        publication_index = records_df.groupby(columns, sort=False, dropna=False).ngroup().to_numpy()
+        drug_index = records_df.groupby(list(DRUG_FIELDS), sort=False, dropna=False).ngroup().to_numpy()
+
+        publications = records_df[columns].drop_duplicates().rename(columns=PUBLICATION_FIELDS)
+        drugs = records_df[list(DRUG_FIELDS)].drop_duplicates().rename(columns=DRUG_FIELDS)
+        match_types = scores = None
+        if match_fields:
+            match_types = records_df['match_type'].map(MATCH_TYPES.index).to_numpy()
+            scores = records_df['score'].to_numpy()
+        return cls(publications, drugs, publication_index, drug_index, match_types, scores)
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame]) -> "MentionTable":
+        """Rebuilds a table from `to_frames`."""
+        mentions = frames['mentions']
+        match_types = mentions['match_type'].to_numpy() if 'match_type' in mentions.columns else None
+        scores = mentions['score'].to_numpy() if 'score' in mentions.columns else None
+        return cls(frames['publications'], frames['drugs'],
+                   mentions['publication_index'].to_numpy(), mentions['drug_index'].to_numpy(), match_types, scores)
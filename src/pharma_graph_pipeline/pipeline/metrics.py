@@ -0,0 +1,94 @@
+# src/pharma_graph_pipeline/pipeline/metrics.py
+
+from typing import Dict, Iterator, Optional
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+import cProfile
+import json
+import logging
+import sys
+import time
+from src.pharma_graph_pipeline.pipeline.storage import open_url
+
+try:
+    import resource
+except ImportError:  # Not available on Windows: CPU time falls back to process_time, no peak RSS
+    resource = None
+
+def _cpu_seconds() -> float:
+    """CPU time (user + system) of this process and of its finished children, e.g. matching workers."""
+    if resource is None:
+        return time.process_time()
+    usage = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    return sum(u.ru_utime + u.ru_stime for u in usage)
+
+def _peak_rss_mb(who: str = 'RUSAGE_SELF') -> Optional[float]:
+    """Peak resident set size so far, in MB (None where unavailable)."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(getattr(resource, who)).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+class RunMetrics:
+    """
+    Collects the instrumentation of a pipeline run: wall time, CPU time, peak
+    RSS and row counts of each stage, per-file read timings and the matcher
+    counters. Optionally profiles each stage with cProfile, one dump per stage.
+    """
+
+    def __init__(self, profile_dir: Optional[str] = None):
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.stages: Dict[str, Dict] = {}
+        self.files = []
+        self.counters: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict]:
+        """
+        Measures a stage. The yielded record may be given 'rows_in' and
+        'rows_out' by the caller.
+        """
+        record = {'rows_in': None, 'rows_out': None}
+        profiler = cProfile.Profile() if self.profile_dir else None
+        wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(self.profile_dir / f"{name}.prof")
+            record['wall_seconds'] = round(time.perf_counter() - wall_start, 4)
+            record['cpu_seconds'] = round(_cpu_seconds() - cpu_start, 4)
+            record['peak_rss_mb'] = _peak_rss_mb()
+            record['children_peak_rss_mb'] = _peak_rss_mb('RUSAGE_CHILDREN')
+            self.stages[name] = record
+            logging.info(f"⏱️ Stage '{name}': {record['wall_seconds']}s wall, {record['cpu_seconds']}s CPU.")
+
+    def record_file(self, filename: str, seconds: float, rows: Optional[int]):
+        """Records the read time and row count of an input file."""
+        self.files.append({'file': filename, 'seconds': round(seconds, 4), 'rows': rows})
+
+    def add_counters(self, counters: Dict[str, int]):
+        """Adds counters (e.g. the matcher's) to the run totals."""
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self) -> Dict:
+        return {
+            'started_at': self.started_at,
+            'stages': self.stages,
+            'files': self.files,
+            'counters': self.counters,
+        }
+
+    def save(self, path: str):
+        """Writes the run report as JSON (to a local path or an fsspec URL)."""
+        with open_url(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=4)
+        logging.info(f"📊 Run report saved to {path}")
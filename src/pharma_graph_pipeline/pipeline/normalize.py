@@ -0,0 +1,115 @@
+# src/pharma_graph_pipeline/pipeline/normalize.py
+
+import pandas as pd
+import numpy as np
+from typing import List
+import re
+
+# Word tokens, with the same (Unicode) definition of a word character as `\b`
+WORD_PATTERN = re.compile(r'\w+')
+# Text cleaning patterns, compiled once
+ESCAPE_PATTERN = re.compile(r'\\x[0-9a-f]{2}')
+HTML_TAG_PATTERN = re.compile(r'<.*?>')
+SPECIAL_CHAR_PATTERN = re.compile(r'[^\w\sÀ-ÿ-]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# ASCII characters that are neither word characters nor whitespace, mapped to spaces
+ASCII_PUNCTUATION = str.maketrans({
+    char: ' ' for char in map(chr, range(128)) if not re.fullmatch(r'[\w\s]', char)
+})
+# SPECIAL_CHAR_PATTERN on ASCII text, as a single-pass table: the special
+# characters, and the whitespace other than the newline (collapsed afterwards anyway), become spaces
+ASCII_SPECIAL_CHARS = str.maketrans({
+    char: ' ' for char in map(chr, range(128))
+    if char != '\n' and (char.isspace() or SPECIAL_CHAR_PATTERN.fullmatch(char))
+})
+# The ASCII characters of normalized text, as bytes
+NORMALIZED_ASCII = b'abcdefghijklmnopqrstuvwxyz0123456789_- \n'
+NON_ASCII_BYTES = bytes(range(128, 256))
+
+def clean_text(text: str) -> str:
+    if pd.isna(text):
+        return ""
+    text = str(text).lower()
+    text = ESCAPE_PATTERN.sub('', text)
+    text = HTML_TAG_PATTERN.sub('', text)
+    text = SPECIAL_CHAR_PATTERN.sub(' ', text)
+    text = WHITESPACE_PATTERN.sub(' ', text).strip()
+    return text
+
+def _clean_joined(values: List[str]) -> List[str]:
+    """
+    Cleans single-line values by running each pattern once over all of them
+    joined with newlines, instead of once per value. None of the patterns
+    matches across a newline, so each value is cleaned exactly as by `clean_text`.
+    ASCII values replace the special characters through ASCII_SPECIAL_CHARS
+    instead of the (Unicode) SPECIAL_CHAR_PATTERN, and skip the patterns
+    that find nothing to replace.
+    """
+    joined = '\n'.join(values).lower()
+    if '\\x' in joined:
+        joined = ESCAPE_PATTERN.sub('', joined)
+    if '<' in joined:
+        joined = HTML_TAG_PATTERN.sub('', joined)
+    if joined.isascii():
+        joined = joined.translate(ASCII_SPECIAL_CHARS)
+    else:
+        joined = SPECIAL_CHAR_PATTERN.sub(' ', joined)
+    # split() breaks on the same characters as \s, and drops the ends like strip()
+    return [' '.join(value.split()) for value in joined.split('\n')]
+
+def clean_text_series(texts: pd.Series) -> pd.Series:
+    """
+    Vectorized `clean_text`: cleans each distinct value of a column once, in
+    bulk, the ASCII values apart from the others (see `_clean_joined`).
+    Values that contain a newline go through `clean_text` one by one.
+    """
+    texts = texts.astype(object).where(texts.notna(), '').astype(str)
+    codes, uniques = pd.factorize(texts)
+    values = uniques.tolist()
+    if is_normalized(values, strict=True):
+        # Already clean (e.g. the cleaned column itself): nothing to do
+        return texts
+
+    cleaned = np.empty(len(values), dtype=object)
+    kinds = np.fromiter(
+        (2 if '\n' in value else value.isascii() for value in values), dtype=np.int8, count=len(values)
+    )
+    for kind in (0, 1):
+        selected = np.flatnonzero(kinds == kind)
+        if len(selected):
+            cleaned[selected] = _clean_joined(uniques[selected].tolist())
+    multiline = np.flatnonzero(kinds == 2)
+    cleaned[multiline] = [clean_text(values[position]) for position in multiline]
+
+    return pd.Series(cleaned[codes], index=texts.index, dtype=object)
+
+def is_normalized(texts: List[str], strict: bool = False) -> bool:
+    """
+    Tells in a few passes over the joined texts whether they are all in
+    normalized form: lowercase, with no ASCII character but lowercase
+    letters, digits, '_', '-' and spaces. The word tokens of such a text are
+    its `normalized_tokens`. With `strict`, the texts are also ASCII, without
+    leading, trailing or repeated spaces: `clean_text` returns them unchanged.
+    """
+    joined = '\n'.join(texts)
+    if strict:
+        return (
+            joined.isascii() and not joined.encode('ascii').translate(None, NORMALIZED_ASCII)
+            # No value holds a newline, nor a leading, trailing or repeated space
+            and joined.count('\n') == max(len(texts) - 1, 0)
+            and '  ' not in joined and ' \n' not in joined and '\n ' not in joined
+            and joined[:1] != ' ' and joined[-1:] != ' '
+        )
+    if joined != joined.lower():
+        return False
+    return not joined.encode('utf-8').translate(None, NORMALIZED_ASCII).translate(None, NON_ASCII_BYTES)
+
+def normalized_tokens(text: str) -> List[str]:
+    """
+    The word tokens of a text in normalized form (see `is_normalized`): a
+    plain split for ASCII text, since its only non-word characters are '-'
+    and spaces.
+    """
+    if text.isascii():
+        return text.replace('-', ' ').split()
+    return WORD_PATTERN.findall(text)
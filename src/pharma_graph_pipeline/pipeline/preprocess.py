@@ -1,32 +1,195 @@
 # src/pharma_graph_pipeline/pipeline/preprocess.py
 
 import pandas as pd
-from typing import Dict
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional
 import logging
 import re
 import hashlib
+from src.pharma_graph_pipeline.pipeline.memo import TitleMemo
+from src.pharma_graph_pipeline.pipeline.matcher import DrugMatcher
+from src.pharma_graph_pipeline.pipeline.normalize import (
+    clean_text, clean_text_series, ESCAPE_PATTERN, HTML_TAG_PATTERN, ASCII_PUNCTUATION, WORD_PATTERN
+)
 
-# ... (clean_text and generate_surrogate_key functions are unchanged) ...
-def clean_text(text: str) -> str:
-    if pd.isna(text):
-        return ""
-    text = str(text).lower()
-    text = re.sub(r'\\x[0-9a-f]{2}', '', text)
-    text = re.sub(r'<.*?>', '', text)
-    text = re.sub(r'[^\w\sÀ-ÿ-]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+# Layouts of the source dates (01/01/2019, 1 January 2020, 2020-01-01), each
+# parsed with an explicit format; other values go through per-value inference
+DATE_FORMATS = [
+    (re.compile(r'\d{4}-\d{2}-\d{2}'), '%Y-%m-%d'),
+    (re.compile(r'\d{1,2}/\d{1,2}/\d{4}'), '%d/%m/%Y'),
+    (re.compile(r'\d{1,2} [A-Za-z]+ \d{4}'), '%d %B %Y'),
+]
+# Low-cardinality publication columns, stored as categoricals
+CATEGORICAL_COLUMNS = ['journal', 'source_type']
 
 def generate_surrogate_key(row):
     unique_string = f"{row['title']}-{row['date']}-{row['journal']}"
     return hashlib.sha256(unique_string.encode('utf-8')).hexdigest()
 
-def preprocess_data(raw_data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
-    # ... (code for setup, id standardization, title merge, etc. is unchanged) ...
-    logging.info("🚀 Starting data preprocessing...")
+def generate_surrogate_keys(publications_df: pd.DataFrame) -> pd.Series:
+    """
+    Vectorized `generate_surrogate_key`: builds the 'title-date-journal' strings
+    column-wise, then hashes them in a single pass.
+    """
+    unique_strings = (
+        publications_df['title'].astype(str) + '-'
+        + publications_df['date'].astype(str) + '-'
+        + publications_df['journal'].astype(str)
+    )
+    keys = [hashlib.sha256(value.encode('utf-8')).hexdigest() for value in unique_strings]
+    return pd.Series(keys, index=publications_df.index, dtype=object)
+
+def format_id(x) -> str:
+    try:
+        # Try to convert to a whole number, then to string
+        return str(int(float(x)))
+    except (ValueError, TypeError):
+        # If it fails, it's already a string (like 'NCT123') or empty
+        return str(x)
+
+def format_ids(ids: pd.Series) -> pd.Series:
+    """
+    Vectorized `format_id`: numeric ids become whole-number strings,
+    the others (like 'NCT123' or '') are kept as strings.
+    """
+    formatted = ids.astype(str)
+    # Go through float64 like float(x) does, so ids round the same way
+    numeric = pd.to_numeric(ids, errors='coerce').astype('float64')
+    is_finite = np.isfinite(numeric)
+    is_number = is_finite & (numeric.abs() < 2**63)
+    formatted[is_number] = numeric[is_number].astype('int64').astype(str)
+    # Beyond the int64 range, the few ids go through format_id one by one
+    is_big = is_finite & ~is_number
+    formatted[is_big] = ids[is_big].map(format_id)
+    # So do the rare numbers float() reads but to_numeric doesn't: digit
+    # separators ('1_000') and non-ASCII digits or spaces ('١٢٣')
+    unparsed = formatted[numeric.isna()]
+    unusual = unparsed.index[unparsed.str.contains(r'[^\x00-\x7f]|_')]
+    formatted[unusual] = ids[unusual].map(format_id)
+    return formatted
+
+def parse_dates(dates: pd.Series) -> pd.Series:
+    """
+    Vectorized equivalent of pd.to_datetime(dates, dayfirst=True,
+    format="mixed", errors="coerce"), which infers a format for every row.
+    Each distinct value is parsed once: values in one of the DATE_FORMATS
+    layouts are parsed with that explicit format, and the others (or those
+    the explicit format rejects, like a month-first 12/25/2020) with the
+    per-value inference.
+    """
+    if dates.dtype != object:
+        return pd.to_datetime(dates, dayfirst=True, format="mixed", errors="coerce")
+
+    codes, uniques = pd.factorize(dates.to_numpy())
+    uniques = pd.Series(uniques, dtype=object)
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+
+    is_text = uniques.map(type) == str
+    texts = uniques[is_text]
+    inferred = [uniques[~is_text]]
+    for pattern, date_format in DATE_FORMATS:
+        in_layout = texts.str.fullmatch(pattern)
+        values = pd.to_datetime(texts[in_layout], format=date_format, errors="coerce")
+        parsed[values.index] = values
+        inferred.append(texts[in_layout][values.isna()])
+        texts = texts[~in_layout]
+    inferred.append(texts)
+
+    inferred = pd.concat(inferred)
+    if len(inferred):
+        parsed[inferred.index] = pd.to_datetime(inferred, dayfirst=True, format="mixed", errors="coerce")
+
+    # Missing values (code -1) take the NaT appended at the end
+    values = np.append(parsed.to_numpy(), np.datetime64('NaT', 'ns'))
+    return pd.Series(values[codes], index=dates.index)
+
+def to_day_numbers(dates: pd.Series) -> pd.Series:
+    """Converts datetimes to int32 day numbers (days since 1970-01-01)."""
+    days = dates.to_numpy().astype('datetime64[D]').astype(np.int64).astype(np.int32)
+    return pd.Series(days, index=dates.index)
+
+def format_dates(dates: pd.Series) -> List[str]:
+    """
+    Formats a date column as YYYY-MM-DD strings: int32 day numbers are
+    formatted once per distinct day, strings are returned as they are.
+    """
+    if not pd.api.types.is_integer_dtype(dates):
+        return dates.tolist()
+    codes, uniques = pd.factorize(dates)
+    formatted = np.datetime_as_string(uniques.to_numpy().astype('datetime64[D]'), unit='D')
+    return formatted[codes].tolist()
+
+def decode_publications(publications_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns clean publications in their plain form: YYYY-MM-DD date strings
+    and object columns instead of categoricals (e.g. to inspect or export them).
+    """
+    publications_df = publications_df.copy()
+    publications_df['date'] = format_dates(publications_df['date'])
+    for column in CATEGORICAL_COLUMNS:
+        publications_df[column] = publications_df[column].astype(object)
+    return publications_df
+
+def raw_titles(publications_df: pd.DataFrame) -> pd.Series:
+    """The raw titles that preprocessing keeps: the scientific_title, else the title."""
+    if 'scientific_title' in publications_df.columns and 'title' in publications_df.columns:
+        return publications_df['scientific_title'].combine_first(publications_df['title'])
+    if 'scientific_title' in publications_df.columns:
+        return publications_df['scientific_title']
+    return publications_df['title']
+
+def prefilter_publications(publications_df: pd.DataFrame, matcher: DrugMatcher) -> pd.DataFrame:
+    """
+    Pushdown of the drug matching before preprocessing: keeps only the raw
+    publications whose title may mention a drug, i.e. holds a token of
+    `matcher.first_tokens` once lowercased and stripped of escapes and HTML
+    tags. The rest of the cleaning only turns non-word characters into
+    spaces, so the cleaned title has the same word tokens and no mention is
+    lost. Each distinct title is tested once; multi-line titles are kept.
 
-    publications_df = raw_data['publications']
+    Args:
+        publications_df (pd.DataFrame): Raw publications (whole or a batch).
+        matcher (DrugMatcher): The matcher of the drugs table.
 
+    Returns:
+        pd.DataFrame: The candidate publications, in their original order.
+    """
+    first_tokens = matcher.first_tokens
+    if first_tokens is None:
+        return publications_df
+
+    titles = raw_titles(publications_df)
+    titles = titles.astype(object).where(titles.notna(), '').astype(str)
+    codes, uniques = pd.factorize(titles.to_numpy())
+    uniques = uniques.tolist()
+
+    candidates = np.ones(len(uniques), dtype=bool)
+    single_line = np.ones(len(uniques), dtype=bool)
+    joined = '\n'.join(uniques)
+    if joined.count('\n') >= len(uniques):
+        single_line = np.array(['\n' not in value for value in uniques], dtype=bool)
+        joined = '\n'.join(value for value in uniques if '\n' not in value)
+    if single_line.any():
+        joined = ESCAPE_PATTERN.sub('', joined.lower())
+        joined = HTML_TAG_PATTERN.sub('', joined)
+        # Once the punctuation is spaces, split() gives the word tokens of
+        # ASCII titles; the others are tokenized like the matcher does
+        joined = joined.translate(ASCII_PUNCTUATION)
+        candidates[single_line] = [
+            not first_tokens.isdisjoint(value.split() if value.isascii() else WORD_PATTERN.findall(value))
+            for value in joined.split('\n')
+        ]
+    return publications_df.take(np.flatnonzero(candidates[codes]))
+
+def preprocess_publications(publications_df: pd.DataFrame, memo: Optional[TitleMemo] = None) -> pd.DataFrame:
+    """
+    Cleans and standardizes a publications DataFrame (whole or a batch).
+    Every step works row by row, so batches can be processed independently.
+    With a `memo`, only the titles it has not seen yet are cleaned.
+
+    The result is compact: journal and source_type are categoricals, and
+    dates are int32 day numbers, formatted back to YYYY-MM-DD on output.
+    """
     # Standardize ID column name
     if 'Id' in publications_df.columns:
         publications_df.rename(columns={'Id': 'id'}, inplace=True)
@@ -41,27 +204,32 @@ def preprocess_data(raw_data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame
         logging.info("Merging 'scientific_title' and 'title' columns.")
         publications_df['title'] = publications_df['scientific_title'].combine_first(publications_df['title'])
         publications_df.drop(columns=['scientific_title'], inplace=True)
+    elif 'scientific_title' in publications_df.columns:
+        # A batch holding only clinical trials has no 'title' column
+        publications_df.rename(columns={'scientific_title': 'title'}, inplace=True)
     
     # Standardize date format
-    publications_df['date'] = pd.to_datetime(
-        publications_df['date'], dayfirst=True, format="mixed", errors="coerce"
-    )
+    publications_df['date'] = parse_dates(publications_df['date'])
     
     # Drop rows with invalid dates or missing titles
     publications_df.dropna(subset=['date', 'title'], inplace=True)
 
-    # Format valid dates to YYYY-MM-DD string
-    publications_df['date'] = publications_df['date'].dt.strftime('%Y-%m-%d')
-    
+    # Keep valid dates as day numbers; the YYYY-MM-DD strings are only needed for the keys
+    date_strings = publications_df['date'].dt.strftime('%Y-%m-%d')
+    publications_df['date'] = to_day_numbers(publications_df['date'])
+
     # Apply text cleaning
     logging.info("Cleaning titles...")
-    publications_df['title'] = publications_df['title'].apply(clean_text)
+    if memo is not None:
+        publications_df['title'] = memo.clean_texts(publications_df['title'], clean_text_series)
+    else:
+        publications_df['title'] = clean_text_series(publications_df['title'])
     logging.info("Cleaning journal names...")
-    publications_df['journal'] = publications_df['journal'].apply(clean_text)
+    publications_df['journal'] = clean_text_series(publications_df['journal'])
 
     # Systematically generate a surrogate key for every row
     logging.info("Generating surrogate key for all rows...")
-    publications_df['surrogate_key'] = publications_df.apply(generate_surrogate_key, axis=1)
+    publications_df['surrogate_key'] = generate_surrogate_keys(publications_df.assign(date=date_strings))
 
     # Remove rows where title or journal became empty after cleaning
     publications_df = publications_df[publications_df['title'] != '']
@@ -70,18 +238,29 @@ def preprocess_data(raw_data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame
     # Replace NaN/None with an empty string before conversion
     publications_df['id'] = publications_df['id'].fillna('')
 
-    # Define a function to convert id to string
-    def format_id(x):
-        try:
-            # Try to convert to a whole number, then to string
-            return str(int(float(x)))
-        except (ValueError, TypeError):
-            # If it fails, it's already a string (like 'NCT123') or empty
-            return str(x)
-
-    # Apply the function to the id column
-    publications_df['id'] = publications_df['id'].apply(format_id)
-    
+    # Convert the id column to strings
+    publications_df['id'] = format_ids(publications_df['id'])
+
+    # Store the repeated journal and source type strings once per distinct value
+    for column in CATEGORICAL_COLUMNS:
+        publications_df[column] = publications_df[column].astype('category')
+
+    return publications_df
+
+def preprocess_batches(publication_batches: Iterable[pd.DataFrame],
+                       memo: Optional[TitleMemo] = None) -> Iterator[pd.DataFrame]:
+    """
+    Streaming counterpart of `preprocess_data`: lazily preprocesses publication
+    batches as they are extracted.
+    """
+    for publications_df in publication_batches:
+        yield preprocess_publications(publications_df, memo)
+
+def preprocess_data(raw_data: Dict[str, pd.DataFrame], memo: Optional[TitleMemo] = None) -> Dict[str, pd.DataFrame]:
+    logging.info("🚀 Starting data preprocessing...")
+
+    publications_df = preprocess_publications(raw_data['publications'], memo)
+
     logging.info("✅ Preprocessing complete.")
 
     return {
@@ -0,0 +1,139 @@
+# src/pharma_graph_pipeline/pipeline/storage.py
+
+from typing import Dict, IO, List, Optional, Union
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+import io
+import logging
+import posixpath
+import fsspec
+from fsspec.core import url_to_fs
+
+# Protocols of the local filesystem, whose files are handled as plain Paths
+LOCAL_PROTOCOLS = ('file', 'local')
+# Maximum number of objects downloaded at the same time by `prefetch`
+DEFAULT_PREFETCH_CONCURRENCY = 16
+# Size of the parts uploaded at a time when writing to object storage
+UPLOAD_BLOCK_SIZE = 8 * 1024 * 1024
+# Listing metadata holding a content checksum: GCS (md5Hash, crc32c), S3 (ETag)...
+CHECKSUM_KEYS = ('md5Hash', 'crc32c', 'ETag', 'etag', 'checksum')
+
+def is_local(url: Union[str, Path]) -> bool:
+    """Tells whether a path or URL (gs://, memory://, file://...) is on the local filesystem."""
+    return fsspec.utils.get_protocol(str(url)) in LOCAL_PROTOCOLS
+
+def local_path(url: Union[str, Path]) -> Path:
+    """Returns the Path of a local path or file:// URL."""
+    url = str(url)
+    return Path(url_to_fs(url)[1]) if '://' in url else Path(url)
+
+def _modified_ns(info: Dict) -> int:
+    """Last modification time of an object, from the metadata of its filesystem (0 if unknown)."""
+    for key in ('mtime', 'updated', 'LastModified', 'created'):
+        value = info.get(key)
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if isinstance(value, datetime):
+            return int(value.timestamp() * 1e9)
+        if isinstance(value, (int, float)):
+            return int(value * 1e9)
+    return 0
+
+class StorageFile:
+    """
+    A file on an fsspec filesystem (gs://, memory://...), with the subset of
+    the Path API the pipeline uses on raw files: name, stat() and open().
+    Its content can be prefetched, after which open() reads from memory.
+    """
+
+    def __init__(self, fs: fsspec.AbstractFileSystem, path: str, info: Dict):
+        self.fs = fs
+        self.path = path
+        self.info = info
+        self.content = None
+
+    @property
+    def name(self) -> str:
+        return posixpath.basename(self.path.rstrip('/'))
+
+    def stat(self) -> SimpleNamespace:
+        return SimpleNamespace(st_size=self.info['size'], st_mtime_ns=_modified_ns(self.info))
+
+    def checksum(self) -> Optional[str]:
+        """Content checksum given by the listing of the object store, if any (e.g. 'md5Hash:...')."""
+        for key in CHECKSUM_KEYS:
+            if self.info.get(key):
+                return f"{key}:{self.info[key]}"
+        return None
+
+    def open(self, mode: str = 'rb', encoding: str = None) -> IO:
+        """Opens the file for reading, in binary ('rb') or text ('r') mode."""
+        if isinstance(self.content, Exception):
+            raise self.content
+        binary = io.BytesIO(self.content) if self.content is not None else self.fs.open(self.path, 'rb')
+        return binary if 'b' in mode else io.TextIOWrapper(binary, encoding=encoding)
+
+    def __lt__(self, other: "StorageFile") -> bool:
+        return self.path < other.path
+
+    def __str__(self) -> str:
+        return self.fs.unstrip_protocol(self.path)
+
+    def __repr__(self) -> str:
+        return f"StorageFile({str(self)!r})"
+
+def list_files(url: str) -> List[StorageFile]:
+    """Lists the files directly under a prefix in a single listing call, sorted by name."""
+    fs, root = url_to_fs(url)
+    try:
+        entries = fs.ls(root, detail=True)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Directory not found: {url}")
+    return sorted(StorageFile(fs, entry['name'], entry) for entry in entries if entry['type'] == 'file')
+
+def prefetch(files: List[StorageFile], concurrency: int = DEFAULT_PREFETCH_CONCURRENCY):
+    """
+    Downloads the content of the files in bulk, at most `concurrency` at a
+    time on asynchronous filesystems such as gcsfs. A file that can't be
+    fetched keeps its error, raised when it is opened.
+    """
+    if not files:
+        return
+    fs = files[0].fs
+    options = {'batch_size': concurrency} if getattr(fs, 'async_impl', False) else {}
+    contents = fs.cat([file.path for file in files], on_error='return', **options)
+    for file in files:
+        file.content = contents.get(file.path, FileNotFoundError(str(file)))
+    logging.info(f"Prefetched {len(files)} files from {fs.unstrip_protocol(posixpath.dirname(files[0].path))}")
+
+def open_url(url: Union[str, Path], mode: str = 'rb', **kwargs) -> fsspec.core.OpenFile:
+    """
+    Opens a local path or an fsspec URL. Writes to object storage are
+    streamed as parts of UPLOAD_BLOCK_SIZE (multipart/resumable uploads), and
+    the parent directories of local outputs are created.
+    """
+    if is_local(url):
+        kwargs.setdefault('auto_mkdir', 'w' in mode)
+    else:
+        kwargs.setdefault('block_size', UPLOAD_BLOCK_SIZE)
+    return fsspec.open(str(url), mode, **kwargs)
+
+def upload_file(source: Path, url: str):
+    """Copies a local file to a (remote) URL."""
+    fs, path = url_to_fs(url)
+    fs.put_file(str(source), path)
+
+def file_exists(url: str) -> bool:
+    """Tells whether a local path or fsspec URL points to an existing file."""
+    fs, path = url_to_fs(url)
+    return fs.isfile(path)
+
+def remove_file(url: str) -> bool:
+    """Removes a local path or fsspec URL, returning whether there was a file to remove."""
+    fs, path = url_to_fs(url)
+    try:
+        fs.rm_file(path)
+    except FileNotFoundError:
+        return False
+    return True
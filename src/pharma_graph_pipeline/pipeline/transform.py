@@ -1,69 +1,273 @@
 # src/pharma_graph_pipeline/pipeline/transform.py
 
 import pandas as pd
-from typing import Dict, List
+import numpy as np
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from concurrent.futures import Executor, ProcessPoolExecutor
 import logging
-import re
+from src.pharma_graph_pipeline.pipeline.matcher import DrugMatcher, FuzzyDrugMatcher, match_batch
+from src.pharma_graph_pipeline.pipeline.extract import read_synonyms
+from src.pharma_graph_pipeline.pipeline.memo import TitleMemo
+from src.pharma_graph_pipeline.pipeline.mentions import MentionTable
+from src.pharma_graph_pipeline.pipeline.metrics import RunMetrics
 
-def build_drug_graph(drugs_df: pd.DataFrame, publications_df: pd.DataFrame) -> Dict[str, List]:
+# Default number of titles sent to a worker at a time in parallel mode
+DEFAULT_SHARD_SIZE = 50_000
+
+# Sort order of the source types within a journal (others are left out)
+SOURCE_TYPE_ORDER = {'pubmed': 0, 'clinical_trial': 1}
+
+# Matching modes of the 'transform.matching' config section
+MATCHING_MODES = ('exact', 'fuzzy')
+
+# A matcher of exact drug names, or of synonyms and misspellings too
+Matcher = Union[DrugMatcher, FuzzyDrugMatcher]
+
+# The matcher of a worker process, set once by the pool initializer
+_worker_matcher: Optional[Matcher] = None
+
+def create_matcher(drugs_df: pd.DataFrame, matching: Optional[Dict] = None) -> Matcher:
+    """
+    Builds the matcher of the matching options (the 'transform.matching'
+    config section): exact drug names by default, or with mode 'fuzzy', the
+    synonyms of `synonyms_path` too and the names misspelled by up to
+    `max_distance` edits (in tokens of at least `min_fuzzy_length` characters).
+    """
+    matching = matching or {}
+    mode = matching.get('mode', 'exact')
+    if mode not in MATCHING_MODES:
+        raise ValueError(f"Unknown matching mode: {mode} (expected one of {MATCHING_MODES})")
+    if mode == 'exact':
+        return DrugMatcher.from_drugs_df(drugs_df)
+
+    synonyms_df = read_synonyms(matching['synonyms_path']) if matching.get('synonyms_path') else None
+    return FuzzyDrugMatcher.from_drugs_df(
+        drugs_df, synonyms_df, int(matching.get('max_distance', 1)), int(matching.get('min_fuzzy_length', 5))
+    )
+
+def _init_match_worker(matcher: Matcher):
+    global _worker_matcher
+    _worker_matcher = matcher
+
+def _match_shard(titles: List[str]) -> Tuple[List[List[int]], Dict[str, int]]:
+    # Also return the counters of this shard, which the parent adds to its own
+    counters_before = dict(_worker_matcher.counters)
+    shard_matches = match_batch(_worker_matcher, titles)
+    return shard_matches, {name: value - counters_before[name] for name, value in _worker_matcher.counters.items()}
+
+def create_match_executor(matcher: Matcher, workers: int) -> ProcessPoolExecutor:
+    """
+    Creates a process pool whose workers each receive the matcher once,
+    through the pool initializer, instead of with every shard.
+    """
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_match_worker, initargs=(matcher,))
+
+def match_titles(matcher: Matcher, titles: List[str], executor: Optional[Executor] = None,
+                 shard_size: int = DEFAULT_SHARD_SIZE) -> List[List]:
+    """
+    Matches every title, either serially or sharded across the executor's
+    workers. Shard results are merged back in shard order, so the output is
+    identical to the serial path.
+
+    Returns:
+        List[List]: The matches of each title (see the matcher's `match`).
+    """
+    if executor is None:
+        return match_batch(matcher, titles)
+
+    shards = [titles[start:start + shard_size] for start in range(0, len(titles), shard_size)]
+    all_matches = []
+    # map() yields the results in submission order, whatever the completion order
+    for shard_matches, shard_counters in executor.map(_match_shard, shards):
+        all_matches.extend(shard_matches)
+        matcher.merge_counters(shard_counters)
+    return all_matches
+
+def find_mentions(drugs_df: pd.DataFrame, publications_df: pd.DataFrame, matcher: Matcher = None,
+                  executor: Optional[Executor] = None, shard_size: int = DEFAULT_SHARD_SIZE,
+                  with_surrogate_key: bool = False, memo: Optional[TitleMemo] = None) -> MentionTable:
+    """
+    Finds all drug mentions across the given publications.
+
+    Args:
+        drugs_df (pd.DataFrame): The drugs table (atccode, drug).
+        publications_df (pd.DataFrame): Clean publications (whole or a batch).
+        matcher (Matcher): A matcher already built from drugs_df (exact by default).
+        executor (Executor): A pool from `create_match_executor` to match in parallel.
+        shard_size (int): Number of titles per parallel task.
+        with_surrogate_key (bool): Also record the publication's surrogate_key.
+        memo (TitleMemo): A memo of the matches, so only unseen titles are matched.
+
+    Returns:
+        MentionTable: One entry per (publication, drug) mention.
+    """
+    # Build the matching engine once, then scan every title a single time
+    if matcher is None:
+        matcher = DrugMatcher.from_drugs_df(drugs_df)
+    titles = publications_df['title'].tolist()
+    # The memo stores drug positions: fuzzy matches, which also carry their type and score, are not memoized
+    if memo is not None and isinstance(matcher, DrugMatcher):
+        all_matches = memo.match_titles(titles, drugs_df, lambda missing: match_titles(matcher, missing, executor, shard_size))
+    else:
+        all_matches = match_titles(matcher, titles, executor, shard_size)
+
+    return MentionTable.from_matches(drugs_df, publications_df, all_matches, with_surrogate_key)
+
+def _iter_sorted_groups(group_codes: np.ndarray, source_codes: np.ndarray,
+                        build_references: Callable[[np.ndarray], List[Dict]]) -> Iterator[Tuple[int, Dict]]:
+    """
+    Sorts the mentions once by (group, source_type) with a stable sort, so
+    each group (journal or drug), and each source type within it, is a
+    contiguous range that keeps the original mention order, then yields the
+    code and the references of each group in code order.
+    """
+    # lexsort is stable: the last key (the group) is the primary one
+    order = np.lexsort((source_codes, group_codes))
+    # Mentions without a group (code -1) sort first and are left out, like groupby does
+    order = order[group_codes[order] >= 0]
+    sorted_groups = group_codes[order]
+    sorted_sources = source_codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        # Boundaries of the pubmed (0) and clinical_trial (1) ranges of this group
+        pubmed_start, trials_start, trials_end = (
+            start + np.searchsorted(sorted_sources[start:end], [0, 1, 2])
+        ).tolist()
+        yield sorted_groups[start], {
+            "pubmed": build_references(order[pubmed_start:trials_start]),
+            "clinical_trials": build_references(order[trials_start:trials_end])
+        }
+
+def _mention_source_codes(mentions: MentionTable) -> np.ndarray:
+    """The SOURCE_TYPE_ORDER code of each mention (-1 for other source types)."""
+    # Source types are encoded once per publication, then indexed per mention
+    source_codes = mentions.publications['source_type'].astype(object).map(SOURCE_TYPE_ORDER).fillna(-1)
+    return source_codes.to_numpy(dtype=np.int64)[mentions.publication_index]
+
+def iter_journals(mentions: Union[MentionTable, List[Dict]]) -> Iterator[Dict]:
+    """
+    Groups mentions (a MentionTable, or mention records) by journal, yielding
+    the journals of the final JSON structure one at a time, in journal name
+    order. References are built straight from the mentions, without any
+    per-journal DataFrame.
+    """
+    if not len(mentions):
+        return
+
+    if isinstance(mentions, MentionTable):
+        journals = mentions.publications['journal'].astype(object).to_numpy()
+        journal_codes, journal_names = pd.factorize(journals, sort=True)
+        groups = _iter_sorted_groups(
+            journal_codes[mentions.publication_index], _mention_source_codes(mentions), mentions.reference_builder()
+        )
+    else:
+        # Every field of a mention record but the grouping keys goes into its reference
+        fields = [field for field in mentions[0] if field not in ('journal', 'source_type')]
+        journal_codes, journal_names = pd.factorize(
+            np.array([mention['journal'] for mention in mentions], dtype=object), sort=True
+        )
+        source_codes = np.array([SOURCE_TYPE_ORDER.get(mention['source_type'], -1) for mention in mentions])
+        groups = _iter_sorted_groups(
+            journal_codes, source_codes,
+            lambda positions: [{field: mentions[i][field] for field in fields} for i in positions.tolist()]
+        )
+
+    for journal_code, journal_references in groups:
+        # Build the final object for this journal
+        yield {
+            "title": journal_names[journal_code],
+            "references": journal_references
+        }
+
+def iter_drugs(mentions: MentionTable) -> Iterator[Dict]:
+    """
+    Drug-centric counterpart of `iter_journals`: yields each mentioned drug,
+    in drug name order, with the publications that mention it and their journal.
+    """
+    if not len(mentions):
+        return
+
+    drug_codes, drug_names = pd.factorize(mentions.drugs['drug'].astype(object).to_numpy(), sort=True)
+    drug_ids = dict(zip(drug_codes.tolist(), mentions.drugs['atccode'].tolist()))
+    groups = _iter_sorted_groups(
+        drug_codes[mentions.drug_index], _mention_source_codes(mentions), mentions.reference_builder('drugs')
+    )
+    for drug_code, drug_references in groups:
+        yield {
+            "atccode": drug_ids[drug_code],
+            "drug": drug_names[drug_code],
+            "references": drug_references
+        }
+
+def group_mentions(all_mentions: Union[MentionTable, List[Dict]]) -> Dict[str, List]:
+    """
+    Groups mentions (a MentionTable, or mention records) by journal into the final JSON structure.
+    """
+    if not len(all_mentions):
+        logging.warning("No drug mentions were found in any publication.")
+    return {"journals": list(iter_journals(all_mentions))}
+
+def find_all_mentions(drugs_df: pd.DataFrame, publications_df: pd.DataFrame, workers: int = 1,
+                      shard_size: int = DEFAULT_SHARD_SIZE, metrics: Optional[RunMetrics] = None,
+                      memo: Optional[TitleMemo] = None, matching: Optional[Dict] = None) -> MentionTable:
+    """
+    Finds all drug mentions, sharding the matching across `workers` processes
+    when `workers` > 1. The matcher counters are added to `metrics`, if given.
+    With a `memo`, only the titles it has not seen yet are matched.
+    `matching` holds the options of `create_matcher`.
+    """
+    matcher = create_matcher(drugs_df, matching)
+    if workers > 1:
+        logging.info(f"Matching in parallel ({workers} workers, shards of {shard_size} titles)...")
+        with create_match_executor(matcher, workers) as executor:
+            all_mentions = find_mentions(drugs_df, publications_df, matcher, executor, shard_size, memo=memo)
+    else:
+        all_mentions = find_mentions(drugs_df, publications_df, matcher, memo=memo)
+
+    if metrics is not None:
+        metrics.add_counters(matcher.counters)
+    return all_mentions
+
+def build_drug_graph(drugs_df: pd.DataFrame, publications_df: pd.DataFrame, workers: int = 1,
+                     shard_size: int = DEFAULT_SHARD_SIZE, metrics: Optional[RunMetrics] = None) -> Dict[str, List]:
     """
     Builds a journal-centric graph. The output is a dictionary containing a list of journals.
     Each journal contains a breakdown of its publications (PubMed, Clinical Trials)
     that mention any of the specified drugs.
+    With `workers` > 1, the matching is sharded across that many processes.
+    The matcher counters are added to `metrics`, if given.
     """
     logging.info("🚀 Starting journal-centric graph transformation...")
 
     # --- Step 1: Find all drug mentions across all publications ---
-    all_mentions = []
-    # Ensure drug names are lowercase for matching
-    drugs_df['drug_lower'] = drugs_df['drug'].str.lower()
-
-    for _, pub_row in publications_df.iterrows():
-        pub_title_lower = pub_row['title'].lower()
-        
-        # For each publication, check against every drug
-        for _, drug_row in drugs_df.iterrows():
-            # Use regex to match whole words to avoid partial matches (e.g., 'on' in 'betamethasone')
-            if re.search(fr'\b{re.escape(drug_row["drug_lower"])}\b', pub_title_lower):
-                # If a drug is mentioned, create a detailed record of the mention
-                mention_record = {
-                    'journal': pub_row['journal'],
-                    'source_type': pub_row['source_type'],
-                    'article_id': pub_row['id'],
-                    'article_title': pub_row['title'],
-                    'mention_date': pub_row['date'],
-                    'mentioned_drug_id': drug_row['atccode'],
-                    'mentioned_drug_name': drug_row['drug']
-                }
-                all_mentions.append(mention_record)
-
-    if not all_mentions:
-        logging.warning("No drug mentions were found in any publication.")
-        return {"journals": []}
-
-    # Convert the list of mentions into a DataFrame for easy grouping
-    mentions_df = pd.DataFrame(all_mentions)
+    all_mentions = find_all_mentions(drugs_df, publications_df, workers, shard_size, metrics)
 
     # --- Step 2: Group the mentions to build the final JSON structure ---
-    final_journal_list = []
-    # Group all mentions by the journal they appeared in
-    for journal_name, journal_group in mentions_df.groupby('journal'):
-        
-        # Separate mentions into pubmed and clinical trials
-        pubmed_mentions = journal_group[journal_group['source_type'] == 'pubmed']
-        trials_mentions = journal_group[journal_group['source_type'] == 'clinical_trial']
-
-        # Format the references for this journal
-        journal_references = {
-            "pubmed": pubmed_mentions.drop(columns=['journal', 'source_type']).to_dict('records'),
-            "clinical_trials": trials_mentions.drop(columns=['journal', 'source_type']).to_dict('records')
-        }
-        
-        # Build the final object for this journal
-        final_journal_list.append({
-            "title": journal_name,
-            "references": journal_references
-        })
-        
+    drug_graph = group_mentions(all_mentions)
+
     logging.info("✅ Journal-centric graph transformation complete.")
-    return {"journals": final_journal_list}
\ No newline at end of file
+    return drug_graph
+
+def find_mentions_streaming(drugs_df: pd.DataFrame, publication_batches: Iterable[pd.DataFrame], workers: int = 1,
+                            shard_size: int = DEFAULT_SHARD_SIZE, metrics: Optional[RunMetrics] = None,
+                            memo: Optional[TitleMemo] = None, matching: Optional[Dict] = None) -> MentionTable:
+    """
+    Finds the mentions of clean publication batches, consumed one at a time,
+    so only the mentioning publications are kept in memory. The worker pool,
+    if any, is shared by all batches. `matching` holds the options of `create_matcher`.
+    """
+    matcher = create_matcher(drugs_df, matching)
+    executor = create_match_executor(matcher, workers) if workers > 1 else None
+    tables = []
+    try:
+        for publications_df in publication_batches:
+            tables.append(find_mentions(drugs_df, publications_df, matcher, executor, shard_size, memo=memo))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if metrics is not None:
+        metrics.add_counters(matcher.counters)
+    return MentionTable.concat(tables, drugs_df)
@@ -4,12 +4,23 @@ import json
 from pathlib import Path
 import pytest
 import traceback
+import subprocess
+import sys
+import pandas as pd
 
 # Import each pipeline function individually for step-by-step testing
 from src.pharma_graph_pipeline.pipeline.extract import load_raw_data
 from src.pharma_graph_pipeline.pipeline.preprocess import preprocess_data
 from src.pharma_graph_pipeline.pipeline.transform import build_drug_graph
 from src.pharma_graph_pipeline.pipeline.load import save_to_json
+from src.pharma_graph_pipeline.pipeline.transform import find_mentions, iter_journals
+from src.pharma_graph_pipeline.pipeline.mentions import MentionTable
+from src.pharma_graph_pipeline.pipeline.preprocess import preprocess_publications
+from src.pharma_graph_pipeline.pipeline.metrics import RunMetrics
+from src.pharma_graph_pipeline.main import (
+    run_streaming, run_graph_pipeline, run_pipeline, resolve_config_paths, get_graph_path, save_outputs
+)
+from src.pharma_graph_pipeline.adhoc.analysis import find_top_journals, find_top_journals_in_graph
 
 def test_full_pipeline_run(tmp_path):
     """
@@ -65,4 +76,180 @@ def test_full_pipeline_run(tmp_path):
     with open(output_file_path, 'r') as f:
         actual_json = json.load(f)
 
-    assert actual_json == expected_json
\ No newline at end of file
+    assert actual_json == expected_json
+
+def test_streaming_pipeline_matches_expected_output():
+    """
+    Runs the streaming mode with tiny batches and checks it builds the same graph.
+    """
+    project_root = Path(__file__).parent.parent.parent
+    test_fixtures_path = project_root / "tests" / "fixtures"
+    test_config = {
+        'input_paths': {
+            'raw_data_dir': str(test_fixtures_path / "sample_data")
+        }
+    }
+
+    drug_graph = run_streaming(test_config, batch_size=1)
+
+    with open(test_fixtures_path / "expected_output.json", 'r') as f:
+        expected_json = json.load(f)
+
+    assert drug_graph == expected_json
+
+def test_library_entry_point_and_config_path(tmp_path):
+    """
+    The library entry point returns the graph and the run report, and
+    `run_pipeline` reads the config from `config_path`.
+    """
+    project_root = Path(__file__).parent.parent.parent
+    test_fixtures_path = project_root / "tests" / "fixtures"
+    test_config = {
+        'input_paths': {'raw_data_dir': str(test_fixtures_path / "sample_data")},
+        'output_path': {'drug_graph': str(tmp_path / "output.json")},
+        'cache': {'enabled': False},
+    }
+    with open(test_fixtures_path / "expected_output.json", 'r') as f:
+        expected_json = json.load(f)
+
+    drug_graph, report = run_graph_pipeline(test_config)
+    assert drug_graph == expected_json
+    assert report['stages']['load']['rows_out'] == len(expected_json['journals'])
+    assert find_top_journals_in_graph(drug_graph) == find_top_journals(str(tmp_path / "output.json"))
+
+    (tmp_path / "output.json").unlink()
+    config_path = tmp_path / "temp_config.yaml"
+    with open(config_path, 'w') as f:
+        yaml.dump(test_config, f)
+    run_pipeline(str(config_path))
+    with open(tmp_path / "output.json", 'r') as f:
+        assert json.load(f) == expected_json
+
+def test_run_without_mentions_writes_empty_outputs(tmp_path):
+    """A run where no title mentions a drug writes an empty graph and an empty partition manifest."""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    (raw_dir / "drugs.csv").write_text("atccode,drug\nDRUG1,ASPIRIN\n")
+    (raw_dir / "pubmed.csv").write_text("id,title,date,journal\n1,A study of nothing,2022-01-15,The Lancet\n")
+    test_config = {
+        'input_paths': {'raw_data_dir': str(raw_dir)},
+        'output_path': {
+            'drug_graph': str(tmp_path / "output.json"),
+            'graph_partitions': str(tmp_path / "partitions"),
+        },
+        'cache': {'enabled': False},
+    }
+
+    drug_graph, report = run_graph_pipeline(test_config)
+    assert drug_graph == {'journals': []}
+    assert report['stages']['load']['partitions'] == {'partitions': 0, 'written': 0, 'removed': 0}
+    with open(tmp_path / "partitions" / "manifest.json", 'r') as f:
+        assert json.load(f)['partitions'] == []
+
+def test_config_paths_are_resolved_against_a_project_dir():
+    """Relative local paths move under the project directory; URLs and absolute paths don't."""
+    config = {
+        'input_paths': {'raw_data_dir': 'data/raw'},
+        'output_path': {'drug_graph': 'outputs/drug_graph.json', 'graph_store': 'gs://bucket/graph.sqlite'},
+        'cache': {'enabled': True, 'dir': '/tmp/cache'},
+        'memo': {'enabled': False},
+        'transform': {'workers': 2},
+    }
+    resolved = resolve_config_paths(config, '/opt/project')
+    assert resolved['input_paths'] == {'raw_data_dir': '/opt/project/data/raw'}
+    assert resolved['output_path'] == {
+        'drug_graph': '/opt/project/outputs/drug_graph.json', 'graph_store': 'gs://bucket/graph.sqlite'
+    }
+    assert resolved['cache'] == config['cache'] and resolved['transform'] == config['transform']
+    # The config itself is left as it is
+    assert config['input_paths'] == {'raw_data_dir': 'data/raw'}
+
+def test_compressed_graph_is_read_back_by_the_analysis(tmp_path):
+    """With `load.compression`, the graph gets the extension the analysis reads it back from."""
+    project_root = Path(__file__).parent.parent.parent
+    test_config = {
+        'input_paths': {'raw_data_dir': str(project_root / "tests" / "fixtures" / "sample_data")},
+        'output_path': {'drug_graph': str(tmp_path / "output.json")},
+        'load': {'compact': True, 'compression': 'gzip'},
+        'cache': {'enabled': False},
+    }
+    drug_graph, report = run_graph_pipeline(test_config)
+
+    graph_path = get_graph_path(test_config)
+    assert graph_path == str(tmp_path / "output.json.gz") == report['stages']['load']['path']
+    assert not (tmp_path / "output.json").exists()
+    assert find_top_journals(graph_path) == find_top_journals_in_graph(drug_graph)
+
+def test_saved_views_share_the_mentions(tmp_path):
+    """The drug-centric graph and the edge list written by the load step hold the mentions of the journal graph."""
+    drugs = pd.DataFrame({"atccode": ["B02", "A01"], "drug": ["DRUG-Y", "DRUG-X"]})
+    publications = preprocess_publications(pd.DataFrame({
+        'id': ["1", "2", "NCT3"],
+        'title': ["about drug-x", "drug-y and drug-x", "drug-y trial"],
+        'date': ["2020-01-01", "2020-01-02", "2020-01-03"],
+        'journal': ["Journal A", "Journal B", "Journal A"],
+        'source_type': ["pubmed", "pubmed", "clinical_trial"]
+    }))
+    table = find_mentions(drugs, publications)
+    config = {'output_path': {
+        'drug_graph': str(tmp_path / "graph.json"),
+        'drug_centric_graph': str(tmp_path / "drugs.json"),
+        'edge_list': str(tmp_path / "edges.csv"),
+    }}
+    metrics = RunMetrics()
+    save_outputs(table, config, metrics)
+
+    with open(tmp_path / "graph.json", 'r') as f:
+        assert json.load(f) == {'journals': list(iter_journals(table))}
+    with open(tmp_path / "drugs.json", 'r') as f:
+        assert json.load(f) == {'drugs': [
+        {
+            "atccode": "A01", "drug": "DRUG-X",
+            "references": {
+                "pubmed": [
+                    {"article_id": "1", "article_title": "about drug-x", "mention_date": "2020-01-01", "journal": "journal a"},
+                    {"article_id": "2", "article_title": "drug-y and drug-x", "mention_date": "2020-01-02", "journal": "journal b"},
+                ],
+                "clinical_trials": []
+            }
+        },
+        {
+            "atccode": "B02", "drug": "DRUG-Y",
+            "references": {
+                "pubmed": [
+                    {"article_id": "2", "article_title": "drug-y and drug-x", "mention_date": "2020-01-02", "journal": "journal b"},
+                ],
+                "clinical_trials": [
+                    {"article_id": "NCT3", "article_title": "drug-y trial", "mention_date": "2020-01-03", "journal": "journal a"},
+                ]
+            }
+        },
+    ]}
+    edges = pd.read_csv(tmp_path / "edges.csv", dtype=str)
+    assert len(edges) == len(table) == 4
+    assert edges.to_dict('records') == [
+        {key: str(record[key]) for key in edges.columns} for record in table.to_records()
+    ]
+    assert metrics.stages['load']['views'] == {'journals': 2, 'drugs': 2, 'edges': 4}
+    # Mention records rebuild the same table
+    assert MentionTable.from_records(table.to_records()).to_records() == table.to_records()
+
+def test_pipeline_and_analysis_command(tmp_path):
+    """The command of the DAG task runs the pipeline and the analysis, and prints the summary last."""
+    project_root = Path(__file__).parent.parent.parent
+    test_fixtures_path = project_root / "tests" / "fixtures"
+    config_path = tmp_path / "config.yaml"
+    with open(config_path, 'w') as f:
+        yaml.dump({
+            'input_paths': {'raw_data_dir': str(test_fixtures_path / "sample_data")},
+            'output_path': {'drug_graph': str(tmp_path / "output.json")},
+            'cache': {'enabled': False},
+        }, f)
+
+    completed = subprocess.run(
+        [sys.executable, "-m", "src.pharma_graph_pipeline.main", "--config", str(config_path), "--with-analysis"],
+        cwd=project_root, capture_output=True, text=True, check=True
+    )
+    summary = json.loads(completed.stdout.splitlines()[-1])
+    assert summary['analysis'] == find_top_journals(str(tmp_path / "output.json"))
+    assert set(summary) == {'analysis', 'stages', 'counters'}
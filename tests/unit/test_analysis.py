@@ -0,0 +1,37 @@
+# tests/unit/test_analysis.py
+import json
+from pathlib import Path
+from src.pharma_graph_pipeline.pipeline.load import save_to_json, save_to_sqlite
+from src.pharma_graph_pipeline.adhoc.analysis import (
+    find_top_journals, find_top_journals_in_store, drugs_per_journal, journals_per_drug, mentions_between
+)
+
+EXPECTED_OUTPUT = Path(__file__).parent.parent / "fixtures" / "expected_output.json"
+
+def _write_outputs(tmp_path):
+    with open(EXPECTED_OUTPUT, 'r') as f:
+        drug_graph = json.load(f)
+    graph_path, store_path = tmp_path / "graph.json", tmp_path / "graph.sqlite"
+    save_to_json(drug_graph, str(graph_path))
+    save_to_sqlite(drug_graph, str(store_path))
+    return str(graph_path), str(store_path)
+
+def test_store_answers_like_the_json_scan(tmp_path):
+    """The indexed store gives the same top journals as the full JSON scan."""
+    graph_path, store_path = _write_outputs(tmp_path)
+
+    assert find_top_journals_in_store(store_path) == find_top_journals(graph_path)
+    assert drugs_per_journal(store_path) == {"nejm": 2, "the lancet": 2}
+
+def test_store_queries(tmp_path):
+    """Journals per drug and mentions by date range go through the indexes."""
+    _, store_path = _write_outputs(tmp_path)
+
+    assert journals_per_drug(store_path, "DRUG1") == ["nejm", "the lancet"]
+    assert journals_per_drug(store_path, "UNKNOWN") == []
+
+    mentions = mentions_between(store_path, "2022-02-01", "2022-04-01")
+    assert [(m['journal'], m['mention_date']) for m in mentions] == [("the lancet", "2022-02-10"), ("nejm", "2022-03-20")]
+
+def test_missing_store(tmp_path):
+    assert find_top_journals_in_store(str(tmp_path / "missing.sqlite")).startswith("Error reading graph store")
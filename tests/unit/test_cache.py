@@ -0,0 +1,89 @@
+# tests/unit/test_cache.py
+import json
+import os
+from pathlib import Path
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+pytest.importorskip("pyarrow")
+
+from src.pharma_graph_pipeline.pipeline.cache import StageCache
+from src.pharma_graph_pipeline.main import run_batch
+
+SAMPLE_DATA = Path(__file__).parent.parent / "fixtures" / "sample_data"
+EXPECTED_OUTPUT = Path(__file__).parent.parent / "fixtures" / "expected_output.json"
+
+def test_stage_cache_round_trip(tmp_path):
+    cache = StageCache(tmp_path, max_size_bytes=10**9)
+    tables = {'publications': pd.DataFrame({'id': ['1', 'NCT123'], 'title': ['a', 'b']})}
+    key = cache.stage_key('preprocess', {'inputs': [1, 2]})
+
+    assert cache.load('preprocess', key) is None
+    cache.save('preprocess', key, tables)
+    assert_frame_equal(cache.load('preprocess', key)['publications'], tables['publications'])
+    assert cache.stage_key('preprocess', {'inputs': [1, 3]}) != key
+
+def test_stage_cache_stores_mixed_columns_as_strings(tmp_path):
+    cache = StageCache(tmp_path, max_size_bytes=10**9)
+    cache.save('raw', 'key', {'publications': pd.DataFrame({'id': [9, "11", "", None], 'title': ["a", None, "b", "c"]})})
+    assert cache.load('raw', 'key')['publications'].to_dict('list') == \
+        {'id': ["9", "11", "", None], 'title': ["a", None, "b", "c"]}
+
+def test_stage_cache_evicts_least_recently_used_entries(tmp_path):
+    cache = StageCache(tmp_path, max_size_bytes=10**9)
+    table = {'t': pd.DataFrame({'x': range(1000)})}
+    for key in ['a', 'b', 'c']:
+        cache.save('stage', key, table)
+        os.utime(tmp_path / key, ns=(0, {'a': 1, 'b': 3, 'c': 2}[key] * 10**9))
+    entry_size = sum(path.stat().st_size for path in (tmp_path / 'a').iterdir())
+
+    # 'a' is the least recently used entry, then 'c'
+    cache.max_size_bytes = 2 * entry_size
+    cache.save('stage', 'd', table)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['b', 'd']
+
+def test_run_batch_reuses_cached_stages(tmp_path, caplog):
+    config = {
+        'input_paths': {'raw_data_dir': str(SAMPLE_DATA)},
+        'cache': {'enabled': True, 'dir': str(tmp_path), 'max_size_mb': 10}
+    }
+    with open(EXPECTED_OUTPUT, 'r') as f:
+        expected_json = json.load(f)
+
+    assert run_batch(config, StageCache.from_config(config)) == expected_json
+    caplog.clear()
+    with caplog.at_level('INFO'):
+        assert run_batch(config, StageCache.from_config(config)) == expected_json
+    assert "Cache hit for stage 'mentions'" in caplog.text
+
+    # --no-cache
+    assert not StageCache.from_config(config, enabled=False).enabled
+
+def test_stage_keys_only_depend_on_output_options(tmp_path, caplog):
+    config = {
+        'input_paths': {'raw_data_dir': str(SAMPLE_DATA)},
+        'cache': {'enabled': True, 'dir': str(tmp_path), 'max_size_mb': 10},
+        'transform': {'workers': 1},
+    }
+    with open(EXPECTED_OUTPUT, 'r') as f:
+        expected_json = json.load(f)
+    with caplog.at_level('INFO'):
+        assert run_batch(config, StageCache.from_config(config)) == expected_json
+    # The raw tables (ints and strings in the ids) are cached too
+    assert "Stage 'raw' cached" in caplog.text
+
+    # Another worker count keeps every entry
+    config['transform']['workers'] = 2
+    caplog.clear()
+    with caplog.at_level('INFO'):
+        assert run_batch(config, StageCache.from_config(config)) == expected_json
+    assert "Cache hit for stage 'mentions'" in caplog.text
+
+    # The prefilter changes the preprocessed publications, not the raw ones
+    config['extract'] = {'prefilter': True}
+    caplog.clear()
+    with caplog.at_level('INFO'):
+        assert run_batch(config, StageCache.from_config(config)) == expected_json
+    assert "Cache miss for stage 'preprocess'" in caplog.text and "Cache hit for stage 'raw'" in caplog.text
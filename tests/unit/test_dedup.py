@@ -0,0 +1,89 @@
+# tests/unit/test_dedup.py
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+from src.pharma_graph_pipeline.pipeline import dedup
+from src.pharma_graph_pipeline.pipeline.dedup import (
+    drop_duplicate_publications, drop_seen_publications, create_seen_set, get_dedup_options
+)
+from src.pharma_graph_pipeline.pipeline.cache import StageCache
+from src.pharma_graph_pipeline.pipeline.metrics import RunMetrics
+from src.pharma_graph_pipeline.main import run_batch, run_streaming, run_incremental
+
+SAMPLE_DATA = Path(__file__).parent.parent / "fixtures" / "sample_data"
+EXPECTED_OUTPUT = Path(__file__).parent.parent / "fixtures" / "expected_output.json"
+
+def publications(keys):
+    return pd.DataFrame({'id': [str(i) for i in range(len(keys))], 'surrogate_key': keys})
+
+@pytest.mark.parametrize("keep, expected_ids", [('first', ['0', '1', '3']), ('last', ['2', '3', '4'])])
+def test_drop_duplicate_publications(keep, expected_ids):
+    publications_df = publications(['a', 'b', 'a', 'c', 'b'])
+    assert drop_duplicate_publications(publications_df, keep)['id'].tolist() == expected_ids
+
+@pytest.mark.parametrize("seen_set", ['memory', 'disk', 'bloom'])
+def test_seen_sets_drop_the_keys_of_previous_batches(seen_set, tmp_path):
+    options = get_dedup_options({'dedup': {'enabled': True, 'seen_set': seen_set, 'spill_dir': str(tmp_path),
+                                           'expected_items': 1000}})
+    seen = create_seen_set(options)
+    batches = [['a', 'b', 'a'], ['c', 'b'], ['a', 'd', 'c']]
+    kept = [drop_seen_publications(publications(keys), seen)['surrogate_key'].tolist() for keys in batches]
+    seen.close()
+
+    assert kept == [['a', 'b'], ['c'], ['d']]
+    # The disk set removes its scratch file
+    assert list(tmp_path.iterdir()) == []
+
+@pytest.mark.parametrize("seen_set", ['memory', 'disk'])
+def test_exact_seen_sets_store_the_keys_not_their_hashes(seen_set, tmp_path, monkeypatch):
+    """Keys whose 64-bit hashes collide are still told apart."""
+    monkeypatch.setattr(dedup, 'key_hashes', lambda keys, hash_key=None: np.zeros(len(keys), dtype=np.int64))
+    seen = create_seen_set(get_dedup_options({'dedup': {'enabled': True, 'seen_set': seen_set, 'spill_dir': str(tmp_path)}}))
+    assert seen.add(pd.Series(['a', 'b'])).tolist() == [True, True]
+    assert seen.add(pd.Series(['c', 'a'])).tolist() == [True, False]
+    seen.close()
+
+def test_bloom_seen_set_keeps_new_keys():
+    seen = create_seen_set(get_dedup_options({'dedup': {'enabled': True, 'seen_set': 'bloom',
+                                                        'expected_items': 20000, 'false_positive_rate': 0.001}}))
+    keys = pd.Series([f"key-{i}" for i in range(20000)])
+    assert seen.add(keys[:10000]).all()
+    # A few new keys may be false positives, never a seen key
+    assert (~seen.add(keys)[:10000]).all()
+    assert seen.add(pd.Series([f"other-{i}" for i in range(10000)])).mean() > 0.99
+
+def test_streaming_runs_reject_the_last_policy():
+    config = {'input_paths': {'raw_data_dir': str(SAMPLE_DATA)}, 'dedup': {'enabled': True, 'keep': 'last'}}
+    with pytest.raises(ValueError, match="only keep the 'first' occurrence"):
+        run_streaming(config, batch_size=2)
+
+def test_unknown_dedup_policy():
+    with pytest.raises(ValueError, match="Unknown dedup policy"):
+        get_dedup_options({'dedup': {'enabled': True, 'keep': 'newest'}})
+    assert get_dedup_options({}) is None
+
+def test_duplicate_sources_are_matched_once(tmp_path):
+    """A source read twice gives the same graph as when it is read once, in every run mode."""
+    with open(EXPECTED_OUTPUT, 'r') as f:
+        expected_json = json.load(f)
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    for path in SAMPLE_DATA.iterdir():
+        (raw_dir / path.name).write_bytes(path.read_bytes())
+    (raw_dir / "pubmed_copy.csv").write_bytes((SAMPLE_DATA / "pubmed.csv").read_bytes())
+    config = {
+        'input_paths': {'raw_data_dir': str(raw_dir)},
+        'dedup': {'enabled': True},
+        'incremental': {'state_dir': str(tmp_path / "state")},
+    }
+    metrics = RunMetrics()
+
+    assert run_batch(config, StageCache(str(tmp_path / "cache"), 0, enabled=False), metrics) == expected_json
+    assert metrics.counters['dedup_duplicates'] == len(pd.read_csv(SAMPLE_DATA / "pubmed.csv"))
+    assert run_streaming(config, batch_size=2) == expected_json
+    assert run_incremental(config) == expected_json
+    # Without deduplication, the copy doubles the pubmed mentions
+    config['dedup']['enabled'] = False
+    assert run_batch(config, StageCache(str(tmp_path / "cache"), 0, enabled=False)) != expected_json
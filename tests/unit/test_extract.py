@@ -0,0 +1,54 @@
+# tests/unit/test_extract.py
+import json
+import shutil
+from io import StringIO
+from pathlib import Path
+import pandas as pd
+import pytest
+from src.pharma_graph_pipeline.pipeline.extract import iter_json_array, iter_raw_batches, load_raw_data
+
+SAMPLE_DATA = Path(__file__).parent.parent / "fixtures" / "sample_data"
+
+def test_iter_json_array_tolerates_trailing_comma():
+    content = '\t[\n  {"id": 1, "title": "a, ]"},\n  {"id": "2", "tags": [1, 2]},\n]\n'
+    records = list(iter_json_array(StringIO(content)))
+    assert records == [{"id": 1, "title": "a, ]"}, {"id": "2", "tags": [1, 2]}]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1024])
+def test_iter_json_array_across_chunk_boundaries(chunk_size):
+    expected = [{"id": 123456789, "value": 3.25, "ok": True, "none": None}, 42, "text", []]
+    content = json.dumps(expected, indent=2)
+    assert list(iter_json_array(StringIO(content), chunk_size=chunk_size)) == expected
+    assert list(iter_json_array(StringIO("[ ]"), chunk_size=chunk_size)) == []
+
+def test_iter_json_array_rejects_malformed_content():
+    with pytest.raises(ValueError):
+        list(iter_json_array(StringIO('{"id": 1}')))
+    with pytest.raises(ValueError):
+        list(iter_json_array(StringIO('[{"id": 1} {"id": 2}]')))
+
+def test_iter_raw_batches_yields_fixed_size_batches(tmp_path):
+    (tmp_path / "pubmed.csv").write_text("id,title,date,journal\n1,a,2020-01-01,j\n2,b,2020-01-02,j\n3,c,2020-01-03,j\n")
+    (tmp_path / "pubmed.json").write_text('[{"id": 4, "title": "d", "date": "2020-01-04", "journal": "j"},]')
+    (tmp_path / "drugs.csv").write_text("atccode,drug\nA01,ASPIRIN\n")
+    config = {'input_paths': {'raw_data_dir': str(tmp_path)}}
+
+    batches = list(iter_raw_batches(config, 'publications', batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 1, 1]
+    assert all((batch['source_type'] == 'pubmed').all() for batch in batches)
+    assert [len(batch) for batch in iter_raw_batches(config, 'drugs', batch_size=None)] == [1]
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_load_raw_data_concurrent_read_matches_serial(tmp_path, executor):
+    """Concurrent reads give the serial result, in order, and still isolate broken files."""
+    shutil.copytree(SAMPLE_DATA, tmp_path / "raw")
+    (tmp_path / "raw" / "broken_pubmed.json").write_text("[{]")
+    serial_config = {'input_paths': {'raw_data_dir': str(tmp_path / "raw")}}
+    parallel_config = {**serial_config, 'extract': {'read_workers': 3, 'read_executor': executor}}
+
+    serial_data = load_raw_data(serial_config)
+    parallel_data = load_raw_data(parallel_config)
+
+    for kind in ('drugs', 'publications'):
+        pd.testing.assert_frame_equal(parallel_data[kind], serial_data[kind])
@@ -0,0 +1,89 @@
+# tests/unit/test_graph_reader.py
+import json
+from io import StringIO
+from pathlib import Path
+import pytest
+from src.pharma_graph_pipeline.pipeline.extract import JsonStream
+from src.pharma_graph_pipeline.pipeline.load import save_to_json
+from src.pharma_graph_pipeline.pipeline.load import save_partitioned_graph
+from src.pharma_graph_pipeline.pipeline.mentions import MentionTable
+from src.pharma_graph_pipeline.adhoc.graph_reader import (
+    iter_graph_references, iter_graph_journals, iter_partitioned_references, select_partitions
+)
+from src.pharma_graph_pipeline.adhoc.analysis import (
+    find_top_journals, find_top_journals_in_graph, find_top_journals_in_partitions
+)
+
+EXPECTED_OUTPUT = Path(__file__).parent.parent / "fixtures" / "expected_output.json"
+
+@pytest.fixture
+def drug_graph():
+    with open(EXPECTED_OUTPUT, 'r') as f:
+        return json.load(f)
+
+@pytest.mark.parametrize("compact, compression", [(False, None), (True, 'gzip')])
+def test_streamed_journals_match_the_graph(drug_graph, tmp_path, compact, compression):
+    graph_path = str(tmp_path / ("graph.json.gz" if compression else "graph.json"))
+    save_to_json(drug_graph, graph_path, compact=compact, compression=compression)
+
+    assert list(iter_graph_journals(graph_path)) == drug_graph['journals']
+    assert find_top_journals(graph_path) == find_top_journals_in_graph(drug_graph)
+
+def test_reference_filters(drug_graph, tmp_path):
+    graph_path = str(tmp_path / "graph.json")
+    save_to_json(drug_graph, graph_path)
+
+    def select(**filters):
+        return [(r['journal'], r['source_type'], r['mention_date']) for r in iter_graph_references(graph_path, **filters)]
+
+    assert select(journal="NEJM") == [("nejm", "pubmed", "2022-03-20"), ("nejm", "clinical_trial", "2022-05-10")]
+    assert select(drug="paracetamol", source_type="clinical_trial") == [("nejm", "clinical_trial", "2022-05-10")]
+    assert select(start_date="2022-02-01", end_date="2022-04-01") == \
+        [("nejm", "pubmed", "2022-03-20"), ("the lancet", "pubmed", "2022-02-10")]
+    assert select(journal="unknown") == []
+    # Journals without any reference left are skipped
+    assert [journal['title'] for journal in iter_graph_journals(graph_path, source_type="clinical_trial")] == ["nejm"]
+
+def test_references_before_the_title(tmp_path):
+    reference = {"article_id": "1", "mention_date": "2020-01-01", "mentioned_drug_name": "ASPIRIN"}
+    graph_path = tmp_path / "graph.json"
+    graph_path.write_text(json.dumps(
+        {"journals": [{"references": {"pubmed": [reference], "clinical_trials": []}, "title": "bmj"}]}
+    ))
+    assert list(iter_graph_references(str(graph_path))) == [{"journal": "bmj", "source_type": "pubmed", **reference}]
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7])
+def test_json_stream_walks_nested_values(chunk_size):
+    stream = JsonStream(StringIO('{"a": [1, {"b": [2, 3]}, ], "c": "skip", "d": 4.5}'), chunk_size=chunk_size)
+    seen = []
+    for key in stream.iter_keys():
+        if key == 'a':
+            for _ in stream.iter_items():
+                seen.append(stream.read_value())
+        elif key == 'c':
+            stream.skip_value()
+        else:
+            seen.append((key, stream.read_value()))
+    assert seen == [1, {"b": [2, 3]}, ("d", 4.5)]
+
+def test_partitions_are_pruned_by_date(drug_graph, tmp_path):
+    graph_path = str(tmp_path / "graph.json")
+    save_to_json(drug_graph, graph_path)
+    records = [{'journal': r.pop('journal'), 'source_type': r.pop('source_type'), **r}
+               for r in iter_graph_references(graph_path)]
+    partition_dir = str(tmp_path / "partitions")
+    save_partitioned_graph(MentionTable.from_records(records), partition_dir, 'month')
+
+    def select(**filters):
+        return sorted(tuple(r.values()) for r in iter_partitioned_references(partition_dir, **filters))
+
+    def expected(**filters):
+        return sorted(tuple(r.values()) for r in iter_graph_references(graph_path, **filters))
+
+    assert select() == expected()
+    assert select(start_date="2022-02-01", end_date="2022-04-01", journal="nejm") == \
+        expected(start_date="2022-02-01", end_date="2022-04-01", journal="nejm")
+    manifest = json.loads((tmp_path / "partitions" / "manifest.json").read_text())
+    assert [p['partition'] for p in select_partitions(manifest, "2022-02-11", "2022-04-01")] == ["2022-03"]
+    assert find_top_journals_in_partitions(partition_dir) == find_top_journals(graph_path)
+    assert "Error reading JSON file" in find_top_journals_in_partitions(str(tmp_path / "missing"))
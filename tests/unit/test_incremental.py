@@ -0,0 +1,78 @@
+# tests/unit/test_incremental.py
+import os
+import shutil
+from pathlib import Path
+import pytest
+from src.pharma_graph_pipeline.pipeline import incremental
+from src.pharma_graph_pipeline.pipeline.extract import load_raw_data
+from src.pharma_graph_pipeline.pipeline.preprocess import preprocess_data
+from src.pharma_graph_pipeline.pipeline.transform import build_drug_graph
+from src.pharma_graph_pipeline.main import run_incremental
+
+SAMPLE_DATA = Path(__file__).parent.parent / "fixtures" / "sample_data"
+
+def full_run(config):
+    clean_data = preprocess_data(load_raw_data(config))
+    return build_drug_graph(clean_data['drugs'], clean_data['publications'])
+
+@pytest.fixture
+def config(tmp_path):
+    raw_dir = tmp_path / "raw"
+    shutil.copytree(SAMPLE_DATA, raw_dir)
+    return {
+        'input_paths': {'raw_data_dir': str(raw_dir)},
+        'incremental': {'state_dir': str(tmp_path / "state")}
+    }
+
+@pytest.fixture
+def processed_files(monkeypatch):
+    """Records the publication files that are actually extracted and matched."""
+    processed = []
+    original = incremental._find_file_mentions
+
+    def tracking_find_file_mentions(file_path, *args):
+        processed.append(file_path.name)
+        return original(file_path, *args)
+
+    monkeypatch.setattr(incremental, '_find_file_mentions', tracking_find_file_mentions)
+    return processed
+
+def test_incremental_runs_only_process_the_delta(config, processed_files):
+    raw_dir = Path(config['input_paths']['raw_data_dir'])
+
+    # First run: everything is new
+    assert run_incremental(config) == full_run(config)
+    assert processed_files == ['clinical_trials.csv', 'pubmed.csv', 'pubmed.json']
+
+    # Nothing changed (a touched file keeps its content hash)
+    processed_files.clear()
+    os.utime(raw_dir / "pubmed.csv", ns=(0, 0))
+    assert run_incremental(config) == full_run(config)
+    assert processed_files == []
+
+    # A new file lands
+    processed_files.clear()
+    (raw_dir / "pubmed_2023.csv").write_text("id,title,date,journal\n7,Aspirin again,2023-01-01,NEJM\n")
+    assert run_incremental(config) == full_run(config)
+    assert processed_files == ['pubmed_2023.csv']
+
+    # A file is deleted
+    processed_files.clear()
+    (raw_dir / "pubmed.json").unlink()
+    assert run_incremental(config) == full_run(config)
+    assert processed_files == []
+
+def test_incremental_run_rematches_everything_when_drugs_change(config, processed_files):
+    raw_dir = Path(config['input_paths']['raw_data_dir'])
+    run_incremental(config)
+
+    processed_files.clear()
+    with open(raw_dir / "drugs.csv", 'a') as f:
+        f.write("\nDRUG3,TRIAL\n")
+    assert run_incremental(config) == full_run(config)
+    assert processed_files == ['clinical_trials.csv', 'pubmed.csv', 'pubmed.json']
+
+def test_incremental_run_rejects_fuzzy_matching(config):
+    config['transform'] = {'matching': {'mode': 'fuzzy'}}
+    with pytest.raises(ValueError, match="only support the 'exact' matching mode"):
+        run_incremental(config)
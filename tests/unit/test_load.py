@@ -0,0 +1,120 @@
+# tests/unit/test_load.py
+import gzip
+import json
+import pytest
+from src.pharma_graph_pipeline.pipeline import load
+import pandas as pd
+from src.pharma_graph_pipeline.pipeline.load import save_to_json, save_edge_list, save_partitioned_graph
+from src.pharma_graph_pipeline.pipeline.mentions import MentionTable
+from src.pharma_graph_pipeline.pipeline.transform import iter_journals
+
+GRAPH = {
+    "journals": [
+        {
+            "title": "journal one",
+            "references": {
+                "pubmed": [{"article_id": "1", "article_title": "é drug-x", "mention_date": "2020-01-01"}],
+                "clinical_trials": []
+            }
+        },
+        {"title": "journal two", "references": {"pubmed": [], "clinical_trials": [{"article_id": "NCT1"}]}}
+    ]
+}
+
+DRUG_GRAPH = {
+    "drugs": [
+        {
+            "atccode": "A01",
+            "drug": "DRUG-X",
+            "references": {"pubmed": [{"article_id": "1", "journal": "journal one"}], "clinical_trials": []}
+        }
+    ]
+}
+
+@pytest.mark.parametrize("graph", [GRAPH, {"journals": []}, DRUG_GRAPH])
+def test_pretty_output_is_identical_to_json_dump(tmp_path, graph):
+    """The streamed pretty output is byte-for-byte the historical indent=4 dump."""
+    path = tmp_path / "graph.json"
+    (key, items), = graph.items()
+    assert save_to_json({key: iter(items)}, str(path)) == len(items)
+
+    expected = json.dumps(graph, indent=4, ensure_ascii=False).encode('utf-8')
+    assert path.read_bytes() == expected
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_compact_gzip_output(tmp_path, monkeypatch, use_orjson):
+    """Compact output has no whitespace and round-trips through gzip, with or without orjson."""
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(load, "orjson", None)
+    path = tmp_path / "graph.json.gz"
+    save_to_json(GRAPH, str(path), compact=True, compression='gzip')
+
+    content = gzip.decompress(path.read_bytes()).decode('utf-8')
+    assert '\n' not in content and '": ' not in content
+    assert json.loads(content) == GRAPH
+
+def test_unknown_compression_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        save_to_json(GRAPH, str(tmp_path / "graph.json"), compression='brotli')
+
+def test_edge_list_output(tmp_path):
+    edges = pd.DataFrame({"mentioned_drug_id": ["A01"], "article_id": ["1"], "journal": ["journal one"]})
+    path = tmp_path / "edges.csv.gz"
+    assert save_edge_list(edges, str(path), compression='gzip') == 1
+    assert gzip.decompress(path.read_bytes()).decode('utf-8').splitlines() == \
+        ["mentioned_drug_id,article_id,journal", "A01,1,journal one"]
+
+def mention(journal, article_id, date, drug="ASPIRIN", source_type="pubmed"):
+    return {
+        'journal': journal, 'source_type': source_type, 'article_id': article_id, 'article_title': f"title {article_id}",
+        'mention_date': date, 'mentioned_drug_id': drug[:3], 'mentioned_drug_name': drug,
+    }
+
+MENTIONS = [
+    mention("bmj", "1", "2020-01-05"), mention("nejm", "2", "2020-01-20", "PARACETAMOL"),
+    mention("bmj", "NCT1", "2020-02-01", source_type="clinical_trial"), mention("nejm", "3", "2021-06-30"),
+]
+
+@pytest.mark.parametrize("partition_by, expected", [
+    ('month', {"2020-01": ["1", "2"], "2020-02": ["NCT1"], "2021-06": ["3"]}),
+    ('year', {"2020": ["1", "2", "NCT1"], "2021": ["3"]}),
+])
+def test_partitioned_graph(tmp_path, partition_by, expected):
+    assert save_partitioned_graph(MentionTable.from_records(MENTIONS), str(tmp_path), partition_by) == \
+        {'partitions': len(expected), 'written': len(expected), 'removed': 0}
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert [partition['partition'] for partition in manifest['partitions']] == list(expected)
+    for partition in manifest['partitions']:
+        article_ids = expected[partition['partition']]
+        records = [record for record in MENTIONS if record['article_id'] in article_ids]
+        # Each partition is the graph of its own mentions
+        graph = json.loads((tmp_path / partition['path']).read_text())
+        assert graph == {'journals': list(iter_journals(MentionTable.from_records(records)))}
+        assert partition['mentions'] == len(records)
+        assert partition['first_mention_date'] == min(record['mention_date'] for record in records)
+        assert partition['start_date'] <= partition['first_mention_date'] <= partition['end_date']
+    assert manifest['partitions'][0]['end_date'] == ("2020-01-31" if partition_by == 'month' else "2020-12-31")
+
+def test_only_changed_partitions_are_rewritten(tmp_path):
+    save_partitioned_graph(MentionTable.from_records(MENTIONS), str(tmp_path))
+    assert save_partitioned_graph(MentionTable.from_records(MENTIONS), str(tmp_path)) == \
+        {'partitions': 3, 'written': 0, 'removed': 0}
+
+    # A new mention in January, and no more mention in June 2021
+    mentions = MENTIONS[:3] + [mention("bmj", "4", "2020-01-31")]
+    assert save_partitioned_graph(MentionTable.from_records(mentions), str(tmp_path)) == \
+        {'partitions': 2, 'written': 1, 'removed': 1}
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["2020-01.json", "2020-02.json", "manifest.json"]
+    assert "title 4" in (tmp_path / "2020-01.json").read_text()
+
+    # Other output settings rewrite every partition
+    assert save_partitioned_graph(MentionTable.from_records(mentions), str(tmp_path), compression='gzip') == \
+        {'partitions': 2, 'written': 2, 'removed': 2}
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["2020-01.json.gz", "2020-02.json.gz", "manifest.json"]
+
+def test_unknown_partition_granularity(tmp_path):
+    with pytest.raises(ValueError, match="Unknown partition granularity"):
+        save_partitioned_graph(MentionTable.from_records(MENTIONS), str(tmp_path), 'week')
@@ -0,0 +1,66 @@
+# tests/unit/test_matcher.py
+import random
+import re
+from src.pharma_graph_pipeline.pipeline.matcher import DrugMatcher, FuzzyDrugMatcher, edit_distance, EXACT, SYNONYM, FUZZY
+
+def regex_matches(drug_names, title):
+    """Reference implementation: the historical per-drug regex scan."""
+    title_lower = title.lower()
+    return [
+        position for position, name in enumerate(drug_names)
+        if re.search(fr'\b{re.escape(name.lower())}\b', title_lower)
+    ]
+
+def test_match_whole_words_only():
+    matcher = DrugMatcher(["ON", "BETAMETHASONE", "DRUG-X"])
+    assert matcher.match("treatment with betamethasone") == [1]
+    assert matcher.match("a trial of drug-x") == [2]
+    assert matcher.match("a trial of drug-xy and predrug-x") == []
+
+def test_match_multi_word_and_duplicate_drugs():
+    matcher = DrugMatcher(["TRANEXAMIC ACID", "ETHANOL", "ethanol"])
+    assert matcher.match("Tranexamic Acid versus ethanol") == [0, 1, 2]
+    assert matcher.match("tranexamic and acid") == []
+
+def test_match_is_equivalent_to_regex_scan():
+    vocabulary = ["aspirin", "acid", "tranexamic", "drug", "x", "y", "ön", "the", "of"]
+    separators = [" ", "-", ", ", "(", ")", ".", "/"]
+    drug_names = [
+        "ASPIRIN", "ACID", "TRANEXAMIC ACID", "DRUG-X", "DRUG-Y", "X", "ÖN",
+        "(X)", "-Y", "OF THE", "DRUG.", "+",
+    ]
+    matcher = DrugMatcher(drug_names)
+
+    rng = random.Random(0)
+    for _ in range(2000):
+        words = rng.choices(vocabulary, k=rng.randint(0, 8))
+        title = "".join(word + rng.choice(separators) for word in words)
+        assert matcher.match(title) == regex_matches(drug_names, title), title
+
+def test_fuzzy_matcher_records_match_types():
+    matcher = FuzzyDrugMatcher(
+        ["DIPHENHYDRAMINE", "EPINEPHRINE", "TRANEXAMIC ACID", "ETHANOL"],
+        [(0, "BENADRYL"), (1, "ADRENALINE"), (1, "EPI")]
+    )
+    # The exact name wins over a synonym of the same drug
+    assert matcher.match("Benadryl or diphenhydramine") == [(0, EXACT, 1.0)]
+    assert matcher.match("benadryl, then adrenaline") == [(0, SYNONYM, 1.0), (1, SYNONYM, 1.0)]
+    assert matcher.match("ephinephrine and tranexamik acid") == [(1, FUZZY, 0.909), (2, FUZZY, 0.929)]
+    # Words shorter than min_fuzzy_length must match exactly
+    assert matcher.match("tranexamic acd, epo and etanol") == [(3, FUZZY, 0.857)]
+    assert matcher.counters['synonym_mentions'] == 2 and matcher.counters['fuzzy_mentions'] == 3
+    assert matcher.first_tokens is None
+
+    exact_only = FuzzyDrugMatcher(["ETHANOL"], [(0, "ETHYL ALCOHOL")], max_distance=0)
+    assert exact_only.first_tokens == {"ethanol", "ethyl"}
+
+def test_fuzzy_index_finds_every_close_token():
+    """The deletion index finds exactly the tokens within the edit distance."""
+    rng = random.Random(1)
+    words = ["".join(rng.choices("abcde", k=rng.randint(3, 7))) for _ in range(200)]
+    matcher = FuzzyDrugMatcher(words[:100], max_distance=2, min_fuzzy_length=3)
+    first_tokens = set(words[:100])
+    for word in words:
+        expected = {token for token in first_tokens if edit_distance(word, token, 2) <= 2}
+        assert {token for token, _ in matcher._close_tokens(word)} == expected, word
+    assert edit_distance("abcd", "abdc", 1) == 1 and edit_distance("kitten", "sitting", 3) == 3
@@ -0,0 +1,87 @@
+# tests/unit/test_memo.py
+import json
+from pathlib import Path
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.pharma_graph_pipeline.pipeline import memo as memo_module
+from src.pharma_graph_pipeline.pipeline.memo import TitleMemo
+from src.pharma_graph_pipeline.pipeline.matcher import DrugMatcher
+from src.pharma_graph_pipeline.pipeline.preprocess import clean_text_series
+from src.pharma_graph_pipeline.pipeline.transform import match_titles
+from src.pharma_graph_pipeline.pipeline.cache import StageCache
+from src.pharma_graph_pipeline.main import run_batch
+
+SAMPLE_DATA = Path(__file__).parent.parent / "fixtures" / "sample_data"
+EXPECTED_OUTPUT = Path(__file__).parent.parent / "fixtures" / "expected_output.json"
+
+def test_memo_cleans_and_matches_like_the_pipeline(tmp_path):
+    texts = pd.Series(["  Some Title!  ", None, "About <b>Drug-X</b>", "  Some Title!  ", 12], dtype=object)
+    drugs = pd.DataFrame({"atccode": ["A01", "B02"], "drug": ["DRUG-X", "DRUG-Y"]})
+    matcher = DrugMatcher.from_drugs_df(drugs)
+    titles = clean_text_series(texts).tolist()
+
+    for run in range(2):
+        memo = TitleMemo(tmp_path / "memo.parquet", max_entries=100)
+        assert memo.clean_texts(texts, clean_text_series).tolist() == titles
+        assert memo.match_titles(titles, drugs, lambda missing: match_titles(matcher, missing)) == \
+            match_titles(matcher, titles)
+        memo.close()
+
+    # The second run found every distinct text and title in the memo
+    assert memo.counters == {'clean_hits': 4, 'clean_misses': 0, 'match_hits': 4, 'match_misses': 0}
+
+def test_memo_clears_matches_when_drugs_change(tmp_path):
+    drugs = pd.DataFrame({"atccode": ["A01"], "drug": ["DRUG-X"]})
+    changed_drugs = pd.DataFrame({"atccode": ["B02", "A01"], "drug": ["DRUG-Y", "DRUG-X"]})
+
+    def run(drugs_df, matched_positions):
+        memo = TitleMemo(tmp_path / "memo.parquet", max_entries=100)
+        titles = memo.clean_texts(pd.Series(["Drug-X"]), clean_text_series).tolist()
+        matches = memo.match_titles(titles, drugs_df, lambda missing: matched_positions)
+        memo.close()
+        return matches
+
+    assert run(drugs, [[0]]) == [[0]]
+    # Same drugs: the memoized match is returned without calling the matcher
+    assert run(drugs, [[-1]]) == [[0]]
+    # New drug list: the title is matched again
+    assert run(changed_drugs, [[1]]) == [[1]]
+
+def test_memo_is_cleared_when_the_cleaning_code_changes(tmp_path, monkeypatch):
+    memo = TitleMemo(tmp_path / "memo.parquet", max_entries=100)
+    memo.clean_texts(pd.Series(["Drug-X"]), clean_text_series)
+    memo.close()
+
+    monkeypatch.setattr(memo_module, 'code_fingerprint', lambda: "changed")
+    memo = TitleMemo(tmp_path / "memo.parquet", max_entries=100)
+    assert memo.clean_texts(pd.Series(["Drug-X"]), lambda texts: texts.str.lower()).tolist() == ["drug-x"]
+    assert memo.counters['clean_misses'] == 1
+
+def test_memo_evicts_least_recently_used_entries(tmp_path):
+    memo = TitleMemo(tmp_path / "memo.parquet", max_entries=2)
+    memo.clean_texts(pd.Series(["a", "b"]), clean_text_series)
+    memo.close()
+
+    memo = TitleMemo(tmp_path / "memo.parquet", max_entries=2)
+    memo.clean_texts(pd.Series(["b", "c"]), clean_text_series)
+    memo.close()
+
+    # 'a' was the only entry not used by the last run
+    memo = TitleMemo(tmp_path / "memo.parquet", max_entries=2)
+    memo.clean_texts(pd.Series(["a", "b", "c"]), clean_text_series)
+    assert memo.counters['clean_misses'] == 1
+
+def test_run_batch_with_memo(tmp_path):
+    with open(EXPECTED_OUTPUT, 'r') as f:
+        expected_json = json.load(f)
+    config = {
+        'input_paths': {'raw_data_dir': str(SAMPLE_DATA)},
+        'memo': {'enabled': True, 'path': str(tmp_path / "memo.parquet")},
+    }
+    disabled_cache = StageCache(str(tmp_path / "cache"), 0, enabled=False)
+
+    assert run_batch(config, disabled_cache) == expected_json
+    assert run_batch(config, disabled_cache) == expected_json
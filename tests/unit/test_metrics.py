@@ -0,0 +1,39 @@
+# tests/unit/test_metrics.py
+import json
+import pandas as pd
+from src.pharma_graph_pipeline.pipeline.metrics import RunMetrics
+from src.pharma_graph_pipeline.pipeline.transform import build_drug_graph
+
+def test_stage_records_timings_rows_and_profile(tmp_path):
+    """A stage records its rows, timings and peak RSS, and dumps a profile when asked."""
+    metrics = RunMetrics(profile_dir=str(tmp_path / "profiles"))
+    with metrics.stage('extract') as record:
+        record['rows_out'] = 3
+    metrics.record_file('drugs.csv', 0.5, 3)
+    metrics.save(str(tmp_path / "report.json"))
+
+    with open(tmp_path / "report.json", 'r') as f:
+        report = json.load(f)
+    stage = report['stages']['extract']
+    assert stage['rows_out'] == 3 and stage['rows_in'] is None
+    assert stage['wall_seconds'] >= 0 and stage['cpu_seconds'] >= 0
+    assert report['files'] == [{'file': 'drugs.csv', 'seconds': 0.5, 'rows': 3}]
+    assert (tmp_path / "profiles" / "extract.prof").is_file()
+
+def test_matcher_counters_are_merged_from_workers():
+    """The matcher counters are the same whether matching runs serially or in workers."""
+    drugs = pd.DataFrame({"atccode": ["A01", "B02"], "drug": ["DRUG-X", "DRUG-Y"]})
+    publications = pd.DataFrame({
+        'id': [str(i) for i in range(10)],
+        'title': ["drug-x and drug-y", "nothing here"] * 5,
+        'date': ["2025-01-01"] * 10,
+        'journal': ["journal"] * 10,
+        'source_type': ["pubmed"] * 10
+    })
+
+    serial_metrics, parallel_metrics = RunMetrics(), RunMetrics()
+    build_drug_graph(drugs, publications, metrics=serial_metrics)
+    build_drug_graph(drugs, publications, workers=2, shard_size=3, metrics=parallel_metrics)
+
+    assert serial_metrics.counters == {'titles_scanned': 10, 'candidate_hits': 10, 'mentions': 10}
+    assert parallel_metrics.counters == serial_metrics.counters
@@ -0,0 +1,50 @@
+# tests/unit/test_normalize.py
+import numpy as np
+import pandas as pd
+import pytest
+from src.pharma_graph_pipeline.pipeline.normalize import (
+    clean_text, clean_text_series, is_normalized, normalized_tokens, WORD_PATTERN
+)
+from src.pharma_graph_pipeline.pipeline.matcher import DrugMatcher, FuzzyDrugMatcher, match_batch
+
+# Characters the cleaning treats differently: cases, punctuation, escapes,
+# tags, ASCII and Unicode whitespace, accented (À-ÿ) and other non-ASCII letters
+ALPHABET = list("aZ9_-!(.:™ \t\x0b\x1c\xa0　<>/\\xc3") + ["\\xc3", "<b>", "</i>", "é", "Ü", "×", "ß", "ﬁ", "Σ", "İ", "K"]
+
+def random_texts(count: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    return [''.join(rng.choice(ALPHABET, size=rng.integers(0, 12))) for _ in range(count)]
+
+@pytest.mark.parametrize("texts", [
+    random_texts(3000),
+    # Only ASCII values, which take the translate table path
+    [text for text in random_texts(3000, seed=11) if text.isascii()],
+    ["  Some Title!  ", None, float('nan'), 12, "a\tb\n\nc", "", "  ", "already clean", "already clean"],
+])
+def test_clean_text_series_matches_clean_text(texts):
+    texts = pd.Series(texts, dtype=object)
+    assert clean_text_series(texts).tolist() == [clean_text(text) for text in texts]
+
+def test_clean_columns_are_returned_as_is():
+    texts = pd.Series(["some title", "drug-x and drug_y", ""], index=[3, 1, 2])
+    assert is_normalized(texts.tolist(), strict=True)
+    assert clean_text_series(texts).equals(texts)
+    for text in [" some title", "some  title", "Some title", "some\ntitle", "café", "a.b"]:
+        assert not is_normalized([text], strict=True), text
+
+def test_normalized_tokens_match_the_word_pattern():
+    titles = clean_text_series(pd.Series(random_texts(3000, seed=3), dtype=object)).tolist()
+    assert is_normalized(titles)
+    assert [normalized_tokens(title) for title in titles] == [WORD_PATTERN.findall(title) for title in titles]
+    assert not is_normalized(["Raw title"]) and not is_normalized(["a, b"])
+
+@pytest.mark.parametrize("matcher", [
+    DrugMatcher(["ASPIRIN", "DRUG-X", "TRANEXAMIC ACID", "ÉTHANOL"]),
+    FuzzyDrugMatcher(["ASPIRIN", "DRUG-X", "TRANEXAMIC ACID", "ÉTHANOL"], synonyms=[(0, "ACETYLSALICYLIC ACID")]),
+])
+def test_match_batch_fast_path(matcher):
+    raw_titles = ["Aspirin, then Drug-X", "tranexamic-acid trial", "éthanol and asprin", "acetylsalicylic acid"]
+    expected = [matcher.match(title) for title in raw_titles]
+    # Cleaned titles take the fast path, raw ones the regular one: same matches
+    assert match_batch(matcher, clean_text_series(pd.Series(raw_titles)).tolist()) == expected
+    assert match_batch(matcher, raw_titles) == expected
@@ -1,7 +1,13 @@
 # tests/unit/test_preprocess.py
 import pandas as pd
 from pandas.testing import assert_frame_equal
-from src.pharma_graph_pipeline.pipeline.preprocess import clean_text, preprocess_data
+from src.pharma_graph_pipeline.pipeline.preprocess import (
+    clean_text, clean_text_series, generate_surrogate_key, generate_surrogate_keys,
+    format_id, format_ids, preprocess_data, decode_publications, parse_dates,
+    preprocess_publications, prefilter_publications
+)
+from src.pharma_graph_pipeline.pipeline.matcher import DrugMatcher
+from src.pharma_graph_pipeline.pipeline.transform import find_mentions
 
 def test_clean_text():
     # ... (this test function is unchanged)
@@ -34,9 +40,75 @@ def test_preprocess_data():
     
     # Run the function
     processed_data = preprocess_data(raw_data)
-    
+    publications = processed_data["publications"]
+
+    # Dates are stored as day numbers, journals and source types as categoricals
+    assert publications['date'].dtype == 'int32'
+    assert publications['date'].tolist() == [20089]
+    assert isinstance(publications['journal'].dtype, pd.CategoricalDtype)
+    assert isinstance(publications['source_type'].dtype, pd.CategoricalDtype)
+
     # The comparison is done after dropping the surrogate_key from the actual result
     assert_frame_equal(
-        processed_data["publications"].drop(columns=['surrogate_key']),
+        decode_publications(publications).drop(columns=['surrogate_key']),
         expected_publications
-    )
\ No newline at end of file
+    )
+
+def test_vectorized_helpers_match_row_wise_helpers():
+    """The vectorized helpers must give byte-for-byte the row-wise results."""
+    texts = pd.Series([
+        "  Some Title!  ", "Another Title with <p>HTML</p>", "Weird \\xc3\\x28 spacing",
+        None, float('nan'), 12, "Hôpitaux Universitaires de Genève", "Journal of emergency nursing\\xc3\\x28",
+        "QUZYTTIR™ (Cetirizine)", "a\tb\n\nc", "", "  ",
+    ], dtype=object)
+    assert clean_text_series(texts).tolist() == [clean_text(text) for text in texts]
+
+    publications = pd.DataFrame({
+        'title': ["a study", "another study", "é"],
+        'date': ["2025-01-01", "2025-01-02", "2025-01-03"],
+        'journal': ["the journal", "the journal", "ü"],
+    })
+    expected_keys = publications.apply(generate_surrogate_key, axis=1)
+    assert generate_surrogate_keys(publications).tolist() == expected_keys.tolist()
+
+    ids = pd.Series([1, 2.0, '11', ' 12 ', '', 'NCT123', '1e3', 'nan', '-3.7', 2**60 + 1,
+                     '99999999999999999999', -2**70, 1e30, '1_000', '١٢٣', '\u2003 7', 'NCT_1', 'é', None], dtype=object)
+    assert format_ids(ids).tolist() == [format_id(x) for x in ids]
+
+def test_parse_dates_matches_mixed_format_inference():
+    """The format-specific parsing gives the per-row format="mixed" results."""
+    dates = pd.Series([
+        "01/01/2019", "1 January 2020", "2020-01-01", "25/05/2020", "02/01/2019", "27 April 2020",
+        "12/25/2020", "31/02/2020", "2020-13-01", "1 Jan 2020", " 2020-01-01", "1 janvier 2020",
+        "2020-01-01T10:00:00", "not a date", "", None, float('nan'), pd.Timestamp("2021-03-04"), "01/01/2019",
+    ], dtype=object)
+    expected = pd.to_datetime(dates, dayfirst=True, format="mixed", errors="coerce")
+    pd.testing.assert_series_equal(parse_dates(dates), expected)
+
+def test_prefilter_keeps_every_mention():
+    """Prefiltered publications give the mentions of the whole preprocessed table."""
+    drugs = pd.DataFrame({
+        "atccode": ["A01", "B02", "C03", "D04"],
+        "drug": ["DIPHENHYDRAMINE", "Drug-X", "ÉPINÉPHRINE", "BETA BLOCKER"]
+    })
+    titles = [
+        "Diphen<b>hydramine</b> in children", "About diphen\\x2chydramine", "drug-x: a review",
+        "DRUG x", "Épinéphrine, children", "beta blocker trial", "beta-blocker trial",
+        "nothing here", "line one\ndiphenhydramine", None, 12, "drugs x and diphenhydramines",
+    ]
+    raw_publications = pd.DataFrame({
+        'id': [str(i) for i in range(len(titles))],
+        'title': titles,
+        'date': ["2020-01-01"] * len(titles),
+        'journal': ["Journal"] * len(titles),
+        'source_type': ["pubmed"] * len(titles),
+    })
+    matcher = DrugMatcher.from_drugs_df(drugs)
+
+    candidates = prefilter_publications(raw_publications, matcher)
+    assert candidates['id'].tolist() == ["0", "1", "2", "3", "4", "5", "6", "8"]
+    expected = find_mentions(drugs, preprocess_publications(raw_publications.copy())).to_records()
+    assert find_mentions(drugs, preprocess_publications(candidates)).to_records() == expected
+
+    # A drug without any word token may be in any title: nothing is filtered
+    assert len(prefilter_publications(raw_publications, DrugMatcher(["+++"]))) == len(titles)
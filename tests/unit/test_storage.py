@@ -0,0 +1,75 @@
+# tests/unit/test_storage.py
+import json
+from pathlib import Path
+import fsspec
+import pandas as pd
+import pytest
+from src.pharma_graph_pipeline.pipeline.extract import load_raw_data, iter_raw_batches
+from src.pharma_graph_pipeline.pipeline.incremental import file_fingerprint
+from src.pharma_graph_pipeline.pipeline.load import save_to_json, save_to_sqlite
+from src.pharma_graph_pipeline.pipeline.storage import list_files
+
+SAMPLE_DATA = Path(__file__).parent.parent / "fixtures" / "sample_data"
+EXPECTED_OUTPUT = Path(__file__).parent.parent / "fixtures" / "expected_output.json"
+
+@pytest.fixture
+def memory_raw_dir():
+    """Copies the sample data into fsspec's in-memory filesystem."""
+    fs = fsspec.filesystem('memory')
+    for path in SAMPLE_DATA.iterdir():
+        fs.pipe(f"/raw/{path.name}", path.read_bytes())
+    yield "memory://raw"
+    fs.rm("/raw", recursive=True)
+    if fs.exists("/out"):
+        fs.rm("/out", recursive=True)
+
+def test_list_files_is_sorted(memory_raw_dir):
+    assert [file.name for file in list_files(memory_raw_dir)] == sorted(path.name for path in SAMPLE_DATA.iterdir())
+    with pytest.raises(FileNotFoundError):
+        list_files("memory://missing")
+
+@pytest.mark.parametrize("read_workers", [1, 2])
+def test_load_raw_data_from_url_matches_local(memory_raw_dir, read_workers):
+    """Reading from an fsspec URL (prefetched, then parsed) gives the local result."""
+    local_data = load_raw_data({'input_paths': {'raw_data_dir': str(SAMPLE_DATA)}})
+    url_data = load_raw_data({
+        'input_paths': {'raw_data_dir': memory_raw_dir},
+        'extract': {'read_workers': read_workers, 'read_executor': 'thread'}
+    })
+    file_url_data = load_raw_data({'input_paths': {'raw_data_dir': SAMPLE_DATA.as_uri()}})
+
+    for kind in ('drugs', 'publications'):
+        pd.testing.assert_frame_equal(url_data[kind], local_data[kind])
+        pd.testing.assert_frame_equal(file_url_data[kind], local_data[kind])
+
+def test_streaming_batches_from_url(memory_raw_dir):
+    config = {'input_paths': {'raw_data_dir': memory_raw_dir}}
+    batches = list(iter_raw_batches(config, 'publications', batch_size=2))
+    assert max(len(batch) for batch in batches) <= 2
+    assert sum(len(batch) for batch in batches) == len(load_raw_data(config)['publications'])
+
+def test_outputs_to_url(memory_raw_dir):
+    """The JSON graph and the SQLite store can be written to an fsspec URL."""
+    with open(EXPECTED_OUTPUT, 'r') as f:
+        drug_graph = json.load(f)
+    fs = fsspec.filesystem('memory')
+
+    save_to_json(drug_graph, "memory://out/graph.json.gz", compression='gzip')
+    save_to_sqlite(drug_graph, "memory://out/graph.sqlite")
+
+    with fsspec.open("memory://out/graph.json.gz", 'rt', compression='gzip') as f:
+        assert json.load(f) == drug_graph
+    assert fs.cat("/out/graph.sqlite").startswith(b"SQLite format 3")
+
+def test_remote_files_are_fingerprinted_from_their_listing(memory_raw_dir):
+    """Objects with a checksum in their listing are not downloaded to be fingerprinted."""
+    drugs_file = next(file for file in list_files(memory_raw_dir) if file.name == 'drugs.csv')
+    local_checksum = file_fingerprint(SAMPLE_DATA / 'drugs.csv')['checksum']
+    # memory:// lists no checksum: the content is hashed as for a local file
+    assert file_fingerprint(drugs_file)['checksum'] == local_checksum
+
+    drugs_file.info['md5Hash'] = 'bWQ1'
+    drugs_file.content = IOError("not downloaded")
+    assert file_fingerprint(drugs_file) == {
+        'size': drugs_file.info['size'], 'mtime_ns': drugs_file.stat().st_mtime_ns, 'checksum': 'md5Hash:bWQ1'
+    }
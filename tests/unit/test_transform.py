@@ -1,7 +1,13 @@
 # tests/unit/test_transform.py
 import pandas as pd
-from src.pharma_graph_pipeline.pipeline.transform import build_drug_graph
+from src.pharma_graph_pipeline.pipeline.transform import (
+    build_drug_graph, iter_journals, iter_drugs, find_mentions, find_all_mentions
+)
+from src.pharma_graph_pipeline.pipeline.mentions import MentionTable
+from src.pharma_graph_pipeline.pipeline.preprocess import preprocess_publications
 import re # import re
+import random
+import pytest
 
 def test_build_drug_graph_journal_centric():
     """Tests the journal-centric JSON structure generation."""
@@ -73,4 +79,113 @@ def test_build_drug_graph_journal_centric():
     actual_output = build_drug_graph(drugs, publications)
 
     # Compare
-    assert actual_output == expected_output
\ No newline at end of file
+    assert actual_output == expected_output
+
+def test_build_drug_graph_parallel_matches_serial():
+    """The sharded multiprocess matching must give the serial output."""
+    drugs = pd.DataFrame({
+        "atccode": ["A01", "B02", "C03"],
+        "drug": ["DRUG-X", "DRUG-Y", "TRANEXAMIC ACID"]
+    })
+    titles = ["about drug-x", "drug-y and drug-x", "tranexamic acid trial", "nothing here"]
+    publications = pd.DataFrame({
+        'id': [str(i) for i in range(40)],
+        'title': [titles[i % 4] for i in range(40)],
+        'date': ["2025-01-01"] * 40,
+        'journal': [f"journal {i % 3}" for i in range(40)],
+        'source_type': ["pubmed", "clinical_trial"] * 20
+    })
+
+    serial_output = build_drug_graph(drugs, publications)
+    parallel_output = build_drug_graph(drugs, publications, workers=2, shard_size=3)
+
+    assert parallel_output == serial_output
+
+def test_iter_journals_matches_groupby():
+    """The sort-and-slice grouping gives the historical per-journal groupby output."""
+    rng = random.Random(7)
+    mentions = [
+        {
+            'journal': rng.choice(["b journal", "a journal", "é journal", "c"]),
+            'source_type': rng.choice(["pubmed", "clinical_trial", "other"]),
+            'article_id': str(i),
+            'article_title': f"title {i}",
+            'mention_date': "2020-01-01",
+            'mentioned_drug_id': rng.choice(["A01", "B02"]),
+            'mentioned_drug_name': "DRUG",
+        }
+        for i in range(300)
+    ]
+
+    expected_journals = []
+    mentions_df = pd.DataFrame(mentions)
+    for journal_name, journal_group in mentions_df.groupby('journal'):
+        pubmed_mentions = journal_group[journal_group['source_type'] == 'pubmed']
+        trials_mentions = journal_group[journal_group['source_type'] == 'clinical_trial']
+        expected_journals.append({
+            "title": journal_name,
+            "references": {
+                "pubmed": pubmed_mentions.drop(columns=['journal', 'source_type']).to_dict('records'),
+                "clinical_trials": trials_mentions.drop(columns=['journal', 'source_type']).to_dict('records')
+            }
+        })
+
+    assert list(iter_journals(mentions)) == expected_journals
+
+def test_mention_table_matches_mention_records():
+    """Grouping the compact mention table gives the grouping of its expanded records."""
+    drugs = pd.DataFrame({"atccode": ["A01", "B02"], "drug": ["DRUG-X", "DRUG-Y"]})
+    titles = ["about drug-x", "drug-y and drug-x", "nothing here"]
+    publications = preprocess_publications(pd.DataFrame({
+        'id': [str(i) for i in range(30)],
+        'title': [titles[i % 3] for i in range(30)],
+        'date': ["01/01/2025", "2020-05-25"] * 15,
+        'journal': [f"Journal {i % 4}" for i in range(30)],
+        'source_type': ["pubmed", "clinical_trial", "pubmed"] * 10
+    }))
+
+    table = find_mentions(drugs, publications, with_surrogate_key=True)
+    records = table.to_records()
+    assert len(table) == len(records) == 30
+    assert len(table.publications) == 20
+    assert records[1]['mention_date'] == "2020-05-25" and 'surrogate_key' in records[1]
+    assert list(iter_journals(table)) == list(iter_journals(records))
+
+    # Batches concatenate to the whole, and the cached frames rebuild the same table
+    batches = [find_mentions(drugs, publications.iloc[start:start + 7], with_surrogate_key=True) for start in range(0, 30, 7)]
+    assert MentionTable.concat(batches, drugs).to_records() == records
+    assert MentionTable.from_frames(table.to_frames()).to_records() == records
+    assert list(iter_journals(MentionTable.concat([], drugs))) == []
+
+def test_fuzzy_mentions_record_match_type_and_score(tmp_path):
+    """Fuzzy matching records how each drug was matched, through every mention format."""
+    synonyms_path = tmp_path / "synonyms.csv"
+    synonyms_path.write_text("atccode,synonym\nA04AD,BENADRYL\nZZZ,UNKNOWN\n", encoding='utf-8')
+    drugs = pd.DataFrame({"atccode": ["A04AD", "S03AA"], "drug": ["DIPHENHYDRAMINE", "TETRACYCLINE"]})
+    publications = preprocess_publications(pd.DataFrame({
+        'id': ["1", "2", "3", "4"],
+        'title': ["Benadryl for allergy", "Tetracyclin resistance", "nothing here", "diphenhydramine"],
+        'date': ["2020-01-01"] * 4,
+        'journal': ["Journal A", "Journal B", "Journal A", "Journal A"],
+        'source_type': ["pubmed"] * 4
+    }))
+    matching = {'mode': 'fuzzy', 'synonyms_path': str(synonyms_path)}
+
+    table = find_all_mentions(drugs, publications, matching=matching)
+    records = table.to_records()
+    assert [(r['article_id'], r['mentioned_drug_name'], r['match_type'], r['score']) for r in records] == [
+        ("1", "DIPHENHYDRAMINE", "synonym", 1.0),
+        ("2", "TETRACYCLINE", "fuzzy", 0.917),
+        ("4", "DIPHENHYDRAMINE", "exact", 1.0),
+    ]
+    assert list(table.to_edges()['match_type']) == ["synonym", "fuzzy", "exact"]
+    assert next(iter_drugs(table))['references']['pubmed'][0]['match_type'] == "synonym"
+
+    # The match arrays survive the cache frames, the records and the batches without mentions
+    assert MentionTable.from_frames(table.to_frames()).to_records() == records
+    assert MentionTable.from_records(records).to_records() == records
+    empty = find_all_mentions(drugs, publications.iloc[2:3], matching=matching)
+    assert MentionTable.concat([empty, table], drugs).to_records() == records
+
+    with pytest.raises(ValueError):
+        find_all_mentions(drugs, publications, matching={'mode': 'phonetic'})